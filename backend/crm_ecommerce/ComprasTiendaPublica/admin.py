@@ -10,13 +10,13 @@ class DetallePedidoPublicoInline(admin.TabularInline):
 class PedidoPublicoAdmin(admin.ModelAdmin):
     list_display = (
         'id', 'nombre', 'apellido', 'telefono', 'correo',
-        'metodo_pago', 'total', 'estado', 'fecha', 'tienda'
+        'metodo_pago', 'total', 'estado', 'fecha_creacion', 'tienda'
     )
-    list_filter = ('estado', 'metodo_pago', 'fecha', 'tienda')
+    list_filter = ('estado', 'metodo_pago', 'fecha_creacion', 'tienda')
     search_fields = ('nombre', 'apellido', 'telefono', 'correo', 'codigo_seguimiento')
-    readonly_fields = ('fecha',)
+    readonly_fields = ('fecha_creacion', 'origen')
     inlines = [DetallePedidoPublicoInline]
-    ordering = ('-fecha',)
+    ordering = ('-fecha_creacion',)
 
 @admin.register(DetallePedidoPublico)
 class DetallePedidoPublicoAdmin(admin.ModelAdmin):
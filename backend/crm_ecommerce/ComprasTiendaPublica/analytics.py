@@ -0,0 +1,100 @@
+"""
+Reporte de ventas calculado en la base de datos.
+
+Reemplaza la agregación que hacía el frontend (SalesReport.js) descargando
+todos los pedidos: cada indicador se resuelve con un GROUP BY sobre los
+resúmenes diarios de la tienda (rollups.py) filtrados por rango de fechas,
+y la respuesta solo contiene los totales.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import VentaDiaria, VentaProductoDiaria
+
+# Productos incluidos en el ranking por defecto
+TOP_PRODUCTOS = 5
+
+
+def rango_fechas(fecha_inicio, fecha_fin):
+    """Convierte un rango de días (inclusive) en [inicio, fin) con zona horaria."""
+    tz = timezone.get_current_timezone()
+    inicio = timezone.make_aware(datetime.combine(fecha_inicio, time.min), tz)
+    fin = timezone.make_aware(datetime.combine(fecha_fin + timedelta(days=1), time.min), tz)
+    return inicio, fin
+
+
+def resumen_ventas(tienda, fecha_inicio, fecha_fin, estado=None, metodo_pago=None, top=TOP_PRODUCTOS):
+    """
+    Calcula el reporte de ventas de `tienda` entre dos fechas (inclusive).
+
+    Lee los resúmenes diarios (VentaDiaria / VentaProductoDiaria, ver
+    rollups.py), así el costo depende de la cantidad de días del rango y no
+    de la cantidad de pedidos.
+
+    Returns:
+        dict: totales, pedidos por estado, ventas por método de pago y por
+        día, productos más vendidos y métodos de pago usados por la tienda.
+    """
+    filtros = {'tienda': tienda, 'dia__range': (fecha_inicio, fecha_fin)}
+    if estado:
+        filtros['estado'] = estado
+    if metodo_pago:
+        filtros['metodo_pago'] = metodo_pago
+
+    # Las filas en cero quedan cuando un pedido cambia de estado
+    ventas = VentaDiaria.objects.filter(pedidos__gt=0, **filtros).order_by()
+
+    pedidos_por_estado = {}
+    ventas_por_estado = {}
+    for fila in ventas.values('estado').annotate(pedidos=Sum('pedidos'), total=Sum('total')):
+        pedidos_por_estado[fila['estado']] = fila['pedidos']
+        ventas_por_estado[fila['estado']] = fila['total']
+
+    ventas_por_metodo_pago = {
+        fila['metodo_pago']: fila['total']
+        for fila in ventas.values('metodo_pago').annotate(total=Sum('total'))
+    }
+
+    ventas_por_dia = [
+        {'fecha': fila['dia'].isoformat(), 'pedidos': fila['pedidos'], 'total': fila['total']}
+        for fila in (
+            ventas.values('dia')
+            .annotate(pedidos=Sum('pedidos'), total=Sum('total'))
+            .order_by('dia')
+        )
+    ]
+
+    productos_mas_vendidos = [
+        {'nombre': fila['nombre_producto'], 'cantidad': fila['cantidad'], 'total': fila['total']}
+        for fila in (
+            VentaProductoDiaria.objects
+            .filter(cantidad__gt=0, **filtros)
+            .values('nombre_producto')
+            .annotate(cantidad=Coalesce(Sum('cantidad'), 0), total=Sum('total'))
+            .order_by('-cantidad', 'nombre_producto')[:top]
+        )
+    ]
+
+    # Métodos de pago usados por la tienda, para el filtro del reporte
+    metodos_pago = sorted(
+        VentaDiaria.objects.filter(tienda=tienda, pedidos__gt=0)
+        .order_by()
+        .values_list('metodo_pago', flat=True)
+        .distinct()
+    )
+
+    return {
+        'fecha_inicio': fecha_inicio.isoformat(),
+        'fecha_fin': fecha_fin.isoformat(),
+        'total_ventas': sum(ventas_por_estado.values(), 0),
+        'total_pedidos': sum(pedidos_por_estado.values()),
+        'pedidos_por_estado': pedidos_por_estado,
+        'ventas_por_estado': ventas_por_estado,
+        'ventas_por_metodo_pago': ventas_por_metodo_pago,
+        'ventas_por_dia': ventas_por_dia,
+        'productos_mas_vendidos': productos_mas_vendidos,
+        'metodos_pago': metodos_pago,
+    }
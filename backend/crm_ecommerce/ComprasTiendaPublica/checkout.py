@@ -0,0 +1,193 @@
+"""
+Reserva de stock para las compras de la tienda pública.
+
+reservar_stock() resuelve por id o por nombre y bloquea con SELECT ... FOR
+UPDATE los productos de todas las líneas del pedido, en orden de id para
+que dos compras simultáneas no se bloqueen mutuamente, verifica que alcance
+el stock y lo descuenta con un solo UPDATE. Son dos consultas por pedido
+sin importar la cantidad de líneas. Debe llamarse dentro de
+transaction.atomic(): los bloqueos duran hasta el final de la transacción
+y, si el pedido falla después, el descuento se revierte.
+"""
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+from django.utils import timezone
+
+from tienda.models import Pedido, Producto
+from tienda.storefront import storefront_cache
+
+from .rollups import registrar_pedido
+
+
+class StockInsuficiente(Exception):
+    """Una o más líneas del pedido piden más unidades de las disponibles."""
+
+    def __init__(self, faltantes):
+        self.faltantes = faltantes
+        nombres = ', '.join(f['producto'] for f in faltantes)
+        super().__init__(f"Stock insuficiente para: {nombres}")
+
+    def detalle(self):
+        return {'error': str(self), 'productos': self.faltantes}
+
+
+class EstadoNoValido(Exception):
+    """El estado pedido no está en Pedido.ESTADO_CHOICES."""
+
+    def __init__(self, estado):
+        self.estado = estado
+        super().__init__(f"Estado no válido: {estado}")
+
+    def detalle(self):
+        return {'error': 'Estado no válido', 'estado': self.estado}
+
+
+def _resolver_productos(tienda, lineas, bloquear=False):
+    """
+    Resuelve en una consulta el producto de cada línea (nombre_producto,
+    cantidad, producto_id): por id si la línea lo trae, si no por nombre
+    (el de menor id si hay nombres repetidos).
+
+    Returns:
+        list: Producto o None por cada línea, en el mismo orden.
+    """
+    ids = {producto_id for _, _, producto_id in lineas if producto_id}
+    nombres = {nombre for nombre, _, producto_id in lineas if not producto_id}
+    productos = (
+        Producto.objects
+        .filter(tienda=tienda)
+        .filter(Q(pk__in=ids) | Q(nombre__in=nombres))
+        .order_by('id')
+    )
+    if bloquear:
+        productos = productos.select_for_update()
+
+    por_id = {}
+    por_nombre = {}
+    for producto in productos:
+        por_id[producto.pk] = producto
+        por_nombre.setdefault(producto.nombre, producto)
+
+    return [
+        por_id.get(int(producto_id)) if producto_id else por_nombre.get(nombre)
+        for nombre, _, producto_id in lineas
+    ]
+
+
+def _cantidades(lineas, productos):
+    """Unidades pedidas por id de producto (varias líneas pueden ser el mismo)."""
+    cantidades = {}
+    for (_, cantidad, _), producto in zip(lineas, productos):
+        if producto is not None:
+            cantidades[producto.pk] = cantidades.get(producto.pk, 0) + int(cantidad)
+    return cantidades
+
+
+def _ajustar_stock(tienda, productos, cantidades, signo):
+    if not cantidades:
+        return
+    Producto.all_objects.filter(pk__in=list(cantidades)).update(
+        stock=Case(
+            *[When(pk=pk, then=F('stock') + signo * cantidad) for pk, cantidad in cantidades.items()],
+            default=F('stock'),
+        ),
+        fecha_actualizacion=timezone.now(),
+    )
+    ajustados = set()
+    for producto in productos:
+        if producto is not None and producto.pk not in ajustados:
+            producto.stock += signo * cantidades[producto.pk]
+            ajustados.add(producto.pk)
+
+    # UPDATE no emite señales: el catálogo público muestra el stock
+    slug = tienda.slug
+    transaction.on_commit(lambda: storefront_cache.invalidate(slug))
+
+
+def normalizar_lineas(lineas):
+    """Acepta líneas (nombre, cantidad) o (nombre, cantidad, producto_id)."""
+    return [tuple(linea) + (None,) * (3 - len(linea)) for linea in lineas]
+
+
+def reservar_stock(tienda, lineas):
+    """
+    Descuenta el stock de las líneas (nombre_producto, cantidad[, producto_id])
+    del pedido.
+
+    Returns:
+        list: el Producto de cada línea, en el mismo orden, con el stock ya
+        descontado.
+
+    Raises:
+        StockInsuficiente: si algún producto no existe o no alcanza su stock.
+    """
+    lineas = normalizar_lineas(lineas)
+    if not lineas:
+        return []
+
+    productos = _resolver_productos(tienda, lineas, bloquear=True)
+    cantidades = _cantidades(lineas, productos)
+
+    faltantes = []
+    informados = set()
+    for (nombre, cantidad, producto_id), producto in zip(lineas, productos):
+        if producto is None:
+            faltantes.append({
+                'producto': nombre,
+                'producto_id': producto_id,
+                'solicitado': int(cantidad),
+                'disponible': 0,
+            })
+        elif cantidades[producto.pk] > producto.stock and producto.pk not in informados:
+            informados.add(producto.pk)
+            faltantes.append({
+                'producto': producto.nombre,
+                'producto_id': producto.pk,
+                'solicitado': cantidades[producto.pk],
+                'disponible': producto.stock,
+            })
+    if faltantes:
+        raise StockInsuficiente(faltantes)
+
+    _ajustar_stock(tienda, productos, cantidades, -1)
+    return productos
+
+
+def liberar_stock(tienda, lineas):
+    """Devuelve al stock las líneas de un pedido cancelado. Ignora productos que ya no existen."""
+    lineas = normalizar_lineas(lineas)
+    if not lineas:
+        return []
+    productos = _resolver_productos(tienda, lineas, bloquear=True)
+    _ajustar_stock(tienda, productos, _cantidades(lineas, productos), 1)
+    return productos
+
+
+def lineas_del_pedido(pedido):
+    """Líneas (nombre_producto, cantidad, producto_id) de un pedido."""
+    return pedido.detalles.values_list('nombre_producto', 'cantidad', 'producto_id')
+
+
+def cambiar_estado(pedido, nuevo_estado):
+    """
+    Cambia el estado de un pedido de la tienda pública. Cancelar devuelve el
+    stock y reactivar un pedido cancelado lo vuelve a reservar; el pedido se
+    mueve al nuevo estado en los resúmenes diarios. Debe llamarse dentro de
+    transaction.atomic().
+
+    Raises:
+        EstadoNoValido: si nuevo_estado no es uno de Pedido.ESTADO_CHOICES.
+        StockInsuficiente: al reactivar un pedido sin stock suficiente.
+    """
+    if nuevo_estado not in dict(Pedido.ESTADO_CHOICES):
+        raise EstadoNoValido(nuevo_estado)
+
+    if nuevo_estado == 'cancelado' and pedido.estado != 'cancelado':
+        liberar_stock(pedido.tienda, lineas_del_pedido(pedido))
+    elif pedido.estado == 'cancelado' and nuevo_estado != 'cancelado':
+        reservar_stock(pedido.tienda, lineas_del_pedido(pedido))
+
+    registrar_pedido(pedido, signo=-1)
+    pedido.estado = nuevo_estado
+    pedido.save()
+    registrar_pedido(pedido)
@@ -0,0 +1,148 @@
+"""
+Claves de idempotencia para las solicitudes que crean pedidos o leads.
+
+El cliente envía un encabezado Idempotency-Key (por ejemplo un UUID) que se
+mantiene igual en los reintentos de la misma operación. La primera solicitud
+reserva la clave y, al terminar, guarda su respuesta; los reintentos con la
+misma clave reciben esa respuesta (con Idempotent-Replayed: true) sin volver
+a escribir en las tablas de pedidos. Mientras la primera sigue en curso los
+reintentos reciben 409, y si la clave se reutiliza con otro cuerpo, 422.
+
+Las respuestas con error del servidor (5xx) no se guardan: la clave se
+libera para que el cliente pueda reintentar. Las claves vencen a las
+IDEMPOTENCY_KEY_TTL_HOURS horas (comando purge_idempotency_keys). Una
+clave que queda 'en_proceso' porque el worker murió se libera a los
+IDEMPOTENCY_LOCK_TIMEOUT_SECONDS segundos.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import ClaveIdempotencia
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+
+# Horas que se conserva la respuesta de cada clave
+KEY_TTL_HOURS = getattr(settings, 'IDEMPOTENCY_KEY_TTL_HOURS', 24)
+
+# Segundos tras los cuales una clave 'en_proceso' se considera abandonada
+# (el worker murió antes de guardar la respuesta) y se puede volver a usar
+LOCK_TIMEOUT_SECONDS = getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT_SECONDS', 60)
+
+# Largo máximo aceptado para la clave enviada por el cliente
+MAX_KEY_LENGTH = 255
+
+
+def _sha256(texto):
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def _huella(request):
+    return _sha256(json.dumps(request.data, sort_keys=True, default=str))
+
+
+def _clave(ambito, request, clave_cliente):
+    # La clave se separa por usuario para que nadie reciba la respuesta de otro
+    user = getattr(request, 'user', None)
+    usuario = f"{type(user).__name__}:{user.pk}" if getattr(user, 'pk', None) else ''
+    return _sha256(f"{ambito}|{usuario}|{clave_cliente}")
+
+
+def _reservar(clave, ambito, huella):
+    """
+    Crea la clave en estado 'en_proceso'. Devuelve None si se reservó, o la
+    ClaveIdempotencia existente si otra solicitud ya la usa.
+    """
+    ahora = timezone.now()
+    # Una clave vencida, o en proceso desde hace más de LOCK_TIMEOUT_SECONDS,
+    # se puede volver a usar
+    ClaveIdempotencia.objects.filter(clave=clave).filter(
+        Q(expira__lte=ahora)
+        | Q(estado='en_proceso', creada__lte=ahora - timedelta(seconds=LOCK_TIMEOUT_SECONDS))
+    ).delete()
+    try:
+        with transaction.atomic():
+            ClaveIdempotencia.objects.create(
+                clave=clave,
+                ambito=ambito,
+                huella=huella,
+                expira=ahora + timedelta(hours=KEY_TTL_HOURS),
+            )
+        return None
+    except IntegrityError:
+        return ClaveIdempotencia.objects.filter(clave=clave).first()
+
+
+def _repetir(existente, huella):
+    if existente.huella != huella:
+        return Response(
+            {"error": "La clave de idempotencia ya se usó con otra solicitud"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    if existente.estado != 'completada':
+        response = Response(
+            {"error": "La solicitud original con esta clave todavía se está procesando"},
+            status=status.HTTP_409_CONFLICT
+        )
+        response['Retry-After'] = '1'
+        return response
+
+    response = Response(existente.respuesta, status=existente.status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _guardar(clave, response):
+    if response.status_code >= 500 or not hasattr(response, 'data'):
+        ClaveIdempotencia.objects.filter(clave=clave).delete()
+        return
+    # Se guarda lo mismo que recibirá el cliente (decimales y fechas ya como JSON)
+    respuesta = json.loads(JSONRenderer().render(response.data) or 'null')
+    ClaveIdempotencia.objects.filter(clave=clave).update(
+        estado='completada',
+        status_code=response.status_code,
+        respuesta=respuesta,
+    )
+
+
+def idempotente(ambito):
+    """
+    Decorador para métodos de vistas de DRF (post/create) que crean datos.
+    Sin encabezado Idempotency-Key la vista se ejecuta normalmente.
+    """
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            clave_cliente = request.META.get(HEADER, '').strip()
+            if not clave_cliente:
+                return view_method(self, request, *args, **kwargs)
+            if len(clave_cliente) > MAX_KEY_LENGTH:
+                return Response(
+                    {"error": f"La clave de idempotencia no puede superar {MAX_KEY_LENGTH} caracteres"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            clave = _clave(ambito, request, clave_cliente)
+            huella = _huella(request)
+            existente = _reservar(clave, ambito, huella)
+            if existente is not None:
+                return _repetir(existente, huella)
+
+            try:
+                response = view_method(self, request, *args, **kwargs)
+            except Exception:
+                ClaveIdempotencia.objects.filter(clave=clave).delete()
+                raise
+            _guardar(clave, response)
+            return response
+        return wrapper
+    return decorator
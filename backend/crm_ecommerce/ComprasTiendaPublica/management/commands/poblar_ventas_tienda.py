@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from UsersTiendaPublica.models import UsersTiendaPublica
 from ComprasTiendaPublica.models import PedidoPublico, DetallePedidoPublico
+from ComprasTiendaPublica.rollups import recalcular
 from tienda.models import Tienda, Producto
 from payments.models import PaymentMethod
 from django.utils import timezone
@@ -100,13 +101,13 @@ class Command(BaseCommand):
                     
                     pedido = PedidoPublico.objects.create(
                         codigo_seguimiento=f'PED-{random.randint(1000, 9999)}-{random.randint(100, 999)}',
-                        usuario=usuario,
+                        cliente_tienda_publica=usuario,
                         nombre=nombre,
                         apellido=apellido,
                         ci=str(random.randint(1000000, 9999999)),
                         ciudad=fake.city(),
                         provincia=fake.state(),
-                        direccion=fake.street_address(),
+                        direccion_entrega=fake.street_address(),
                         referencia=fake.sentence(),
                         telefono=fake.phone_number(),
                         correo=usuario.email or f"{nombre.lower()}.{apellido.lower()}@ejemplo.com",
@@ -118,8 +119,10 @@ class Command(BaseCommand):
                             weights=[10, 20, 20, 20, 25, 5]  # Probabilidades de cada estado
                         )[0],
                         tienda=tienda,
-                        fecha=fecha_venta
                     )
+                    # fecha_creacion es auto_now_add: se asigna la fecha de la venta simulada
+                    PedidoPublico.objects.filter(pk=pedido.pk).update(fecha_creacion=fecha_venta)
+                    pedido.fecha_creacion = fecha_venta
                     
                     # Filtrar solo productos con stock disponible
                     productos_con_stock = [p for p in productos if p.stock > 0]
@@ -149,6 +152,7 @@ class Command(BaseCommand):
                             
                             DetallePedidoPublico.objects.create(
                                 pedido=pedido,
+                                producto=producto,
                                 nombre_producto=producto.nombre,
                                 cantidad=cantidad,
                                 precio_unitario=precio,
@@ -182,6 +186,9 @@ class Command(BaseCommand):
                 except Exception as e:
                     self.stdout.write(self.style.ERROR(f'  - Error al crear venta: {str(e)}'))
         
+        # Los pedidos se crean directamente: reconstruir los resúmenes diarios
+        recalcular(tiendas=tiendas)
+
         self.stdout.write(self.style.SUCCESS(
             f'\n¡Proceso completado!\n'
             f'- Ventas creadas: {total_ventas}\n'
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ComprasTiendaPublica.models import ClaveIdempotencia
+
+
+class Command(BaseCommand):
+    help = 'Elimina las claves de idempotencia vencidas'
+
+    def handle(self, *args, **options):
+        deleted, _ = ClaveIdempotencia.objects.filter(expira__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Claves de idempotencia eliminadas: {deleted}"))
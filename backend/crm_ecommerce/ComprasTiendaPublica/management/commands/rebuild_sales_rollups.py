@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from ComprasTiendaPublica.rollups import recalcular
+from tienda.models import Tienda
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los resúmenes diarios de ventas a partir de los pedidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Primer día a reconstruir (AAAA-MM-DD)')
+        parser.add_argument('--hasta', help='Último día a reconstruir (AAAA-MM-DD)')
+        parser.add_argument(
+            '--tienda',
+            action='append',
+            help='ID o slug de la tienda (se puede repetir). Por defecto, todas',
+        )
+
+    def _fecha(self, valor, nombre):
+        if not valor:
+            return None
+        fecha = parse_date(valor)
+        if fecha is None:
+            raise CommandError(f"Fecha inválida para --{nombre}: {valor}")
+        return fecha
+
+    def handle(self, *args, **options):
+        desde = self._fecha(options['desde'], 'desde')
+        hasta = self._fecha(options['hasta'], 'hasta')
+        if desde and hasta and desde > hasta:
+            raise CommandError('--desde no puede ser posterior a --hasta')
+
+        tiendas = None
+        if options['tienda']:
+            tiendas = []
+            for valor in options['tienda']:
+                filtro = {'pk': int(valor)} if valor.isdigit() else {'slug': valor}
+                tienda = Tienda.objects.filter(**filtro).first()
+                if tienda is None:
+                    raise CommandError(f"Tienda no encontrada: {valor}")
+                tiendas.append(tienda)
+
+        ventas, productos = recalcular(desde=desde, hasta=hasta, tiendas=tiendas)
+        self.stdout.write(self.style.SUCCESS(
+            f"Resúmenes reconstruidos: {ventas} filas de ventas y {productos} filas de productos"
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ComprasTiendaPublica', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedidopublico',
+            index=models.Index(fields=['tienda', 'fecha'], name='pedidopublico_tienda_fecha_idx'),
+        ),
+    ]
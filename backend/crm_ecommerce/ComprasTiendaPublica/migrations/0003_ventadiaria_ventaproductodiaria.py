@@ -0,0 +1,46 @@
+# Generated by Django 5.2 on 2026-10-17 13:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ComprasTiendaPublica', '0002_pedidopublico_tienda_fecha_idx'),
+        ('tienda', '0006_producto_pedido_actualizacion_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('estado', models.CharField(max_length=20)),
+                ('metodo_pago', models.CharField(max_length=50)),
+                ('pedidos', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('tienda', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_diarias', to='tienda.tienda')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tienda', 'dia', 'estado', 'metodo_pago'), name='venta_diaria_unica')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaProductoDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('estado', models.CharField(max_length=20)),
+                ('metodo_pago', models.CharField(max_length=50)),
+                ('nombre_producto', models.CharField(max_length=100)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('tienda', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_producto_diarias', to='tienda.tienda')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tienda', 'dia', 'estado', 'metodo_pago', 'nombre_producto'), name='venta_producto_diaria_unica')],
+            },
+        ),
+    ]
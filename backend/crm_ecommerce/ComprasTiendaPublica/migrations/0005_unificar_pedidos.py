@@ -0,0 +1,164 @@
+# Generated by Django 5.2 on 2026-10-17 15:45
+
+from datetime import timedelta
+
+from django.db import migrations
+
+# GuardarCompraView guardaba una copia interna (tienda.Pedido) de cada compra
+# en la misma transacción que el pedido público: la copia se reconoce por
+# tienda, comprador, total y teléfono con una diferencia de fecha menor a esta.
+VENTANA_COPIA = timedelta(minutes=1)
+
+CAMPOS_ENVIO = ('nombre', 'apellido', 'ci', 'ciudad', 'provincia', 'referencia', 'correo')
+
+
+def unificar_pedidos(apps, schema_editor):
+    """
+    Pasa cada PedidoPublico a tienda.Pedido con origen='tienda_publica'. Si
+    el pedido ya tenía su copia interna se completa esa copia en lugar de
+    crear otra, así cada compra queda una sola vez.
+    """
+    Pedido = apps.get_model('tienda', 'Pedido')
+    DetallePedido = apps.get_model('tienda', 'DetallePedido')
+    Producto = apps.get_model('tienda', 'Producto')
+    PedidoPublico = apps.get_model('ComprasTiendaPublica', 'PedidoPublico')
+    DetallePedidoPublico = apps.get_model('ComprasTiendaPublica', 'DetallePedidoPublico')
+
+    productos_por_tienda = {}
+
+    def producto_id(tienda_id, nombre):
+        if tienda_id not in productos_por_tienda:
+            productos = {}
+            for pk, nombre_producto in (
+                Producto.objects.filter(tienda_id=tienda_id).order_by('-id').values_list('id', 'nombre')
+            ):
+                productos[nombre_producto] = pk
+            productos_por_tienda[tienda_id] = productos
+        return productos_por_tienda[tienda_id].get(nombre)
+
+    for publico in PedidoPublico.objects.order_by('id').iterator(chunk_size=500):
+        campos = {campo: getattr(publico, campo) for campo in CAMPOS_ENVIO}
+        campos.update(
+            origen='tienda_publica',
+            estado=publico.estado,
+            direccion_entrega=publico.direccion,
+            metodo_pago=publico.metodo_pago,
+            notas=publico.notas,
+        )
+
+        copia = (
+            Pedido.objects
+            .filter(
+                origen='crm',
+                cliente__isnull=True,
+                tienda_id=publico.tienda_id,
+                cliente_tienda_publica_id=publico.usuario_id,
+                total=publico.total,
+                telefono=publico.telefono,
+                fecha_creacion__range=(publico.fecha - VENTANA_COPIA, publico.fecha + VENTANA_COPIA),
+            )
+            .order_by('id')
+            .first()
+        )
+        if copia is not None:
+            campos['codigo_seguimiento'] = publico.codigo_seguimiento or copia.codigo_seguimiento
+            Pedido.objects.filter(pk=copia.pk).update(fecha_creacion=publico.fecha, **campos)
+            if DetallePedido.objects.filter(pedido_id=copia.pk).exists():
+                continue
+            pedido_id = copia.pk
+        else:
+            pedido = Pedido.objects.create(
+                tienda_id=publico.tienda_id,
+                cliente_tienda_publica_id=publico.usuario_id,
+                total=publico.total,
+                telefono=publico.telefono,
+                codigo_seguimiento=publico.codigo_seguimiento,
+                **campos
+            )
+            # fecha_creacion es auto_now_add: se conserva la fecha original
+            Pedido.objects.filter(pk=pedido.pk).update(fecha_creacion=publico.fecha)
+            pedido_id = pedido.pk
+
+        DetallePedido.objects.bulk_create([
+            DetallePedido(
+                pedido_id=pedido_id,
+                producto_id=producto_id(publico.tienda_id, detalle.nombre_producto),
+                nombre_producto=detalle.nombre_producto,
+                cantidad=detalle.cantidad,
+                precio_unitario=detalle.precio_unitario,
+                subtotal=detalle.subtotal,
+            )
+            for detalle in DetallePedidoPublico.objects.filter(pedido_id=publico.pk).order_by('id')
+        ])
+
+
+def separar_pedidos(apps, schema_editor):
+    """Vuelve a copiar los pedidos de la tienda pública a las tablas anteriores."""
+    Pedido = apps.get_model('tienda', 'Pedido')
+    DetallePedido = apps.get_model('tienda', 'DetallePedido')
+    PedidoPublico = apps.get_model('ComprasTiendaPublica', 'PedidoPublico')
+    DetallePedidoPublico = apps.get_model('ComprasTiendaPublica', 'DetallePedidoPublico')
+
+    pedidos = Pedido.objects.filter(origen='tienda_publica', cliente_tienda_publica__isnull=False)
+    for pedido in pedidos.order_by('id').iterator(chunk_size=500):
+        publico = PedidoPublico.objects.create(
+            usuario_id=pedido.cliente_tienda_publica_id,
+            tienda_id=pedido.tienda_id,
+            direccion=pedido.direccion_entrega,
+            telefono=pedido.telefono,
+            metodo_pago=pedido.metodo_pago,
+            notas=pedido.notas,
+            total=pedido.total,
+            estado=pedido.estado,
+            codigo_seguimiento=pedido.codigo_seguimiento,
+            **{campo: getattr(pedido, campo) for campo in CAMPOS_ENVIO}
+        )
+        PedidoPublico.objects.filter(pk=publico.pk).update(fecha=pedido.fecha_creacion)
+        DetallePedidoPublico.objects.bulk_create([
+            DetallePedidoPublico(
+                pedido_id=publico.pk,
+                nombre_producto=(detalle.nombre_producto or '')[:100],
+                cantidad=detalle.cantidad,
+                precio_unitario=detalle.precio_unitario,
+                subtotal=detalle.subtotal,
+            )
+            for detalle in DetallePedido.objects.filter(pedido_id=pedido.pk).order_by('id')
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ComprasTiendaPublica', '0004_claveidempotencia'),
+        ('tienda', '0009_pedido_origen_datos_envio'),
+    ]
+
+    operations = [
+        migrations.RunPython(unificar_pedidos, separar_pedidos),
+        migrations.DeleteModel(
+            name='DetallePedidoPublico',
+        ),
+        migrations.DeleteModel(
+            name='PedidoPublico',
+        ),
+        migrations.CreateModel(
+            name='PedidoPublico',
+            fields=[],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('tienda.pedido',),
+        ),
+        migrations.CreateModel(
+            name='DetallePedidoPublico',
+            fields=[],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('tienda.detallepedido',),
+        ),
+    ]
@@ -1,43 +1,142 @@
 from django.db import models
-from UsersTiendaPublica.models import UsersTiendaPublica
-from tienda.models import Tienda
+from tienda.models import Tienda, Pedido, DetallePedido
 
-class PedidoPublico(models.Model):
-    ESTADO_CHOICES = [
-        ('pendiente', 'Pendiente'),
-        ('confirmado', 'Confirmado'),
-        ('en_proceso', 'En Proceso'),
-        ('enviado', 'Enviado'),
-        ('entregado', 'Entregado'),
-        ('cancelado', 'Cancelado'),
-    ]
 
-    codigo_seguimiento = models.CharField(max_length=100, blank=True, null=True)  # nuevo campo
-    usuario = models.ForeignKey(UsersTiendaPublica, on_delete=models.CASCADE, related_name='pedidos')
-    nombre = models.CharField(max_length=100)
-    apellido = models.CharField(max_length=100)
-    ci = models.CharField(max_length=20)
-    ciudad = models.CharField(max_length=50)
-    provincia = models.CharField(max_length=50)
-    direccion = models.TextField()
-    referencia = models.TextField(blank=True)
-    telefono = models.CharField(max_length=20)
-    correo = models.EmailField()
-    notas = models.TextField(blank=True)
+class PedidoPublicoManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(origen=Pedido.ORIGEN_TIENDA_PUBLICA)
+
+
+class PedidoPublico(Pedido):
+    """
+    Pedidos de la tienda pública. Desde la unificación de pedidos se guardan
+    en la tabla de tienda.Pedido con origen='tienda_publica'; este proxy solo
+    lee esos pedidos y conserva los nombres de atributos anteriores (usuario,
+    fecha, direccion) para el código que aún los usa. En consultas usar los
+    campos de Pedido: cliente_tienda_publica, fecha_creacion, direccion_entrega.
+    """
+    objects = PedidoPublicoManager()
+
+    class Meta:
+        proxy = True
+
+    def save(self, *args, **kwargs):
+        self.origen = Pedido.ORIGEN_TIENDA_PUBLICA
+        super().save(*args, **kwargs)
+
+    @property
+    def usuario(self):
+        return self.cliente_tienda_publica
+
+    @usuario.setter
+    def usuario(self, value):
+        self.cliente_tienda_publica = value
+
+    @property
+    def usuario_id(self):
+        return self.cliente_tienda_publica_id
+
+    @property
+    def fecha(self):
+        return self.fecha_creacion
+
+    @fecha.setter
+    def fecha(self, value):
+        self.fecha_creacion = value
+
+    @property
+    def direccion(self):
+        return self.direccion_entrega
+
+    @direccion.setter
+    def direccion(self, value):
+        self.direccion_entrega = value
+
+    def __str__(self):
+        return f"Pedido de {self.nombre} {self.apellido} ({self.fecha_creacion.date()})"
+
+
+class DetallePedidoPublicoManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(pedido__origen=Pedido.ORIGEN_TIENDA_PUBLICA)
+
+
+class DetallePedidoPublico(DetallePedido):
+    """Líneas de los pedidos de la tienda pública (proxy de tienda.DetallePedido)."""
+
+    objects = DetallePedidoPublicoManager()
+
+    class Meta:
+        proxy = True
+
+    def __str__(self):
+        return f"{self.nombre_producto} x {self.cantidad}"
+
+
+class VentaDiaria(models.Model):
+    """Resumen diario de pedidos por tienda, estado y método de pago (ver rollups.py)."""
+    tienda = models.ForeignKey(Tienda, on_delete=models.CASCADE, related_name='ventas_diarias')
+    dia = models.DateField()
+    estado = models.CharField(max_length=20)
     metodo_pago = models.CharField(max_length=50)
-    total = models.DecimalField(max_digits=10, decimal_places=2)
-    fecha = models.DateTimeField(auto_now_add=True)
-    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente')
-    tienda = models.ForeignKey(Tienda, on_delete=models.CASCADE, related_name='pedidos_publicos')
+    pedidos = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tienda', 'dia', 'estado', 'metodo_pago'],
+                name='venta_diaria_unica'
+            ),
+        ]
+
     def __str__(self):
-        return f"Pedido de {self.nombre} {self.apellido} ({self.fecha.date()})"
+        return f"{self.tienda_id} {self.dia} {self.estado}/{self.metodo_pago}: {self.pedidos}"
 
-class DetallePedidoPublico(models.Model):
-    pedido = models.ForeignKey(PedidoPublico, on_delete=models.CASCADE, related_name='detalles')
+
+class VentaProductoDiaria(models.Model):
+    """Unidades e ingresos diarios por producto (ver rollups.py)."""
+    tienda = models.ForeignKey(Tienda, on_delete=models.CASCADE, related_name='ventas_producto_diarias')
+    dia = models.DateField()
+    estado = models.CharField(max_length=20)
+    metodo_pago = models.CharField(max_length=50)
     nombre_producto = models.CharField(max_length=100)
-    cantidad = models.PositiveIntegerField()
-    precio_unitario = models.DecimalField(max_digits=10, decimal_places=2)
-    subtotal = models.DecimalField(max_digits=10, decimal_places=2)
+    cantidad = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tienda', 'dia', 'estado', 'metodo_pago', 'nombre_producto'],
+                name='venta_producto_diaria_unica'
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.nombre_producto} x {self.cantidad}"
+        return f"{self.tienda_id} {self.dia} {self.nombre_producto}: {self.cantidad}"
+
+
+class ClaveIdempotencia(models.Model):
+    """
+    Respuesta guardada de una solicitud con encabezado Idempotency-Key
+    (ver idempotency.py). Un reintento con la misma clave recibe la misma
+    respuesta sin volver a crear el pedido o el lead.
+    """
+    ESTADO_CHOICES = [
+        ('en_proceso', 'En proceso'),
+        ('completada', 'Completada'),
+    ]
+
+    # SHA-256 del ámbito, el usuario y la clave enviada por el cliente
+    clave = models.CharField(max_length=64, unique=True)
+    ambito = models.CharField(max_length=30)
+    # SHA-256 del cuerpo de la solicitud original
+    huella = models.CharField(max_length=64)
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='en_proceso')
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    respuesta = models.JSONField(null=True, blank=True)
+    creada = models.DateTimeField(auto_now_add=True)
+    expira = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.ambito} {self.clave[:12]} ({self.estado})"
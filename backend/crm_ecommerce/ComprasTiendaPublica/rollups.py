@@ -0,0 +1,165 @@
+"""
+Resúmenes diarios de ventas por tienda.
+
+VentaDiaria guarda por tienda/día/estado/método de pago la cantidad de
+pedidos y el total vendido, y VentaProductoDiaria las unidades e ingresos
+por producto con las mismas dimensiones. Los reportes (analytics.py) leen
+estas tablas en lugar de recorrer todos los pedidos.
+
+Solo se resumen los pedidos de la tienda pública (tienda.Pedido con
+origen='tienda_publica', leídos con el proxy PedidoPublico).
+
+Las tablas se mantienen de forma incremental: registrar_pedido(pedido)
+suma el aporte de un pedido y registrar_pedido(pedido, signo=-1) lo resta,
+así un cambio de estado se registra restando el pedido con su estado
+anterior y sumándolo con el nuevo. recalcular() reconstruye un rango de
+días desde los pedidos (comando rebuild_sales_rollups).
+"""
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .analytics import rango_fechas
+from .models import PedidoPublico, DetallePedidoPublico, VentaDiaria, VentaProductoDiaria
+
+
+def dia_del_pedido(pedido):
+    """Día (en la zona horaria actual) al que se asigna el pedido."""
+    return timezone.localdate(pedido.fecha_creacion)
+
+
+def registrar_pedido(pedido, signo=1, detalles=None):
+    """
+    Suma (signo=1) o resta (signo=-1) el aporte de `pedido` a los resúmenes
+    del día. Usa INSERT ... ON CONFLICT para que varios procesos puedan
+    actualizar la misma fila sin perder incrementos.
+
+    `detalles` evita volver a leer las líneas cuando el llamador ya las tiene.
+    """
+    dia = dia_del_pedido(pedido)
+    metodo_pago = pedido.metodo_pago or ''
+
+    ventas = VentaDiaria._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {ventas} (tienda_id, dia, estado, metodo_pago, pedidos, total) '
+            f'VALUES (%s, %s, %s, %s, %s, %s) '
+            f'ON CONFLICT (tienda_id, dia, estado, metodo_pago) DO UPDATE SET '
+            f'pedidos = {ventas}.pedidos + EXCLUDED.pedidos, '
+            f'total = {ventas}.total + EXCLUDED.total',
+            [pedido.tienda_id, dia, pedido.estado, metodo_pago, signo, signo * pedido.total]
+        )
+
+        if detalles is not None:
+            por_nombre = {}
+            for detalle in detalles:
+                fila = por_nombre.setdefault(
+                    detalle.nombre_producto,
+                    {'nombre_producto': detalle.nombre_producto, 'cantidad': 0, 'total': 0}
+                )
+                fila['cantidad'] += detalle.cantidad
+                fila['total'] += detalle.subtotal
+            productos = por_nombre.values()
+        else:
+            productos = (
+                DetallePedidoPublico.objects
+                .filter(pedido=pedido)
+                .values('nombre_producto')
+                .annotate(cantidad=Sum('cantidad'), total=Sum('subtotal'))
+                .order_by()
+            )
+        filas = [
+            (pedido.tienda_id, dia, pedido.estado, metodo_pago, fila['nombre_producto'],
+             signo * fila['cantidad'], signo * fila['total'])
+            for fila in productos
+        ]
+        if filas:
+            ventas_producto = VentaProductoDiaria._meta.db_table
+            cursor.executemany(
+                f'INSERT INTO {ventas_producto} '
+                f'(tienda_id, dia, estado, metodo_pago, nombre_producto, cantidad, total) '
+                f'VALUES (%s, %s, %s, %s, %s, %s, %s) '
+                f'ON CONFLICT (tienda_id, dia, estado, metodo_pago, nombre_producto) DO UPDATE SET '
+                f'cantidad = {ventas_producto}.cantidad + EXCLUDED.cantidad, '
+                f'total = {ventas_producto}.total + EXCLUDED.total',
+                filas
+            )
+
+
+def recalcular(desde=None, hasta=None, tiendas=None):
+    """
+    Reconstruye los resúmenes de los días [desde, hasta] (inclusive) a
+    partir de los pedidos. Sin fechas se reconstruye todo el historial.
+
+    Returns:
+        tuple: (filas de VentaDiaria, filas de VentaProductoDiaria) creadas
+    """
+    tz = timezone.get_current_timezone()
+    pedidos = PedidoPublico.objects.all()
+    resumenes = VentaDiaria.objects.all()
+    resumenes_producto = VentaProductoDiaria.objects.all()
+
+    if tiendas is not None:
+        pedidos = pedidos.filter(tienda__in=tiendas)
+        resumenes = resumenes.filter(tienda__in=tiendas)
+        resumenes_producto = resumenes_producto.filter(tienda__in=tiendas)
+    if desde:
+        inicio, _ = rango_fechas(desde, desde)
+        pedidos = pedidos.filter(fecha_creacion__gte=inicio)
+        resumenes = resumenes.filter(dia__gte=desde)
+        resumenes_producto = resumenes_producto.filter(dia__gte=desde)
+    if hasta:
+        _, fin = rango_fechas(hasta, hasta)
+        pedidos = pedidos.filter(fecha_creacion__lt=fin)
+        resumenes = resumenes.filter(dia__lte=hasta)
+        resumenes_producto = resumenes_producto.filter(dia__lte=hasta)
+
+    ventas = (
+        pedidos.order_by()
+        .annotate(dia=TruncDate('fecha_creacion', tzinfo=tz))
+        .values('tienda_id', 'dia', 'estado', 'metodo_pago')
+        .annotate(cantidad_pedidos=Count('id'), suma_total=Sum('total'))
+    )
+    ventas_producto = (
+        DetallePedidoPublico.objects
+        .filter(pedido__in=pedidos.order_by().values('id'))
+        .order_by()
+        .annotate(dia=TruncDate('pedido__fecha_creacion', tzinfo=tz))
+        .values('pedido__tienda_id', 'dia', 'pedido__estado', 'pedido__metodo_pago', 'nombre_producto')
+        .annotate(suma_cantidad=Sum('cantidad'), suma_total=Sum('subtotal'))
+    )
+
+    with transaction.atomic():
+        resumenes.delete()
+        resumenes_producto.delete()
+        creadas = VentaDiaria.objects.bulk_create(
+            (
+                VentaDiaria(
+                    tienda_id=fila['tienda_id'],
+                    dia=fila['dia'],
+                    estado=fila['estado'],
+                    metodo_pago=fila['metodo_pago'] or '',
+                    pedidos=fila['cantidad_pedidos'],
+                    total=fila['suma_total'],
+                )
+                for fila in ventas.iterator()
+            ),
+            batch_size=1000,
+        )
+        creadas_producto = VentaProductoDiaria.objects.bulk_create(
+            (
+                VentaProductoDiaria(
+                    tienda_id=fila['pedido__tienda_id'],
+                    dia=fila['dia'],
+                    estado=fila['pedido__estado'],
+                    metodo_pago=fila['pedido__metodo_pago'] or '',
+                    nombre_producto=fila['nombre_producto'],
+                    cantidad=fila['suma_cantidad'],
+                    total=fila['suma_total'],
+                )
+                for fila in ventas_producto.iterator()
+            ),
+            batch_size=1000,
+        )
+    return len(creadas), len(creadas_producto)
@@ -2,18 +2,33 @@ from rest_framework import serializers
 from tienda.models import Tienda
 from UsersTiendaPublica.models import UsersTiendaPublica
 from .models import PedidoPublico, DetallePedidoPublico
+from .rollups import registrar_pedido
+from .checkout import reservar_stock, StockInsuficiente
+from django.db import transaction
 
 class DetallePedidoPublicoSerializer(serializers.ModelSerializer):
+    # Id del producto en la tienda (opcional); si no se envía se busca por nombre
+    producto = serializers.IntegerField(write_only=True, required=False, allow_null=True)
+    # Mismo largo que Producto.nombre y VentaProductoDiaria.nombre_producto
+    nombre_producto = serializers.CharField(max_length=100)
+
     class Meta:
         model = DetallePedidoPublico
         exclude = ['pedido']
 
 class PedidoPublicoSerializer(serializers.ModelSerializer):
     detalles = DetallePedidoPublicoSerializer(many=True)
-    usuario = serializers.PrimaryKeyRelatedField(queryset=UsersTiendaPublica.objects.all())
+    # Nombres anteriores de los campos de tienda.Pedido, que usa el frontend
+    usuario = serializers.PrimaryKeyRelatedField(
+        source='cliente_tienda_publica',
+        queryset=UsersTiendaPublica.objects.all()
+    )
+    direccion = serializers.CharField(source='direccion_entrega')
+    fecha = serializers.DateTimeField(source='fecha_creacion', read_only=True)
     cliente_nombre = serializers.SerializerMethodField(read_only=True)
-    direccion_entrega = serializers.CharField(source='direccion', read_only=True)
-    fecha_creacion = serializers.DateTimeField(source='fecha', format="%Y-%m-%d %H:%M:%S", read_only=True)
+    direccion_entrega = serializers.CharField(read_only=True)
+    fecha_creacion = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S", read_only=True)
+    metodo_pago = serializers.CharField(max_length=50)
     metodo_pago_display = serializers.SerializerMethodField(read_only=True)
 
     tienda = serializers.SlugRelatedField(
@@ -47,7 +62,7 @@ class PedidoPublicoSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         detalles_data = validated_data.pop('detalles')
-        usuario = validated_data.get('usuario')
+        usuario = validated_data.get('cliente_tienda_publica')
         tienda = validated_data.get('tienda')
 
         if not usuario:
@@ -55,9 +70,29 @@ class PedidoPublicoSerializer(serializers.ModelSerializer):
         if not tienda:
             raise serializers.ValidationError({"tienda": ["Tienda no proporcionada"]})
 
-        pedido = PedidoPublico.objects.create(**validated_data)
+        lineas = [
+            (d['nombre_producto'], d['cantidad'], d.pop('producto', None))
+            for d in detalles_data
+        ]
+
+        with transaction.atomic():
+            try:
+                # Producto de cada línea, en el orden de detalles_data
+                self.productos = reservar_stock(tienda, lineas)
+            except StockInsuficiente as e:
+                raise serializers.ValidationError(e.detalle())
+
+            # Cada línea guarda el nombre del catálogo, no el que envió el cliente.
+            # bulk_create no llama a DetallePedido.save(): el subtotal se calcula aquí
+            for detalle, producto in zip(detalles_data, self.productos):
+                detalle['nombre_producto'] = producto.nombre
+                detalle['subtotal'] = detalle['cantidad'] * detalle['precio_unitario']
 
-        for detalle in detalles_data:
-            DetallePedidoPublico.objects.create(pedido=pedido, **detalle)
+            pedido = PedidoPublico.objects.create(**validated_data)
+            self.detalles = DetallePedidoPublico.objects.bulk_create([
+                DetallePedidoPublico(pedido=pedido, producto=producto, **detalle)
+                for detalle, producto in zip(detalles_data, self.productos)
+            ])
 
+            registrar_pedido(pedido, detalles=self.detalles)
         return pedido
@@ -1,3 +1,374 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from tenants.models import Tenant
+from tienda.models import DetallePedido, Pedido, Producto, Tienda
+from users.models import CustomUser
+
+from .checkout import (
+    EstadoNoValido,
+    StockInsuficiente,
+    cambiar_estado,
+    liberar_stock,
+    reservar_stock,
+)
+from .idempotency import LOCK_TIMEOUT_SECONDS, idempotente
+from .models import ClaveIdempotencia
+from .rollups import registrar_pedido
+
+
+def crear_tienda(nombre='tienda'):
+    """Tenant, vendedor y la tienda que se le crea por defecto."""
+    tenant = Tenant.objects.create(name=nombre, schema_name=nombre, domain=f'{nombre}.example.com')
+    vendedor = CustomUser.objects.create_user(
+        username=f'vendedor_{nombre}',
+        email=f'vendedor@{nombre}.example.com',
+        password='clave-de-prueba',
+        role='vendedor',
+        tenant=tenant,
+    )
+    return Tienda.objects.get(usuario=vendedor)
+
+
+def crear_producto(tienda, nombre, stock, precio='10.00'):
+    return Producto.objects.create(
+        tienda=tienda, nombre=nombre, descripcion='', precio=Decimal(precio), stock=stock
+    )
+
+
+def crear_pedido(tienda, productos_y_cantidades, estado='pendiente'):
+    """Pedido de la tienda pública con el stock ya reservado, como en el checkout."""
+    lineas = [(producto.nombre, cantidad, producto.pk) for producto, cantidad in productos_y_cantidades]
+    with transaction.atomic():
+        reservar_stock(tienda, lineas)
+        pedido = Pedido.objects.create(
+            tienda=tienda,
+            origen=Pedido.ORIGEN_TIENDA_PUBLICA,
+            estado=estado,
+            total=sum(producto.precio * cantidad for producto, cantidad in productos_y_cantidades),
+            direccion_entrega='Calle 1',
+            telefono='555',
+            metodo_pago='efectivo',
+        )
+        detalles = DetallePedido.objects.bulk_create([
+            DetallePedido(
+                pedido=pedido,
+                producto=producto,
+                nombre_producto=producto.nombre,
+                cantidad=cantidad,
+                precio_unitario=producto.precio,
+                subtotal=producto.precio * cantidad,
+            )
+            for producto, cantidad in productos_y_cantidades
+        ])
+        registrar_pedido(pedido, detalles=detalles)
+    return pedido
+
+
+def stock(producto):
+    return Producto.all_objects.values_list('stock', flat=True).get(pk=producto.pk)
+
+
+class ReservaStockTests(TestCase):
+    def setUp(self):
+        self.tienda = crear_tienda()
+        self.camisa = crear_producto(self.tienda, 'Camisa', stock=5)
+        self.gorra = crear_producto(self.tienda, 'Gorra', stock=2)
+
+    def test_descuenta_el_stock_de_cada_linea(self):
+        productos = reservar_stock(self.tienda, [('Camisa', 3, self.camisa.pk), ('Gorra', 2, self.gorra.pk)])
+
+        self.assertEqual([p.pk for p in productos], [self.camisa.pk, self.gorra.pk])
+        self.assertEqual([p.stock for p in productos], [2, 0])
+        self.assertEqual(stock(self.camisa), 2)
+        self.assertEqual(stock(self.gorra), 0)
+
+    def test_resuelve_por_nombre_cuando_la_linea_no_trae_id(self):
+        productos = reservar_stock(self.tienda, [('Camisa', 1)])
+
+        self.assertEqual(productos[0].pk, self.camisa.pk)
+        self.assertEqual(stock(self.camisa), 4)
+
+    def test_suma_las_lineas_del_mismo_producto(self):
+        with self.assertRaises(StockInsuficiente) as error:
+            reservar_stock(self.tienda, [('Gorra', 1, self.gorra.pk), ('Gorra', 2, self.gorra.pk)])
+
+        self.assertEqual(error.exception.faltantes, [{
+            'producto': 'Gorra',
+            'producto_id': self.gorra.pk,
+            'solicitado': 3,
+            'disponible': 2,
+        }])
+        self.assertEqual(stock(self.gorra), 2)
+
+    def test_sin_stock_no_descuenta_ninguna_linea(self):
+        with self.assertRaises(StockInsuficiente) as error:
+            reservar_stock(self.tienda, [('Camisa', 1, self.camisa.pk), ('Gorra', 5, self.gorra.pk)])
+
+        self.assertEqual(error.exception.detalle(), {
+            'error': 'Stock insuficiente para: Gorra',
+            'productos': [{
+                'producto': 'Gorra',
+                'producto_id': self.gorra.pk,
+                'solicitado': 5,
+                'disponible': 2,
+            }],
+        })
+        self.assertEqual(stock(self.camisa), 5)
+        self.assertEqual(stock(self.gorra), 2)
+
+    def test_producto_inexistente_o_de_otra_tienda(self):
+        otra = crear_tienda('otra')
+        ajeno = crear_producto(otra, 'Camisa', stock=10)
+
+        with self.assertRaises(StockInsuficiente) as error:
+            reservar_stock(self.tienda, [('Pantalón', 1, None), ('Camisa', 1, ajeno.pk)])
+
+        self.assertEqual(error.exception.faltantes, [
+            {'producto': 'Pantalón', 'producto_id': None, 'solicitado': 1, 'disponible': 0},
+            {'producto': 'Camisa', 'producto_id': ajeno.pk, 'solicitado': 1, 'disponible': 0},
+        ])
+        self.assertEqual(stock(ajeno), 10)
+
+    def test_liberar_devuelve_el_stock(self):
+        reservar_stock(self.tienda, [('Camisa', 4, self.camisa.pk)])
+        liberar_stock(self.tienda, [('Camisa', 4, self.camisa.pk), ('Borrado', 1, None)])
+
+        self.assertEqual(stock(self.camisa), 5)
+
+
+class CambiarEstadoTests(TestCase):
+    def setUp(self):
+        self.tienda = crear_tienda()
+        self.camisa = crear_producto(self.tienda, 'Camisa', stock=5)
+        self.pedido = crear_pedido(self.tienda, [(self.camisa, 3)])
+
+    def test_cancelar_devuelve_el_stock(self):
+        with transaction.atomic():
+            cambiar_estado(self.pedido, 'cancelado')
+
+        self.pedido.refresh_from_db()
+        self.assertEqual(self.pedido.estado, 'cancelado')
+        self.assertEqual(stock(self.camisa), 5)
+
+    def test_cancelar_dos_veces_no_devuelve_el_stock_de_nuevo(self):
+        with transaction.atomic():
+            cambiar_estado(self.pedido, 'cancelado')
+            cambiar_estado(self.pedido, 'cancelado')
+
+        self.assertEqual(stock(self.camisa), 5)
+
+    def test_reactivar_vuelve_a_reservar(self):
+        with transaction.atomic():
+            cambiar_estado(self.pedido, 'cancelado')
+            cambiar_estado(self.pedido, 'confirmado')
+
+        self.pedido.refresh_from_db()
+        self.assertEqual(self.pedido.estado, 'confirmado')
+        self.assertEqual(stock(self.camisa), 2)
+
+    def test_reactivar_sin_stock_deja_el_pedido_cancelado(self):
+        with transaction.atomic():
+            cambiar_estado(self.pedido, 'cancelado')
+        crear_pedido(self.tienda, [(self.camisa, 4)])
+
+        with self.assertRaises(StockInsuficiente):
+            with transaction.atomic():
+                cambiar_estado(self.pedido, 'pendiente')
+
+        self.pedido.refresh_from_db()
+        self.assertEqual(self.pedido.estado, 'cancelado')
+        self.assertEqual(stock(self.camisa), 1)
+
+    def test_estado_no_valido(self):
+        with self.assertRaises(EstadoNoValido):
+            with transaction.atomic():
+                cambiar_estado(self.pedido, 'regalado')
+
+        self.pedido.refresh_from_db()
+        self.assertEqual(self.pedido.estado, 'pendiente')
+        self.assertEqual(stock(self.camisa), 2)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'SELECT ... FOR UPDATE requiere PostgreSQL')
+class ReservaConcurrenteTests(TransactionTestCase):
+    """Dos compras simultáneas de la última unidad: solo una debe reservarla."""
+
+    def test_no_vende_mas_unidades_que_el_stock(self):
+        tienda = crear_tienda()
+        producto = crear_producto(tienda, 'Última', stock=1)
+        lineas = [('Última', 1, producto.pk)]
+        barrera = threading.Barrier(2)
+        resultados = []
+
+        def comprar():
+            try:
+                barrera.wait()
+                with transaction.atomic():
+                    reservar_stock(tienda, lineas)
+                    # Mantiene el bloqueo para que la otra compra tenga que esperarlo
+                    time.sleep(0.2)
+                resultados.append('reservado')
+            except StockInsuficiente:
+                resultados.append('sin_stock')
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=comprar) for _ in range(2)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(sorted(resultados), ['reservado', 'sin_stock'])
+        self.assertEqual(stock(producto), 0)
+
+
+class VistaIdempotente(APIView):
+    """Vista de prueba: responde lo que indique `respuesta` y cuenta las llamadas."""
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    respuesta = None
+    llamadas = 0
+
+    @idempotente('prueba')
+    def post(self, request):
+        type(self).llamadas += 1
+        return self.respuesta(request)
+
+
+class IdempotenciaTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        VistaIdempotente.llamadas = 0
+        VistaIdempotente.respuesta = staticmethod(
+            lambda request: Response({'pedido_id': VistaIdempotente.llamadas}, status=201)
+        )
+
+    def post(self, datos=None, clave='clave-1'):
+        headers = {'HTTP_IDEMPOTENCY_KEY': clave} if clave else {}
+        request = self.factory.post('/prueba/', datos or {'total': '10.00'}, format='json', **headers)
+        return VistaIdempotente.as_view()(request)
+
+    def test_sin_clave_ejecuta_la_vista_cada_vez(self):
+        self.post(clave=None)
+        self.post(clave=None)
+
+        self.assertEqual(VistaIdempotente.llamadas, 2)
+        self.assertFalse(ClaveIdempotencia.objects.exists())
+
+    def test_guarda_la_primera_respuesta(self):
+        response = self.post()
+
+        self.assertEqual(response.status_code, 201)
+        clave = ClaveIdempotencia.objects.get()
+        self.assertEqual(clave.estado, 'completada')
+        self.assertEqual(clave.status_code, 201)
+        self.assertEqual(clave.respuesta, {'pedido_id': 1})
+
+    def test_reintento_recibe_la_respuesta_guardada(self):
+        self.post()
+        response = self.post()
+
+        self.assertEqual(VistaIdempotente.llamadas, 1)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'pedido_id': 1})
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+
+    def test_otra_clave_ejecuta_la_vista(self):
+        self.post(clave='clave-1')
+        self.post(clave='clave-2')
+
+        self.assertEqual(VistaIdempotente.llamadas, 2)
+
+    def test_misma_clave_con_otro_cuerpo_devuelve_422(self):
+        self.post({'total': '10.00'})
+        response = self.post({'total': '99.00'})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(VistaIdempotente.llamadas, 1)
+
+    def test_reintento_mientras_la_original_sigue_en_proceso_devuelve_409(self):
+        def reintentar(request):
+            # La solicitud original todavía no guardó su respuesta
+            response = self.post()
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response['Retry-After'], '1')
+            return Response({'ok': True}, status=201)
+
+        VistaIdempotente.respuesta = staticmethod(reintentar)
+        response = self.post()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(VistaIdempotente.llamadas, 1)
+
+    def test_error_del_servidor_libera_la_clave(self):
+        VistaIdempotente.respuesta = staticmethod(lambda request: Response({'error': 'falló'}, status=503))
+        self.assertEqual(self.post().status_code, 503)
+        self.assertFalse(ClaveIdempotencia.objects.exists())
+
+        VistaIdempotente.respuesta = staticmethod(lambda request: Response({'ok': True}, status=201))
+        self.assertEqual(self.post().status_code, 201)
+        self.assertEqual(VistaIdempotente.llamadas, 2)
+
+    def test_excepcion_libera_la_clave(self):
+        def fallar(request):
+            raise RuntimeError('falló')
+
+        VistaIdempotente.respuesta = staticmethod(fallar)
+        with self.assertRaises(RuntimeError):
+            self.post()
+
+        self.assertFalse(ClaveIdempotencia.objects.exists())
+
+    def test_error_del_cliente_se_guarda(self):
+        VistaIdempotente.respuesta = staticmethod(lambda request: Response({'error': 'inválido'}, status=400))
+        self.post()
+        response = self.post()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(VistaIdempotente.llamadas, 1)
+
+    def test_clave_en_proceso_abandonada_se_vuelve_a_usar(self):
+        self.post()
+        # Simula un worker que murió sin guardar la respuesta
+        ClaveIdempotencia.objects.update(
+            estado='en_proceso',
+            status_code=None,
+            respuesta=None,
+            creada=timezone.now() - timedelta(seconds=LOCK_TIMEOUT_SECONDS + 1),
+        )
+
+        response = self.post()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'pedido_id': 2})
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+        self.assertEqual(ClaveIdempotencia.objects.get().estado, 'completada')
+
+    def test_clave_en_proceso_reciente_no_se_vuelve_a_usar(self):
+        self.post()
+        ClaveIdempotencia.objects.update(estado='en_proceso', status_code=None, respuesta=None)
+
+        self.assertEqual(self.post().status_code, 409)
+        self.assertEqual(VistaIdempotente.llamadas, 1)
+
+    def test_clave_vencida_se_vuelve_a_usar(self):
+        self.post()
+        ClaveIdempotencia.objects.update(expira=timezone.now() - timedelta(seconds=1))
+
+        self.post()
+
+        self.assertEqual(VistaIdempotente.llamadas, 2)
@@ -7,11 +7,22 @@ from .models import PedidoPublico
 from .serializers import PedidoPublicoSerializer
 from users.models import CustomUser
 from UsersTiendaPublica.models import UsersTiendaPublica
-from tienda.models import Tienda, Pedido, DetallePedido, Producto
+from tienda.models import Tienda, Producto
 from tenants.utils import get_current_tenant
 from .permissions import TieneTokenValido
 from rest_framework.decorators import api_view, permission_classes
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import timedelta
+from .analytics import resumen_ventas, rango_fechas, TOP_PRODUCTOS
+from .rollups import registrar_pedido
+from .checkout import cambiar_estado, EstadoNoValido, StockInsuficiente
+from rest_framework.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from crm_ecommerce.pagination import PedidoPublicoCursorPagination
+from .idempotency import idempotente
 
 @api_view(['GET'])
 @permission_classes([TieneTokenValido])
@@ -22,7 +33,7 @@ def mis_pedidos(request):
 
     usuario_publico = get_object_or_404(UsersTiendaPublica, id=user_id)
 
-    pedidos = PedidoPublico.objects.filter(usuario=usuario_publico).order_by('-fecha')
+    pedidos = PedidoPublico.objects.filter(cliente_tienda_publica=usuario_publico).order_by('-fecha_creacion')
     serializer = PedidoPublicoSerializer(pedidos, many=True)
     return Response(serializer.data)
 
@@ -55,6 +66,7 @@ def agregar_codigo_seguimiento(request, pedido_id):
 class PedidoPublicoViewSet(viewsets.ModelViewSet):
     serializer_class = PedidoPublicoSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PedidoPublicoCursorPagination
 
     def get_queryset(self):
         tenant = get_current_tenant()
@@ -64,77 +76,159 @@ class PedidoPublicoViewSet(viewsets.ModelViewSet):
             return PedidoPublico.objects.none()
 
         if isinstance(self.request.user, CustomUser):
-            return PedidoPublico.objects.filter(tienda=tienda).order_by('-fecha')
-        return PedidoPublico.objects.filter(usuario=self.request.user, tienda=tienda).order_by('-fecha')
+            return PedidoPublico.objects.filter(tienda=tienda).order_by('-fecha_creacion')
+        return PedidoPublico.objects.filter(
+            cliente_tienda_publica=self.request.user, tienda=tienda
+        ).order_by('-fecha_creacion')
+
+    @idempotente('pedido_publico')
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            registrar_pedido(serializer.instance, signo=-1)
+            pedido = serializer.save()
+            registrar_pedido(pedido)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            registrar_pedido(instance, signo=-1)
+            instance.delete()
 
     @action(detail=False, methods=['get'])
     def por_tienda(self, request):
+        """
+        Pedidos de la tienda del vendedor, paginados por cursor (más
+        recientes primero) y con sus líneas en una sola consulta adicional.
+
+        Parámetros: estado, fecha_inicio y fecha_fin (AAAA-MM-DD, inclusive)
+        y q (número de pedido, nombre del cliente o código de seguimiento).
+        """
+        user = request.user
+        if not getattr(user, 'tenant', None):
+            return Response(
+                {"error": "Este usuario no tiene una tienda asignada."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        tienda = Tienda.objects.filter(tenant=user.tenant).first()
+        if not tienda:
+            return Response(
+                {"error": "No se encontró la tienda asociada al tenant."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        pedidos = PedidoPublico.objects.filter(tienda=tienda)
+
+        estado = request.query_params.get('estado')
+        if estado not in (None, '', 'todos'):
+            if estado not in dict(PedidoPublico.ESTADO_CHOICES):
+                return Response({"error": "Estado no válido"}, status=status.HTTP_400_BAD_REQUEST)
+            pedidos = pedidos.filter(estado=estado)
+
         try:
-            user = request.user
-            if not hasattr(user, 'tenant') or not user.tenant:
-                return Response(
-                    {"error": "Este usuario no tiene una tienda asignada."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            tenant = user.tenant
-
-            tienda = Tienda.objects.filter(tenant=tenant).first()
-            if not tienda:
-                return Response(
-                    {"error": "No se encontró la tienda asociada al tenant."},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-
-            productos_nombres = list(Producto.objects.filter(tienda=tienda).values_list('nombre', flat=True))
-            if not productos_nombres:
-                return Response([])
-
-            print(f"Buscando pedidos para la tienda: {tienda.id}")
-            pedidos = PedidoPublico.objects.filter(tienda=tienda).order_by('-fecha')
-            
-            print(f"Total de pedidos encontrados: {pedidos.count()}")
-            for pedido in pedidos:
-                print(f"Pedido ID: {pedido.id}, Estado: {pedido.estado}, Fecha: {pedido.fecha}")
-                for detalle in pedido.detalles.all():
-                    print(f"  - Producto: {detalle.nombre_producto}, Cantidad: {detalle.cantidad}")
-            
-            serializer = self.get_serializer(pedidos, many=True)
-            return Response(serializer.data)
+            fecha_inicio = parse_date(request.query_params.get('fecha_inicio', ''))
+            fecha_fin = parse_date(request.query_params.get('fecha_fin', ''))
+        except ValueError:
+            return Response({"error": "Parámetros de fecha inválidos"}, status=status.HTTP_400_BAD_REQUEST)
+        if fecha_inicio:
+            pedidos = pedidos.filter(fecha_creacion__gte=rango_fechas(fecha_inicio, fecha_inicio)[0])
+        if fecha_fin:
+            pedidos = pedidos.filter(fecha_creacion__lt=rango_fechas(fecha_fin, fecha_fin)[1])
+
+        q = request.query_params.get('q', '').strip()
+        if q:
+            busqueda = (
+                Q(nombre__icontains=q)
+                | Q(apellido__icontains=q)
+                | Q(codigo_seguimiento__icontains=q)
+            )
+            if q.isdigit():
+                busqueda |= Q(id=int(q))
+            pedidos = pedidos.filter(busqueda)
 
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
+        # Una tienda sin productos no tiene pedidos que mostrar
+        if not Producto.objects.filter(tienda=tienda).exists():
+            pedidos = pedidos.none()
+
+        page = self.paginate_queryset(pedidos.prefetch_related('detalles'))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def reporte_ventas(self, request):
+        """
+        Reporte de ventas de la tienda calculado en la base de datos.
+
+        Parámetros: fecha_inicio y fecha_fin (AAAA-MM-DD, por defecto los
+        últimos 30 días), estado, metodo_pago y top (productos en el ranking).
+        """
+        user = request.user
+        if not isinstance(user, CustomUser) or not user.tenant:
+            return Response(
+                {"error": "Este usuario no tiene una tienda asignada."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        tienda = Tienda.objects.filter(tenant=user.tenant).first()
+        if not tienda:
             return Response(
-                {"error": f"Error interno del servidor: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {"error": "No se encontró la tienda asociada al tenant."},
+                status=status.HTTP_404_NOT_FOUND
             )
 
+        hoy = timezone.localdate()
+        try:
+            fecha_inicio = parse_date(request.query_params.get('fecha_inicio', '')) or hoy - timedelta(days=30)
+            fecha_fin = parse_date(request.query_params.get('fecha_fin', '')) or hoy
+        except ValueError:
+            return Response({"error": "Parámetros de fecha inválidos"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            top = max(1, min(int(request.query_params.get('top', TOP_PRODUCTOS)), 50))
+        except ValueError:
+            return Response({"error": "top debe ser un número entero"}, status=status.HTTP_400_BAD_REQUEST)
+        if fecha_inicio > fecha_fin:
+            return Response(
+                {"error": "fecha_inicio debe ser anterior a fecha_fin"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
+        # 'todos' equivale a no filtrar, como en los filtros del reporte
+        estado = request.query_params.get('estado')
+        metodo_pago = request.query_params.get('metodo_pago')
 
+        return Response(resumen_ventas(
+            tienda,
+            fecha_inicio,
+            fecha_fin,
+            estado=None if estado in (None, '', 'todos') else estado,
+            metodo_pago=None if metodo_pago in (None, '', 'todos') else metodo_pago,
+            top=top,
+        ))
 
     @action(detail=True, methods=['post'])
     def actualizar_estado(self, request, pk=None):
-        try:
-            pedido = self.get_object()
-            if not isinstance(request.user, CustomUser):
-                return Response({"error": "Solo los vendedores pueden actualizar el estado"}, status=403)
+        pedido = self.get_object()
+        if not isinstance(request.user, CustomUser):
+            return Response({"error": "Solo los vendedores pueden actualizar el estado"}, status=403)
 
-            nuevo_estado = request.data.get('estado')
-            if not nuevo_estado:
-                return Response({"error": "Estado no proporcionado"}, status=400)
+        nuevo_estado = request.data.get('estado')
+        if not nuevo_estado:
+            return Response({"error": "Estado no proporcionado"}, status=400)
 
-            pedido.estado = nuevo_estado
-            pedido.save()
-            return Response(self.get_serializer(pedido).data)
-        except PedidoPublico.DoesNotExist:
-            return Response({"error": "Pedido no encontrado"}, status=404)
-        except Exception as e:
-            return Response({"error": str(e)}, status=500)
+        try:
+            with transaction.atomic():
+                # Valida el estado y ajusta el stock y los resúmenes diarios (checkout.py)
+                cambiar_estado(pedido, nuevo_estado)
+        except (EstadoNoValido, StockInsuficiente) as e:
+            return Response(e.detalle(), status=400)
+        return Response(self.get_serializer(pedido).data)
 
 class GuardarCompraView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotente('guardar_compra')
     def post(self, request):
         try:
             slug = request.data.get('slug')
@@ -157,53 +251,26 @@ class GuardarCompraView(APIView):
 
             data = request.data.copy()
             data['usuario'] = usuario_tienda.id
-            data['tienda'] = tienda.id
+            # El serializer identifica la tienda por slug
+            data['tienda'] = tienda.slug
 
             serializer = PedidoPublicoSerializer(data=data)
             if not serializer.is_valid():
                 print("Errores del serializador:", serializer.errors)
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-            pedido_publico = serializer.save()
-
-            # Si usas también el modelo Pedido (interno) y DetallePedido
-            pedido = Pedido.objects.create(
-                tienda=tienda,
-                cliente_tienda_publica=usuario_tienda,
-                total=pedido_publico.total,
-                direccion_entrega=pedido_publico.direccion,
-                telefono=pedido_publico.telefono,
-                metodo_pago=pedido_publico.metodo_pago,
-                notas=pedido_publico.notas
-            )
-
-            for detalle in pedido_publico.detalles.all():
-                try:
-                    # Intentar obtener el producto, pero no es crítico si no existe
-                    producto = Producto.objects.filter(
-                        tienda=tienda,
-                        nombre=detalle.nombre_producto,
-                        eliminado=False
-                    ).first()
-                    
-                    # Crear el detalle del pedido con o sin el producto
-                    DetallePedido.objects.create(
-                        pedido=pedido,
-                        producto=producto,  # Puede ser None si el producto no existe
-                        nombre_producto=detalle.nombre_producto,  # Guardar el nombre del producto
-                        cantidad=detalle.cantidad,
-                        precio_unitario=detalle.precio_unitario,
-                        subtotal=detalle.subtotal
-                    )
-                except Exception as e:
-                    print(f"Error al crear detalle de pedido: {str(e)}")
-                    # Continuar con el siguiente detalle aunque falle uno
+            # El pedido se guarda una sola vez en tienda.Pedido (origen
+            # 'tienda_publica'), que también lista el CRM
+            pedido = serializer.save()
 
             return Response({
                 'message': 'Compra guardada con éxito',
                 'pedido_id': pedido.id
             }, status=201)
 
+        except ValidationError as e:
+            # Stock insuficiente al guardar el pedido
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             import traceback
             traceback.print_exc()
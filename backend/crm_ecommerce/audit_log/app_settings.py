@@ -42,3 +42,24 @@ MASK_SENSITIVE_DATA = getattr(settings, 'AUDIT_MASK_SENSITIVE_DATA', True)
 SENSITIVE_FIELDS = getattr(settings, 'AUDIT_SENSITIVE_FIELDS', [
     'password', 'token', 'api_key', 'secret', 'authorization'
 ])
+
+# Configuración de escritura en segundo plano (ver writer.py)
+ENABLE_ASYNC_WRITES = getattr(settings, 'AUDIT_ENABLE_ASYNC_WRITES', True)
+BUFFER_MAX_SIZE = getattr(settings, 'AUDIT_BUFFER_MAX_SIZE', 10000)  # Eventos en cola
+BUFFER_BATCH_SIZE = getattr(settings, 'AUDIT_BUFFER_BATCH_SIZE', 200)  # Eventos por bulk_create
+BUFFER_FLUSH_INTERVAL_MS = getattr(settings, 'AUDIT_BUFFER_FLUSH_INTERVAL_MS', 500)
+BUFFER_OVERFLOW_POLICY = getattr(settings, 'AUDIT_BUFFER_OVERFLOW_POLICY', 'drop_oldest')  # drop_newest, drop_oldest, sync
+
+# Reglas de muestreo y filtrado de lecturas (ver rules.py)
+# Política general para GET: all, sample, aggregate o none
+READ_POLICY = getattr(settings, 'AUDIT_READ_POLICY', 'aggregate')
+READ_SAMPLE_RATE = getattr(settings, 'AUDIT_READ_SAMPLE_RATE', 0.05)  # Fracción de GET registrados con 'sample'
+# Expresiones regulares de rutas cuyas lecturas nunca se registran
+EXCLUDED_PATHS = getattr(settings, 'AUDIT_EXCLUDED_PATHS', [
+    r'/public_products/', r'/public_store/', r'/public_categories/', r'/estilos-publicos/'
+])
+# Reglas por ruta: [{'pattern': r'^/api/leads/', 'policy': 'all'}]; gana la primera que coincida
+PATH_RULES = getattr(settings, 'AUDIT_PATH_RULES', [])
+
+# Particionado mensual de AuditLog (ver partitions.py)
+PARTITION_MONTHS_AHEAD = getattr(settings, 'AUDIT_PARTITION_MONTHS_AHEAD', 3)  # Meses creados por adelantado
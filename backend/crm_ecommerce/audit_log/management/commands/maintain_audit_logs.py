@@ -6,9 +6,11 @@ from pathlib import Path
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from django.utils import timezone
+from audit_log.models import AuditReadCounter
+from audit_log.partitions import ensure_partitions, drop_expired_partitions
 
 class Command(BaseCommand):
-    help = 'Mantiene los logs de auditoría: rotación, compresión y limpieza'
+    help = 'Mantiene los logs de auditoría: rotación, compresión, limpieza y particiones'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -29,6 +31,9 @@ class Command(BaseCommand):
         
         # Verificar integridad de logs
         self.verify_logs_integrity(dry_run)
+
+        # Crear particiones futuras y eliminar las vencidas
+        self.maintain_partitions(dry_run)
         
         self.stdout.write(self.style.SUCCESS('Mantenimiento completado'))
     
@@ -91,6 +96,29 @@ class Command(BaseCommand):
                     except Exception as e:
                         self.stdout.write(self.style.ERROR(f"    ✗ Error al eliminar {log_file}: {str(e)}"))
     
+    def maintain_partitions(self, dry_run=False):
+        """Crea las particiones mensuales de AuditLog y elimina las vencidas"""
+        self.stdout.write('\nMantenimiento de particiones de la base de datos...')
+
+        if dry_run:
+            self.stdout.write("  Se crearían las particiones de los próximos meses")
+        else:
+            for name in ensure_partitions():
+                self.stdout.write(self.style.SUCCESS(f"  ✓ Partición creada: {name}"))
+
+        # La retención se aplica eliminando particiones completas, sin DELETE
+        for name in drop_expired_partitions(dry_run=dry_run):
+            self.stdout.write(f"  Eliminando partición {name}")
+
+        retention_days = getattr(settings, 'AUDIT_RETENTION_DAYS', 365)
+        cutoff_date = timezone.now() - timedelta(days=retention_days)
+        counters = AuditReadCounter.objects.filter(minute__lt=cutoff_date)
+        if dry_run:
+            self.stdout.write(f"  Se eliminarían {counters.count()} contadores de lectura")
+        else:
+            deleted, _ = counters.delete()
+            self.stdout.write(f"  Contadores de lectura eliminados: {deleted}")
+
     def verify_logs_integrity(self, dry_run=False):
         """Verifica la integridad de los logs"""
         if not getattr(settings, 'AUDIT_ENABLE_INTEGRITY_CHECKS', True):
@@ -1,20 +1,50 @@
+from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
-from django.contrib.auth import get_user_model
-from django.conf import settings
-from rest_framework_simplejwt.tokens import AccessToken
-from .models import AuditLog
+from tenants.resolver import REQUEST_AUTH_ATTR
+from . import app_settings
+from .rules import audit_rules, METHOD_ACTIONS, AGGREGATE, SKIP
+from .writer import audit_log_writer
 import json
 import logging
-import jwt
 
 logger = logging.getLogger(__name__)
 
-User = get_user_model()
+# Métodos cuyo cuerpo se guarda como metadata del registro. Solo se guardan
+# cuerpos JSON: los formularios multipart traen archivos (p. ej. imágenes de
+# productos) que no tienen lugar en la bitácora.
+BODY_METHODS = ('POST', 'PUT', 'PATCH')
+MASK = '***'
+
+
+def is_sensitive(key):
+    key = str(key).lower()
+    return any(field.lower() in key for field in app_settings.SENSITIVE_FIELDS)
+
+
+def mask_sensitive(value):
+    """Copia de `value` con los valores de AUDIT_SENSITIVE_FIELDS reemplazados por '***'."""
+    if isinstance(value, dict):
+        return {
+            key: MASK if is_sensitive(key) else mask_sensitive(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [mask_sensitive(item) for item in value]
+    return value
+
 
 class AuditLogMiddleware(MiddlewareMixin):
+    """
+    Registra las peticiones autenticadas en la bitácora.
+
+    Reutiliza el usuario y el tenant que ya resolvió TenantMiddleware y
+    encola el registro en audit_log_writer, que lo guarda en segundo plano,
+    así el request no espera un INSERT. audit_rules decide si la petición se
+    registra completa, se suma a un contador de lecturas o se descarta.
+    """
     def process_request(self, request):
         """Store request body for later use"""
-        if request.method == 'POST':
+        if request.method in BODY_METHODS and request.content_type == 'application/json':
             try:
                 request._audit_log_body = request.body
             except Exception:
@@ -23,53 +53,46 @@ class AuditLogMiddleware(MiddlewareMixin):
 
     def process_response(self, request, response):
         try:
-            # Obtener el token del header de autorización para requests autenticados
-            auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-            
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
+            decision = audit_rules.decide(request.method, request.path)
+            if decision == SKIP:
+                return response
+
+            auth_tuple = getattr(request, REQUEST_AUTH_ATTR, None)
+            tenant = getattr(request, 'tenant', None)
+            if auth_tuple is None or tenant is None:
+                return response
+
+            user, _ = auth_tuple
+            if decision == AGGREGATE:
+                minute = timezone.now().replace(second=0, microsecond=0)
+                audit_log_writer.count_read(tenant.pk, user.pk, request.path[:255], minute)
+                return response
+
+            action = METHOD_ACTIONS[request.method]
+            description = f'{request.method} request to {request.path}'
+
+            # Guardar los parámetros de la request en metadata si es una mutación
+            metadata = None
+            if request.method in BODY_METHODS and hasattr(request, '_audit_log_body'):
                 try:
-                    # Decodificar el token para obtener el ID del usuario
-                    decoded_token = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                    user_id = decoded_token.get('user_id')
-                    
-                    if user_id:
-                        user = User.objects.get(id=user_id)
-                        # Registrar todas las peticiones GET y POST
-                        if request.method in ['GET', 'POST']:
-                            action = 'view' if request.method == 'GET' else 'create'
-                            description = f'{request.method} request to {request.path}'
-                            
-                            # Guardar los parámetros de la request en metadata si es POST
-                            metadata = None
-                            if request.method == 'POST' and hasattr(request, '_audit_log_body'):
-                                try:
-                                    metadata = json.loads(request._audit_log_body)
-                                except:
-                                    metadata = str(request._audit_log_body)
-                            
-                            AuditLog.objects.create(
-                                user=user,
-                                tenant=user.tenant,
-                                action=action,
-                                description=description,
-                                ip_address=self.get_client_ip(request),
-                                user_agent=request.META.get('HTTP_USER_AGENT', ''),
-                                metadata=metadata
-                            )
-                            
-                            logger.info(f"Audit log created for user {user.username}: {description}")
-                except jwt.ExpiredSignatureError:
-                    logger.warning("Expired token detected")
-                except jwt.InvalidTokenError as e:
-                    logger.error(f"Invalid token: {str(e)}")
-                except Exception as e:
-                    logger.error(f"Error processing request: {str(e)}")
-            
-            return response
+                    metadata = json.loads(request._audit_log_body)
+                except (TypeError, ValueError):
+                    metadata = None
+                if metadata is not None and app_settings.MASK_SENSITIVE_DATA:
+                    metadata = mask_sensitive(metadata)
+
+            audit_log_writer.enqueue(
+                user_id=user.pk,
+                tenant_id=tenant.pk,
+                action=action,
+                description=description,
+                ip_address=self.get_client_ip(request),
+                user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                metadata=metadata
+            )
         except Exception as e:
             logger.error(f"Middleware error: {str(e)}")
-            return response
+        return response
 
     def get_client_ip(self, request):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -77,4 +100,4 @@ class AuditLogMiddleware(MiddlewareMixin):
             ip = x_forwarded_for.split(',')[0]
         else:
             ip = request.META.get('REMOTE_ADDR')
-        return ip 
\ No newline at end of file
+        return ip
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-17 10:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_log', '0001_initial'),
+        ('tenants', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditReadCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255)),
+                ('minute', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audit_read_counters', to='tenants.tenant', verbose_name='Tenant')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Contador de Lecturas',
+                'verbose_name_plural': 'Contadores de Lecturas',
+                'ordering': ['-minute'],
+                'indexes': [models.Index(fields=['tenant', 'minute'], name='audit_read_tenant_minute_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'user', 'path', 'minute'), name='audit_read_counter_unique_minute')],
+            },
+        ),
+    ]
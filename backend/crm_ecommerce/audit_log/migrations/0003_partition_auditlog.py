@@ -0,0 +1,127 @@
+# Convierte audit_log_auditlog en una tabla particionada por mes (PostgreSQL).
+#
+# La clave primaria de la tabla pasa a ser (id, created_at), como exige
+# PostgreSQL para tablas particionadas; para Django `id` sigue siendo la pk
+# y se mantiene único porque sale de una sola secuencia.
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations
+
+from audit_log.partitions import (
+    PARENT_TABLE, DEFAULT_PARTITION, add_months, create_month_partition, month_start,
+)
+
+LEGACY_TABLE = f'{PARENT_TABLE}_legacy'
+PLAIN_TABLE = f'{PARENT_TABLE}_plain'
+SEQUENCE = f'{PARENT_TABLE}_part_id_seq'
+COLUMNS = (
+    'id, action, description, ip_address, user_agent, object_id, metadata, '
+    'created_at, content_type_id, tenant_id, user_id'
+)
+# Meses a crear por delante del actual al migrar
+MONTHS_AHEAD = 3
+
+INDEXES_SQL = [
+    f'CREATE INDEX audit_log_a_user_id_7d834a_idx ON {PARENT_TABLE} (user_id, action, created_at)',
+    f'CREATE INDEX audit_log_a_tenant__fa1779_idx ON {PARENT_TABLE} (tenant_id, created_at)',
+    f'CREATE INDEX audit_log_auditlog_content_type_id_idx ON {PARENT_TABLE} (content_type_id)',
+]
+
+FOREIGN_KEYS_SQL = [
+    f'ALTER TABLE {PARENT_TABLE} ADD CONSTRAINT audit_log_auditlog_tenant_id_fk '
+    f'FOREIGN KEY (tenant_id) REFERENCES tenants_tenant (id) DEFERRABLE INITIALLY DEFERRED',
+    f'ALTER TABLE {PARENT_TABLE} ADD CONSTRAINT audit_log_auditlog_user_id_fk '
+    f'FOREIGN KEY (user_id) REFERENCES users_customuser (id) DEFERRABLE INITIALLY DEFERRED',
+    f'ALTER TABLE {PARENT_TABLE} ADD CONSTRAINT audit_log_auditlog_content_type_id_fk '
+    f'FOREIGN KEY (content_type_id) REFERENCES django_content_type (id) DEFERRABLE INITIALLY DEFERRED',
+]
+
+
+def partition_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {PARENT_TABLE} RENAME TO {LEGACY_TABLE}')
+        cursor.execute('ALTER INDEX audit_log_a_user_id_7d834a_idx RENAME TO audit_log_a_user_id_legacy_idx')
+        cursor.execute('ALTER INDEX audit_log_a_tenant__fa1779_idx RENAME TO audit_log_a_tenant_legacy_idx')
+
+        cursor.execute(f'CREATE SEQUENCE {SEQUENCE}')
+        cursor.execute(f"""
+            CREATE TABLE {PARENT_TABLE} (
+                id bigint NOT NULL DEFAULT nextval('{SEQUENCE}'),
+                action varchar(20) NOT NULL,
+                description text NOT NULL,
+                ip_address inet NULL,
+                user_agent text NULL,
+                object_id integer NULL CHECK (object_id >= 0),
+                metadata jsonb NULL,
+                created_at timestamp with time zone NOT NULL,
+                content_type_id integer NULL,
+                tenant_id bigint NOT NULL,
+                user_id bigint NULL,
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+        """)
+        cursor.execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY {PARENT_TABLE}.id')
+        cursor.execute(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT')
+
+        cursor.execute(f'SELECT MIN(created_at) FROM {LEGACY_TABLE}')
+        oldest = cursor.fetchone()[0]
+
+    # Particiones desde el registro más antiguo hasta unos meses por delante
+    now = datetime.now(dt_timezone.utc)
+    current = month_start(oldest or now)
+    last = add_months(month_start(now), MONTHS_AHEAD)
+    while current <= last:
+        create_month_partition(current, connection)
+        current = add_months(current, 1)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {PARENT_TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {LEGACY_TABLE}'
+        )
+        cursor.execute(
+            f"SELECT setval('{SEQUENCE}', COALESCE((SELECT MAX(id) FROM {LEGACY_TABLE}), 0) + 1, false)"
+        )
+        cursor.execute(f'DROP TABLE {LEGACY_TABLE}')
+        for sql in INDEXES_SQL + FOREIGN_KEYS_SQL:
+            cursor.execute(sql)
+
+
+def unpartition_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY NONE')
+        cursor.execute(
+            f'CREATE TABLE {PLAIN_TABLE} '
+            f'(LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        cursor.execute(
+            f'INSERT INTO {PLAIN_TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {PARENT_TABLE}'
+        )
+        cursor.execute(f'DROP TABLE {PARENT_TABLE} CASCADE')
+        cursor.execute(f'ALTER TABLE {PLAIN_TABLE} RENAME TO {PARENT_TABLE}')
+        cursor.execute(f'ALTER TABLE {PARENT_TABLE} ADD PRIMARY KEY (id)')
+        cursor.execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY {PARENT_TABLE}.id')
+        for sql in INDEXES_SQL + FOREIGN_KEYS_SQL:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_log', '0002_auditreadcounter'),
+        ('tenants', '0001_initial'),
+        ('users', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_table, unpartition_table),
+    ]
@@ -8,6 +8,13 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 class AuditLog(models.Model):
+    """
+    Registro de auditoría.
+
+    En PostgreSQL la tabla está particionada por mes sobre created_at (ver
+    audit_log.partitions); filtrar por rango de created_at permite que las
+    consultas lean solo las particiones necesarias.
+    """
     ACTION_CHOICES = [
         ('login', 'Inicio de sesión'),
         ('logout', 'Cierre de sesión'),
@@ -60,4 +67,39 @@ class AuditLog(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.user} - {self.action} - {self.created_at}" 
\ No newline at end of file
+        return f"{self.user} - {self.action} - {self.created_at}" 
+
+class AuditReadCounter(models.Model):
+    """
+    Lecturas agregadas por tenant, usuario, ruta y minuto.
+
+    Reemplaza un AuditLog 'view' por cada GET cuando AUDIT_READ_POLICY es
+    'aggregate'. Lo mantiene audit_log.writer con un upsert que suma `count`.
+    """
+    tenant = models.ForeignKey(
+        'tenants.Tenant',
+        on_delete=models.CASCADE,
+        related_name='audit_read_counters',
+        verbose_name=_('Tenant')
+    )
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    path = models.CharField(max_length=255)
+    minute = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-minute']
+        verbose_name = 'Contador de Lecturas'
+        verbose_name_plural = 'Contadores de Lecturas'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant', 'user', 'path', 'minute'],
+                name='audit_read_counter_unique_minute'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['tenant', 'minute'], name='audit_read_tenant_minute_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.path} - {self.minute} ({self.count})"
@@ -0,0 +1,159 @@
+"""
+Particionado mensual de la tabla de AuditLog en PostgreSQL.
+
+La tabla audit_log_auditlog está particionada por rango sobre created_at
+(ver migración 0003). Cada mes vive en su propia partición
+audit_log_auditlog_pAAAA_MM y existe una partición por defecto para filas
+fuera de rango. Así las consultas con rango de fechas solo leen los meses
+necesarios y la retención se aplica borrando particiones completas.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+import logging
+import re
+
+from django.db import connection as default_connection, transaction
+from django.utils import timezone
+
+from . import app_settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = 'audit_log_auditlog'
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+_PARTITION_RE = re.compile(rf'^{PARENT_TABLE}_p(\d{{4}})_(\d{{2}})$')
+
+
+def month_start(value):
+    """Primer instante (UTC) del mes de `value`."""
+    value = value.astimezone(dt_timezone.utc) if timezone.is_aware(value) else value
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value, months):
+    """Suma meses a un inicio de mes."""
+    month_index = value.month - 1 + months
+    return value.replace(year=value.year + month_index // 12, month=month_index % 12 + 1)
+
+
+def partition_name(start):
+    return f'{PARENT_TABLE}_p{start.year:04d}_{start.month:02d}'
+
+
+def is_partitioned(connection=None):
+    """Indica si la tabla de auditoría ya está particionada."""
+    connection = connection or default_connection
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = %s AND c.relnamespace = 'public'::regnamespace",
+            [PARENT_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(connection=None):
+    """Devuelve [(nombre, inicio_del_mes)] de las particiones mensuales existentes."""
+    connection = connection or default_connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s AND parent.relnamespace = 'public'::regnamespace",
+            [PARENT_TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match:
+            start = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=dt_timezone.utc)
+            partitions.append((name, start))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def create_month_partition(start, connection=None):
+    """
+    Crea la partición del mes que empieza en `start` si no existe.
+
+    Si la partición por defecto ya tiene filas de ese mes, se mueven a la
+    partición nueva antes de adjuntarla (PostgreSQL no permite adjuntar un
+    rango que ya tenga filas en la partición por defecto).
+    """
+    connection = connection or default_connection
+    name = partition_name(start)
+    end = add_months(start, 1)
+
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [f'public.{name}'])
+            if cursor.fetchone()[0] is not None:
+                return False
+
+            cursor.execute(
+                f'CREATE TABLE public.{name} '
+                f'(LIKE public.{PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+            )
+            cursor.execute(
+                f'WITH moved AS ('
+                f'DELETE FROM public.{DEFAULT_PARTITION} '
+                f'WHERE created_at >= %s AND created_at < %s RETURNING *) '
+                f'INSERT INTO public.{name} SELECT * FROM moved',
+                [start, end]
+            )
+            cursor.execute(
+                f'ALTER TABLE public.{PARENT_TABLE} ATTACH PARTITION public.{name} '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [start, end]
+            )
+    logger.info(f"Partición de auditoría creada: {name}")
+    return True
+
+
+def ensure_partitions(months_ahead=None, since=None, connection=None):
+    """
+    Crea las particiones desde `since` (por defecto el mes actual) hasta
+    `months_ahead` meses en el futuro. Devuelve los nombres creados.
+    """
+    connection = connection or default_connection
+    if not is_partitioned(connection):
+        return []
+
+    months_ahead = app_settings.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    current = month_start(since or timezone.now())
+    last = add_months(month_start(timezone.now()), months_ahead)
+
+    created = []
+    while current <= last:
+        if create_month_partition(current, connection):
+            created.append(partition_name(current))
+        current = add_months(current, 1)
+    return created
+
+
+def drop_expired_partitions(retention_days=None, dry_run=False, connection=None):
+    """
+    Elimina las particiones cuyo mes completo es anterior al período de
+    retención. Devuelve los nombres eliminados (o que se eliminarían).
+    """
+    connection = connection or default_connection
+    if not is_partitioned(connection):
+        return []
+
+    retention_days = app_settings.RETENTION_DAYS if retention_days is None else retention_days
+    cutoff = timezone.now() - timedelta(days=retention_days)
+
+    dropped = []
+    for name, start in list_partitions(connection):
+        if add_months(start, 1) <= cutoff:
+            dropped.append(name)
+            if not dry_run:
+                with connection.cursor() as cursor:
+                    # Al ser una partición completa no hay DELETE ni VACUUM posterior
+                    cursor.execute(f'DROP TABLE IF EXISTS public.{name}')
+                logger.info(f"Partición de auditoría eliminada: {name}")
+    return dropped
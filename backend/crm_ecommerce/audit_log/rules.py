@@ -0,0 +1,78 @@
+import random
+import re
+
+from . import app_settings
+
+# Decisiones posibles para una petición
+RECORD = 'record'        # Se guarda un AuditLog completo
+AGGREGATE = 'aggregate'  # Se suma a un contador por usuario/ruta/minuto
+SKIP = 'skip'            # No se registra
+
+# Políticas para lecturas (GET)
+READ_POLICY_ALL = 'all'
+READ_POLICY_SAMPLE = 'sample'
+READ_POLICY_AGGREGATE = 'aggregate'
+READ_POLICY_NONE = 'none'
+READ_POLICIES = (READ_POLICY_ALL, READ_POLICY_SAMPLE, READ_POLICY_AGGREGATE, READ_POLICY_NONE)
+
+# Acción de AuditLog para cada método HTTP que se audita
+METHOD_ACTIONS = {
+    'GET': 'view',
+    'POST': 'create',
+    'PUT': 'update',
+    'PATCH': 'update',
+    'DELETE': 'delete',
+}
+
+
+class AuditRules:
+    """
+    Decide qué hacer con cada petición según la configuración AUDIT_* .
+
+    Las mutaciones (POST, PUT, PATCH, DELETE) siempre se registran. Las
+    lecturas se descartan si la ruta está excluida y en otro caso siguen la
+    política de la primera regla de ruta que coincida o la política general.
+    """
+
+    def __init__(self, read_policy=None, sample_rate=None, excluded_paths=None, path_rules=None):
+        self.read_policy = read_policy or app_settings.READ_POLICY
+        self.sample_rate = app_settings.READ_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.excluded_paths = [
+            re.compile(pattern)
+            for pattern in (app_settings.EXCLUDED_PATHS if excluded_paths is None else excluded_paths)
+        ]
+        self.path_rules = [
+            (re.compile(rule['pattern']), rule['policy'])
+            for rule in (app_settings.PATH_RULES if path_rules is None else path_rules)
+        ]
+
+        for policy in [self.read_policy] + [policy for _, policy in self.path_rules]:
+            if policy not in READ_POLICIES:
+                raise ValueError(f"Política de lectura inválida: {policy}")
+
+    def decide(self, method, path):
+        """Devuelve RECORD, AGGREGATE o SKIP para la petición."""
+        if method not in METHOD_ACTIONS:
+            return SKIP
+        if method != 'GET':
+            return RECORD
+        if any(pattern.search(path) for pattern in self.excluded_paths):
+            return SKIP
+
+        policy = self.read_policy
+        for pattern, rule_policy in self.path_rules:
+            if pattern.search(path):
+                policy = rule_policy
+                break
+
+        if policy == READ_POLICY_ALL:
+            return RECORD
+        if policy == READ_POLICY_AGGREGATE:
+            return AGGREGATE
+        if policy == READ_POLICY_SAMPLE and random.random() < self.sample_rate:
+            return RECORD
+        return SKIP
+
+
+# Instancia global para usar en toda la aplicación
+audit_rules = AuditRules()
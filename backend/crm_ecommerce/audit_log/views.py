@@ -4,8 +4,10 @@ from rest_framework.response import Response
 from django.db.models import Count
 from .models import AuditLog
 from .serializers import AuditLogSerializer
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from .writer import audit_log_writer
 from rest_framework import mixins
+from crm_ecommerce.pagination import AuditLogCursorPagination
 
 class AuditLogViewSet(mixins.CreateModelMixin,
                      mixins.RetrieveModelMixin,
@@ -13,6 +15,7 @@ class AuditLogViewSet(mixins.CreateModelMixin,
                      viewsets.GenericViewSet):
     serializer_class = AuditLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = AuditLogCursorPagination
     
     def get_serializer_context(self):
         """Extra contexto para el serializador."""
@@ -53,6 +56,11 @@ class AuditLogViewSet(mixins.CreateModelMixin,
         actions = dict(AuditLog.ACTION_CHOICES)
         return Response(actions)
 
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def buffer_stats(self, request):
+        """Estado de la cola de escritura de auditoría de este proceso"""
+        return Response(audit_log_writer.stats())
+
     @action(detail=False, methods=['get'])
     def report(self, request):
         """Generar reporte de actividad"""
@@ -96,5 +104,6 @@ class AuditLogViewSet(mixins.CreateModelMixin,
                 status=status.HTTP_404_NOT_FOUND
             )
             
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data) 
\ No newline at end of file
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data) 
\ No newline at end of file
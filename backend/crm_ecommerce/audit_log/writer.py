@@ -0,0 +1,225 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.db import close_old_connections, connection
+
+from . import app_settings
+from .models import AuditLog, AuditReadCounter
+
+logger = logging.getLogger(__name__)
+
+# Políticas cuando la cola está llena
+OVERFLOW_DROP_NEWEST = 'drop_newest'  # Se descarta el evento nuevo
+OVERFLOW_DROP_OLDEST = 'drop_oldest'  # Se descarta el evento más antiguo de la cola
+OVERFLOW_SYNC = 'sync'                # Se escribe el evento directamente en la base de datos
+OVERFLOW_POLICIES = (OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST, OVERFLOW_SYNC)
+
+
+class BufferedAuditLogWriter:
+    """
+    Escritor de auditoría en segundo plano.
+
+    Los requests encolan eventos (diccionarios con los campos de AuditLog) en
+    una cola acotada y un hilo de fondo los guarda con bulk_create cada
+    `batch_size` eventos o cada `flush_interval_ms` milisegundos, lo que
+    ocurra primero. Los eventos pendientes se guardan al apagar el proceso.
+
+    Las lecturas agregadas (ver rules.py) se acumulan en memoria por
+    tenant/usuario/ruta/minuto y se suman a AuditReadCounter en cada ciclo.
+    """
+
+    def __init__(self, max_queue_size=None, batch_size=None,
+                 flush_interval_ms=None, overflow_policy=None, enabled=None):
+        self.max_queue_size = max_queue_size or app_settings.BUFFER_MAX_SIZE
+        self.batch_size = batch_size or app_settings.BUFFER_BATCH_SIZE
+        self.flush_interval = (flush_interval_ms or app_settings.BUFFER_FLUSH_INTERVAL_MS) / 1000.0
+        self.overflow_policy = overflow_policy or app_settings.BUFFER_OVERFLOW_POLICY
+        if self.overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Política de desborde inválida: {self.overflow_policy}")
+        self.enabled = app_settings.ENABLE_ASYNC_WRITES if enabled is None else enabled
+
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._worker = None
+        self._worker_pid = None
+        self._counters = {}
+        self._counters_lock = threading.Lock()
+
+        # Contadores para dimensionar la cola
+        self.enqueued_count = 0
+        self.written_count = 0
+        self.dropped_count = 0
+        self.failed_count = 0
+        self.sync_count = 0
+        self.aggregated_count = 0
+
+        atexit.register(self.shutdown)
+
+    def enqueue(self, **fields):
+        """
+        Encola un evento de auditoría. Devuelve False si el evento se descartó.
+        """
+        if not self.enabled:
+            self._write([fields])
+            return True
+
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(fields)
+            self.enqueued_count += 1
+            return True
+        except queue.Full:
+            return self._handle_overflow(fields)
+
+    def count_read(self, tenant_id, user_id, path, minute):
+        """Suma una lectura al contador del minuto correspondiente."""
+        key = (tenant_id, user_id, path, minute)
+        with self._counters_lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            self.aggregated_count += 1
+        if not self.enabled:
+            self._write_counters()
+        else:
+            self._ensure_worker()
+
+    def _handle_overflow(self, fields):
+        if self.overflow_policy == OVERFLOW_SYNC:
+            self.sync_count += 1
+            self._write([fields])
+            return True
+
+        if self.overflow_policy == OVERFLOW_DROP_OLDEST:
+            try:
+                self._queue.get_nowait()
+                self.dropped_count += 1
+                self._queue.put_nowait(fields)
+                self.enqueued_count += 1
+                return True
+            except (queue.Empty, queue.Full):
+                pass
+
+        self.dropped_count += 1
+        if self.dropped_count % 1000 == 1:
+            logger.warning(f"Cola de auditoría llena, eventos descartados: {self.dropped_count}")
+        return False
+
+    def _ensure_worker(self):
+        """Inicia el hilo de fondo; se reinicia si el proceso se bifurcó (gunicorn)."""
+        if self._worker is not None and self._worker.is_alive() and self._worker_pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive() and self._worker_pid == os.getpid():
+                return
+            if self._worker_pid != os.getpid():
+                # Tras un fork la cola heredada no es usable de forma segura
+                self._queue = queue.Queue(maxsize=self.max_queue_size)
+            self._stop_event.clear()
+            self._worker_pid = os.getpid()
+            self._worker = threading.Thread(
+                target=self._run, name='audit-log-writer', daemon=True
+            )
+            self._worker.start()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._write(batch)
+            self._write_counters()
+            close_old_connections()
+
+    def _collect_batch(self):
+        """Espera hasta completar un lote o hasta que venza el intervalo."""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        try:
+            AuditLog.objects.bulk_create(
+                [AuditLog(**fields) for fields in batch],
+                batch_size=self.batch_size,
+            )
+            self.written_count += len(batch)
+        except Exception as e:
+            self.failed_count += len(batch)
+            logger.error(f"Error guardando {len(batch)} registros de auditoría: {str(e)}")
+
+    def _write_counters(self):
+        with self._counters_lock:
+            counters, self._counters = self._counters, {}
+        if not counters:
+            return
+
+        table = AuditReadCounter._meta.db_table
+        sql = (
+            f'INSERT INTO {table} (tenant_id, user_id, path, minute, count) '
+            f'VALUES (%s, %s, %s, %s, %s) '
+            f'ON CONFLICT (tenant_id, user_id, path, minute) '
+            f'DO UPDATE SET count = {table}.count + EXCLUDED.count'
+        )
+        try:
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, [key + (count,) for key, count in counters.items()])
+        except Exception as e:
+            self.failed_count += sum(counters.values())
+            logger.error(f"Error guardando {len(counters)} contadores de lectura: {str(e)}")
+
+    def flush(self):
+        """Guarda de inmediato todos los eventos pendientes."""
+        with self._flush_lock:
+            while True:
+                batch = []
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    break
+                self._write(batch)
+        self._write_counters()
+
+    def shutdown(self, timeout=5):
+        """Detiene el hilo de fondo y guarda lo que quede en la cola."""
+        self._stop_event.set()
+        if self._worker is not None and self._worker_pid == os.getpid():
+            self._worker.join(timeout)
+        self.flush()
+
+    def stats(self):
+        """Métricas de la cola para dimensionarla."""
+        return {
+            'enabled': self.enabled,
+            'queue_depth': self._queue.qsize(),
+            'max_queue_size': self.max_queue_size,
+            'batch_size': self.batch_size,
+            'flush_interval_ms': int(self.flush_interval * 1000),
+            'overflow_policy': self.overflow_policy,
+            'enqueued': self.enqueued_count,
+            'written': self.written_count,
+            'dropped': self.dropped_count,
+            'failed': self.failed_count,
+            'written_sync_on_overflow': self.sync_count,
+            'aggregated_reads': self.aggregated_count,
+            'pending_counters': len(self._counters),
+            'worker_alive': self._worker is not None and self._worker.is_alive(),
+        }
+
+
+# Instancia global para usar en toda la aplicación
+audit_log_writer = BufferedAuditLogWriter()
@@ -9,18 +9,18 @@ from django.conf import settings
 import os
 
 from .models import Backup
-from .backup_utils import generate_json_backup, save_media_files
+from .backup_utils import save_media_files
 
 User = get_user_model()
 
 class BackupAdmin(admin.ModelAdmin):
     list_display = ('id', 'user_email', 'backup_type_display', 'status_display', 'size_mb_display', 'created_at_formatted', 'actions_column')
-    list_filter = ('status', 'backup_type', 'created_at')
+    list_filter = ('status', 'backup_type', 'mode', 'created_at')
     search_fields = ('user__email', 'user__first_name', 'user__last_name', 'description', 'notes')
-    readonly_fields = ('status', 'size', 'created_at', 'created_by')
+    readonly_fields = ('status', 'progress', 'parent', 'size', 'created_at', 'created_by')
     fieldsets = (
         ('Información del Respaldo', {
-            'fields': ('user', 'backup_type', 'status', 'size', 'description', 'notes')
+            'fields': ('user', 'backup_type', 'mode', 'parent', 'status', 'progress', 'size', 'description', 'notes')
         }),
         ('Metadatos', {
             'fields': ('created_at', 'created_by'),
@@ -41,7 +41,7 @@ class BackupAdmin(admin.ModelAdmin):
     
     def get_readonly_fields(self, request, obj=None):
         if obj:  # Si es una edición
-            return self.readonly_fields + ('backup_type', 'user')
+            return self.readonly_fields + ('backup_type', 'mode', 'user')
         return self.readonly_fields
     
     def save_model(self, request, obj, form, change):
@@ -53,19 +53,13 @@ class BackupAdmin(admin.ModelAdmin):
         # Guardar el modelo (esto activará el método save() personalizado que crea el backup)
         super().save_model(request, obj, form, change)
         
-        # Si es un nuevo backup, mostramos un mensaje de éxito
-        if not change and obj.status == 'completed':
+        # Si es un nuevo backup, avisamos que quedó en cola
+        if not change and obj.status == 'queued':
             self.message_user(
                 request,
-                f'Backup creado exitosamente. Tamaño: {obj.size_mb:.2f} MB',
+                'Backup en cola. El archivo se generará en segundo plano.',
                 messages.SUCCESS
             )
-        elif not change and obj.status == 'failed':
-            self.message_user(
-                request,
-                'Error al crear el backup. Por favor, intente nuevamente.',
-                messages.ERROR
-            )
     
     def get_urls(self):
         urls = super().get_urls()
@@ -127,8 +121,8 @@ class BackupAdmin(admin.ModelAdmin):
             return HttpResponseRedirect(reverse('admin:backup_backup_changelist'))
         
         try:
-            backup.restore_from_zip()
-            self.message_user(request, 'Respaldo restaurado exitosamente.', level=messages.SUCCESS)
+            backup.enqueue('restore', requested_by=request.user)
+            self.message_user(request, 'Restauración en cola. Se ejecutará en segundo plano.', level=messages.SUCCESS)
         except Exception as e:
             self.message_user(request, f'Error al restaurar el respaldo: {str(e)}', level=messages.ERROR)
         
@@ -149,15 +143,10 @@ class BackupAdmin(admin.ModelAdmin):
                     description=description,
                     notes=notes
                 )
-                
-                # Generar el archivo ZIP
-                try:
-                    backup.create_backup_zip()
-                    self.message_user(request, 'Respaldo creado exitosamente.', level=messages.SUCCESS)
-                except Exception as e:
-                    backup.delete()
-                    raise e
-                    
+
+                # Backup.save ya encoló la generación del ZIP
+                self.message_user(request, 'Respaldo en cola. Se generará en segundo plano.', level=messages.SUCCESS)
+
                 return HttpResponseRedirect(reverse('admin:backup_backup_change', args=[backup.id]))
                 
             except User.DoesNotExist:
@@ -188,6 +177,8 @@ class BackupAdmin(admin.ModelAdmin):
     def status_display(self, obj):
         status_colors = {
             'pending': 'orange',
+            'queued': 'orange',
+            'running': 'blue',
             'completed': 'green',
             'failed': 'red',
         }
@@ -1,13 +1,18 @@
 import os
+import io
 import json
 import shutil
+import tempfile
 import importlib
-from datetime import datetime, date, time
+from datetime import datetime, date, time, timedelta
 from django.apps import apps
+from django.contrib.postgres.search import SearchVectorField
 from django.db import connection, models
+from django.utils.dateparse import parse_datetime
 from django.conf import settings
 from django.core import serializers
 from django.core.exceptions import AppRegistryNotReady, ImproperlyConfigured
+from .media_store import write_media
 
 class CustomJSONEncoder(json.JSONEncoder):
     """
@@ -31,6 +36,38 @@ class CustomJSONEncoder(json.JSONEncoder):
             return obj.isoformat()
         return super().default(obj)
 
+# Versión del formato de backup (3.x: un archivo NDJSON por modelo)
+BACKUP_FORMAT_VERSION = '3.0.0'
+NDJSON_DIR = 'data'
+
+TOMBSTONE_DIR = 'tombstones'
+
+# Filas leídas por consulta al exportar cada modelo
+EXPORT_CHUNK_SIZE = getattr(settings, 'BACKUP_EXPORT_CHUNK_SIZE', 2000)
+
+# Campo de fecha que indica cambios en cada modelo para los backups
+# incrementales. Los modelos que no figuran se exportan completos en cada
+# backup (son tablas chicas o no registran cuándo cambian).
+INCREMENTAL_FIELDS = {
+    'users_CustomUser': 'updated_at',
+    'leads_Lead': 'ultima_actualizacion',
+    'leads_InteraccionLead': 'fecha',
+    'tienda_Producto': 'fecha_actualizacion',
+    'tienda_Pedido': 'fecha_actualizacion',
+    'tienda_DetallePedido': 'pedido__fecha_actualizacion',
+    'tienda_NotificacionPedido': 'fecha',
+    'tienda_Notificacion': 'fecha',
+}
+
+# Modelos con borrado lógico: en los backups incrementales se exportan los
+# IDs borrados desde el backup anterior y al restaurar se aplican estos valores
+TOMBSTONE_MODELS = {
+    'tienda_Producto': {'eliminado': True},
+}
+
+# Margen para no perder filas guardadas con una fecha anterior a su commit
+INCREMENTAL_OVERLAP = timedelta(seconds=getattr(settings, 'BACKUP_INCREMENTAL_OVERLAP_SECONDS', 60))
+
 # Configurar el modelo de usuario personalizado
 AUTH_USER_MODEL = getattr(settings, 'AUTH_USER_MODEL', 'users.CustomUser')
 
@@ -67,15 +104,8 @@ def get_user_models():
     # Omitir modelos de pagos temporalmente
     print("Omitiendo modelos de pagos temporalmente")
     
-    # Agregar modelos de ComprasTiendaPublica
-    try:
-        from ComprasTiendaPublica.models import PedidoPublico, DetallePedidoPublico
-        user_models.extend([
-            ('ComprasTiendaPublica', 'PedidoPublico', {'tienda__usuario': models.F('pk')}),
-            ('ComprasTiendaPublica', 'DetallePedidoPublico', {'pedido__tienda__usuario': models.F('pk')}),
-        ])
-    except (ImportError, AppRegistryNotReady) as e:
-        print(f"Advertencia: No se pudieron cargar los modelos de ComprasTiendaPublica: {e}")
+    # Los pedidos de ComprasTiendaPublica se guardan en tienda_Pedido (PedidoPublico
+    # es un proxy); los backups anteriores se restauran con LEGACY_MODELS (restore.py)
     
     # Agregar modelos de UsersTiendaPublica
     try:
@@ -86,97 +116,226 @@ def get_user_models():
     
     return user_models
 
-def generate_json_backup(user):
+def get_backup_metadata(user):
     """
-    Genera archivos JSON con los datos del usuario
+    Metadatos básicos del backup
     """
     try:
-        backup_data = {
-            'metadata': {
-                'version': '2.0.0',
-                'created_at': datetime.now().isoformat(),
-                'user': {
-                    'id': user.id,
-                    'username': user.email,  # Asumiendo que usas email como username
-                    'email': user.email
-                }
-            },
-            'data': {}
+        return {
+            'version': BACKUP_FORMAT_VERSION,
+            'created_at': datetime.now().isoformat(),
+            'user': {
+                'id': user.id,
+                'username': user.email,  # Asumiendo que usas email como username
+                'email': user.email
+            }
         }
     except Exception as e:
         print(f"Error al crear metadatos del backup: {str(e)}")
-        backup_data = {'metadata': {'error': str(e)}, 'data': {}}
+        return {'error': str(e)}
 
-    # Obtener los modelos a respaldar
-    models_to_backup = get_user_models()
+def iter_backup_querysets(user, since=None):
+    """
+    Genera (model_key, queryset) para cada modelo a respaldar del usuario.
 
-    # Procesar cada modelo
-    for app_label, model_name, filters in models_to_backup:
+    Si se indica `since` ({model_key: marca de agua ISO}) los modelos de
+    INCREMENTAL_FIELDS solo incluyen las filas que cambiaron desde entonces.
+    Los querysets incrementales anotan `backup_watermark` con la fecha de cambio.
+    """
+    for app_label, model_name, filters in get_user_models():
         try:
-            # Obtener el modelo
+            model = apps.get_model(app_label, model_name)
+        except LookupError:
+            print(f"Modelo no encontrado: {app_label}.{model_name}")
+            continue
+
+        # Aplicar los filtros dinámicos
+        filter_kwargs = {}
+        for key, value in filters.items():
+            if isinstance(value, models.F):
+                filter_kwargs[key] = user.pk
+            else:
+                filter_kwargs[key] = value
+
+        model_key = f"{app_label}_{model_name}"
+        queryset = model.objects.filter(**filter_kwargs).order_by('pk')
+
+        field = INCREMENTAL_FIELDS.get(model_key)
+        if field:
+            queryset = queryset.annotate(backup_watermark=models.F(field))
+            watermark = parse_datetime(since[model_key]) if since and since.get(model_key) else None
+            if watermark:
+                queryset = queryset.filter(**{f'{field}__gt': watermark - INCREMENTAL_OVERLAP})
+
+        yield model_key, queryset
+
+def iter_tombstones(user, since):
+    """
+    Genera (model_key, queryset de IDs) de las filas borradas lógicamente
+    desde las marcas de agua `since`.
+    """
+    for app_label, model_name, filters in get_user_models():
+        model_key = f"{app_label}_{model_name}"
+        if model_key not in TOMBSTONE_MODELS or not since.get(model_key):
+            continue
+        model = apps.get_model(app_label, model_name)
+        filter_kwargs = {
+            key: user.pk for key, value in filters.items() if isinstance(value, models.F)
+        }
+        filter_kwargs.update(TOMBSTONE_MODELS[model_key])
+        field = INCREMENTAL_FIELDS[model_key]
+        watermark = parse_datetime(since[model_key]) - INCREMENTAL_OVERLAP
+        # Manager base: el manager por defecto oculta las filas borradas
+        queryset = model._base_manager.filter(**filter_kwargs, **{f'{field}__gt': watermark})
+        yield model_key, queryset.order_by('pk').values_list('pk', flat=True)
+
+def serialize_instance(obj):
+    """
+    Convierte una instancia en un diccionario serializable.
+    Las claves foráneas se guardan como <campo>_id para no consultar el objeto relacionado.
+    """
+    obj_dict = {}
+    for field in obj._meta.concrete_fields:
+        # Columnas calculadas por la base de datos (p. ej. Producto.search_vector)
+        if isinstance(field, SearchVectorField):
+            continue
+        try:
+            value = getattr(obj, field.attname)
+            # Archivos: guardar solo la ruta relativa
+            if isinstance(field, models.FileField):
+                value = value.name if value else None
+            # Manejar fechas y objetos similares
+            elif hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            obj_dict[field.attname] = value
+        except Exception as e:
+            print(f"Error al serializar campo {field.name} de {obj._meta.label}: {str(e)}")
+
+    # Agregar el ID
+    obj_dict['id'] = obj.pk
+    return obj_dict
+
+def write_ndjson_backup(zipf, user, chunk_size=None, progress=None, since=None):
+    """
+    Escribe los datos del usuario en el ZIP, un archivo NDJSON por modelo
+    (data/<app>_<Modelo>.ndjson, un objeto JSON por línea).
+
+    Cada modelo se recorre con .iterator() y sus filas se escriben en un
+    archivo temporal en disco, así la memoria usada no depende del tamaño de
+    la tienda. El archivo se copia al ZIP solo cuando el modelo terminó: si
+    falla a mitad de camino no queda una entrada truncada que la
+    restauración leería como completa.
+    Si se indica `progress` (BackupProgress) se informa el avance por modelo.
+    Con `since` (marcas de agua del backup anterior) el backup es incremental.
+
+    Returns:
+        tuple: ({model_key: {'file': ruta_en_zip, 'count': filas}},
+                {model_key: nueva marca de agua ISO})
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    exported = {}
+    watermarks = dict(since or {})
+
+    querysets = list(iter_backup_querysets(user, since=since))
+    if progress:
+        progress.set_totals({model_key: queryset.count() for model_key, queryset in querysets})
+
+    for model_key, queryset in querysets:
+        arcname = f"{NDJSON_DIR}/{model_key}.ndjson"
+        count = 0
+        latest = None
+        if progress:
+            progress.start_model(model_key)
+        with tempfile.TemporaryFile(dir=getattr(settings, 'BACKUP_TEMP_DIR', None)) as spool:
             try:
-                model = apps.get_model(app_label, model_name)
-            except LookupError:
-                print(f"Modelo no encontrado: {app_label}.{model_name}")
-                continue
-                
-            # Aplicar los filtros dinámicos
-            filter_kwargs = {}
-            for key, value in filters.items():
-                if isinstance(value, models.F):
-                    filter_kwargs[key] = user.pk
-                else:
-                    filter_kwargs[key] = value
-                    
-            # Manejar el caso especial de listas para filtros 'in'
-            if any(key.endswith('__in') for key in filter_kwargs.keys()):
-                for key in list(filter_kwargs.keys()):
-                    if key.endswith('__in') and not filter_kwargs[key]:
-                        # Si la lista está vacía, no hay nada que filtrar
-                        return
-            
-            # Obtener los datos
-            queryset = model.objects.filter(**filter_kwargs)
-            if not queryset.exists():
+                for obj in queryset.iterator(chunk_size=chunk_size):
+                    line = json.dumps(serialize_instance(obj), ensure_ascii=False, cls=CustomJSONEncoder)
+                    spool.write(line.encode('utf-8'))
+                    spool.write(b'\n')
+                    count += 1
+                    changed_at = getattr(obj, 'backup_watermark', None)
+                    if changed_at and (latest is None or changed_at > latest):
+                        latest = changed_at
+                    if progress and count % chunk_size == 0:
+                        progress.advance(model_key, count)
+            except Exception as e:
+                # El modelo se omite entero: no se agrega al ZIP ni avanza su marca de agua
+                print(f"Error al procesar {model_key}: {str(e)}")
+                import traceback
+                traceback.print_exc()
                 continue
 
-            # Serializar los datos
-            model_key = f"{app_label}_{model_name}"
-            
-            # Usar el serializador personalizado para manejar fechas
-            serialized_data = []
-            for obj in queryset:
-                # Convertir el objeto a diccionario
-                obj_dict = {}
-                for field in obj._meta.fields:
-                    try:
-                        value = getattr(obj, field.name)
-                        # Manejar fechas y objetos similares
-                        if hasattr(value, 'isoformat'):
-                            value = value.isoformat()
-                        elif hasattr(value, '__dict__'):
-                            value = str(value)
-                        obj_dict[field.name] = value
-                    except Exception as e:
-                        print(f"Error al serializar campo {field.name} de {app_label}.{model_name}: {str(e)}")
-                
-                # Agregar el ID
-                obj_dict['id'] = obj.pk
-                serialized_data.append(obj_dict)
-            
-            backup_data['data'][model_key] = serialized_data
+            spool.seek(0)
+            with zipf.open(arcname, 'w', force_zip64=True) as entry:
+                shutil.copyfileobj(spool, entry)
+        if progress:
+            progress.finish_model(model_key, count)
 
-        except Exception as e:
-            print(f"Error al procesar {app_label}.{model_name}: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            continue
+        exported[model_key] = {'file': arcname, 'count': count}
+        if latest and (not watermarks.get(model_key) or latest > parse_datetime(watermarks[model_key])):
+            watermarks[model_key] = latest.isoformat()
+
+    if since:
+        for model_key, ids in iter_tombstones(user, since):
+            arcname = f"{TOMBSTONE_DIR}/{model_key}.ndjson"
+            count = 0
+            with zipf.open(arcname, 'w', force_zip64=True) as entry:
+                for pk in ids.iterator(chunk_size=chunk_size):
+                    entry.write(json.dumps({'id': pk}).encode('utf-8'))
+                    entry.write(b'\n')
+                    count += 1
+            exported.setdefault(model_key, {})['tombstones'] = count
+
+    return exported, watermarks
+
+def _iter_ndjson(zipf, arcname):
+    """Lee una entrada NDJSON del ZIP línea por línea"""
+    with zipf.open(arcname, 'r') as entry:
+        for line in io.TextIOWrapper(entry, encoding='utf-8'):
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def read_backup_records(zipf):
+    """
+    Devuelve {model_key: iterable de registros} para un ZIP de backup.
+
+    Soporta el formato NDJSON por modelo y el formato anterior con un único
+    data.json. En NDJSON los registros se leen a medida que se recorren.
+    """
+    names = zipf.namelist()
+
+    ndjson_entries = [
+        name for name in names
+        if name.startswith(f"{NDJSON_DIR}/") and name.endswith('.ndjson')
+    ]
+    if ndjson_entries:
+        return {
+            os.path.basename(name)[:-len('.ndjson')]: _iter_ndjson(zipf, name)
+            for name in ndjson_entries
+        }
+
+    if 'data.json' in names:
+        try:
+            backup_data = json.loads(zipf.read('data.json').decode('utf-8'))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Error al decodificar el archivo de datos: {str(e)}")
+        return backup_data.get('data', {})
 
-    return backup_data
+    raise ValueError("El archivo de backup no contiene datos válidos")
 
-def save_media_files(zipf, user):
+def read_tombstones(zipf):
+    """Devuelve {model_key: [IDs borrados]} de un ZIP de backup incremental."""
+    tombstones = {}
+    for name in zipf.namelist():
+        if name.startswith(f"{TOMBSTONE_DIR}/") and name.endswith('.ndjson'):
+            model_key = os.path.basename(name)[:-len('.ndjson')]
+            tombstones[model_key] = [record['id'] for record in _iter_ndjson(zipf, name)]
+    return tombstones
+
+def collect_media_files(user):
     """
-    Guarda los archivos multimedia del usuario en el ZIP
+    Devuelve (ruta_local, ruta_relativa) de los archivos multimedia del usuario
     """
     media_files = []
     media_root = settings.MEDIA_ROOT
@@ -188,8 +347,8 @@ def save_media_files(zipf, user):
             if producto.imagen:
                 img_path = os.path.join(media_root, str(producto.imagen))
                 if os.path.exists(img_path):
-                    arcname = f"media/productos/{os.path.basename(str(producto.imagen))}"
-                    media_files.append((img_path, arcname))
+                    relative_name = str(producto.imagen)
+                    media_files.append((img_path, relative_name))
     except Exception as e:
         print(f"Advertencia al procesar imágenes de productos: {str(e)}")
     
@@ -200,8 +359,8 @@ def save_media_files(zipf, user):
             if tienda.logo and tienda.logo.name != 'logos/default_logo.png':
                 logo_path = os.path.join(media_root, str(tienda.logo))
                 if os.path.exists(logo_path):
-                    arcname = f"media/logos/{os.path.basename(str(tienda.logo))}"
-                    media_files.append((logo_path, arcname))
+                    relative_name = str(tienda.logo)
+                    media_files.append((logo_path, relative_name))
     except Exception as e:
         print(f"Advertencia al procesar logos de tienda: {str(e)}")
     
@@ -212,8 +371,8 @@ def save_media_files(zipf, user):
             if categoria.imagen:
                 img_path = os.path.join(media_root, str(categoria.imagen))
                 if os.path.exists(img_path):
-                    arcname = f"media/categorias/{os.path.basename(str(categoria.imagen))}"
-                    media_files.append((img_path, arcname))
+                    relative_name = str(categoria.imagen)
+                    media_files.append((img_path, relative_name))
     except Exception as e:
         print(f"Advertencia al procesar imágenes de categorías: {str(e)}")
     
@@ -225,8 +384,8 @@ def save_media_files(zipf, user):
                 if adjunto.archivo:
                     file_path = os.path.join(media_root, str(adjunto.archivo))
                     if os.path.exists(file_path):
-                        arcname = f"media/adjuntos/{os.path.basename(str(adjunto.archivo))}"
-                        media_files.append((file_path, arcname))
+                        relative_name = str(adjunto.archivo)
+                        media_files.append((file_path, relative_name))
     except Exception as e:
         print(f"Advertencia al procesar archivos adjuntos: {str(e)}")
     
@@ -239,11 +398,11 @@ def save_media_files(zipf, user):
     except Exception as e:
         print(f"Advertencia al procesar archivos de pedidos públicos: {str(e)}")
     
-    # Agregar archivos al ZIP
-    for file_path, arcname in media_files:
-        try:
-            zipf.write(file_path, arcname)
-        except Exception as e:
-            print(f"Error al agregar archivo {file_path} al backup: {str(e)}")
-    
-    return len(media_files)
+    return media_files
+
+def save_media_files(zipf, user, backup=None):
+    """
+    Guarda los archivos multimedia del usuario: un manifiesto en el ZIP y
+    cada contenido una sola vez (ver media_store.py)
+    """
+    return write_media(zipf, user, collect_media_files(user), backup=backup)
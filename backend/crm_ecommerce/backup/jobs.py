@@ -0,0 +1,173 @@
+import json
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction, connections, DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from .models import Backup, BackupJob
+
+# Segundos mínimos entre escrituras de progreso en la base de datos
+PROGRESS_UPDATE_INTERVAL = getattr(settings, 'BACKUP_PROGRESS_UPDATE_INTERVAL', 1.0)
+
+# Minutos tras los cuales un trabajo 'running' se considera abandonado
+JOB_STALE_MINUTES = getattr(settings, 'BACKUP_JOB_STALE_MINUTES', 60)
+
+# Intentos máximos antes de marcar un trabajo abandonado como fallido
+JOB_MAX_ATTEMPTS = getattr(settings, 'BACKUP_JOB_MAX_ATTEMPTS', 3)
+
+
+class BackupProgress:
+    """
+    Informa el avance de un backup o restauración en Backup.progress
+    (porcentaje) y Backup.progress_detail (estado y filas por modelo).
+
+    Escribe por una conexión propia en autocommit, así el avance se ve desde
+    el endpoint de progreso aunque la restauración corra dentro de una
+    transacción.
+    """
+
+    def __init__(self, backup):
+        self.backup = backup
+        self._connection = None
+        self.totals = {}
+        self.done = {}
+        self.detail = {}
+        self._last_write = 0
+
+    def set_totals(self, totals):
+        self.totals = dict(totals)
+        self.detail = {
+            model_key: {'status': 'pending', 'rows': 0, 'total': total}
+            for model_key, total in self.totals.items()
+        }
+        self._write(force=True)
+
+    def start_model(self, model_key):
+        self.detail.setdefault(model_key, {'status': 'pending', 'rows': 0, 'total': None})
+        self.detail[model_key]['status'] = 'running'
+        self._write(force=True)
+
+    def advance(self, model_key, rows):
+        self.done[model_key] = rows
+        self.detail.setdefault(model_key, {'status': 'running', 'total': None})
+        self.detail[model_key]['rows'] = rows
+        self._write()
+
+    def finish_model(self, model_key, rows, **extra):
+        self.advance(model_key, rows)
+        self.detail[model_key]['status'] = 'completed'
+        self.detail[model_key].update(extra)
+        self._write(force=True)
+
+    @property
+    def percent(self):
+        total_rows = sum(total or 0 for total in self.totals.values())
+        if total_rows:
+            done_rows = sum(min(self.done.get(key, 0), total or 0) for key, total in self.totals.items())
+            percent = done_rows * 100 // total_rows
+        elif self.totals:
+            finished = sum(1 for item in self.detail.values() if item['status'] == 'completed')
+            percent = finished * 100 // len(self.totals)
+        else:
+            percent = 0
+        # El 100% se marca al terminar (falta guardar el archivo o los medios)
+        return min(percent, 99)
+
+    def _write(self, force=False):
+        current = time.monotonic()
+        if not force and current - self._last_write < PROGRESS_UPDATE_INTERVAL:
+            return
+        self._last_write = current
+        self.backup.progress = self.percent
+        self.backup.progress_detail = self.detail
+
+        if self._connection is None:
+            self._connection = connections.create_connection(DEFAULT_DB_ALIAS)
+        with self._connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {Backup._meta.db_table} SET progress = %s, progress_detail = %s WHERE id = %s',
+                [self.backup.progress, json.dumps(self.detail), self.backup.pk]
+            )
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next_job():
+    """
+    Toma el siguiente trabajo en cola. SKIP LOCKED permite que varios
+    workers consulten la cola a la vez sin tomar el mismo trabajo.
+    """
+    with transaction.atomic():
+        job = (
+            BackupJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='queued')
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.attempts += 1
+        job.worker = worker_name()
+        job.save(update_fields=['status', 'started_at', 'attempts', 'worker'])
+        return job
+
+
+def run_job(job):
+    """Ejecuta un trabajo ya tomado y guarda su resultado."""
+    backup = Backup.objects.select_related('user', 'created_by').get(pk=job.backup_id)
+    progress = BackupProgress(backup)
+
+    try:
+        if job.kind == 'backup':
+            backup.create_backup_zip(progress=progress)
+        else:
+            backup.status = 'running'
+            backup.save(update_fields=['status'])
+            backup.restore_backup(progress=progress)
+        job.status = 'completed'
+        job.error = ''
+    except Exception as e:
+        job.status = 'failed'
+        job.error = f"{str(e)}\n\n{traceback.format_exc()}"
+        if job.kind == 'restore':
+            # El archivo del respaldo sigue siendo válido aunque la restauración falle
+            Backup.objects.filter(pk=backup.pk).update(
+                status='completed' if backup.file else 'failed',
+                notes=f"Error al restaurar: {str(e)}"
+            )
+    finally:
+        progress.close()
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    return job
+
+
+def requeue_stale_jobs():
+    """
+    Devuelve a la cola los trabajos de workers que murieron sin terminarlos,
+    o los marca como fallidos si ya agotaron sus intentos.
+    """
+    cutoff = timezone.now() - timedelta(minutes=JOB_STALE_MINUTES)
+    stale = BackupJob.objects.filter(status='running', started_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=JOB_MAX_ATTEMPTS).update(
+        status='failed', error='Trabajo abandonado por el worker', finished_at=timezone.now()
+    )
+    requeued = stale.filter(attempts__lt=JOB_MAX_ATTEMPTS).update(status='queued', worker='')
+    return requeued, failed
@@ -0,0 +1,82 @@
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from backup.jobs import claim_next_job, run_job, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = 'Procesa la cola de trabajos de backup y restauración'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Cantidad de procesos worker',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando no hay trabajos en cola',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Procesa los trabajos en cola y termina',
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        requeued, failed = requeue_stale_jobs()
+        if requeued or failed:
+            self.stdout.write(f"Trabajos abandonados: {requeued} reencolados, {failed} fallidos")
+
+        if workers == 1:
+            self.work(options['poll_interval'], options['once'])
+            return
+
+        # Cada proceso abre su propia conexión a la base de datos
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=self.work,
+                args=(options['poll_interval'], options['once']),
+                name=f'backup-worker-{index}',
+            )
+            for index in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(self.style.SUCCESS(f"{workers} workers de backup iniciados"))
+
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+
+    def work(self, poll_interval, once=False):
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+
+        while not stopping:
+            close_old_connections()
+            job = claim_next_job()
+            if job is None:
+                if once:
+                    return
+                time.sleep(poll_interval)
+                continue
+
+            self.stdout.write(f"Procesando {job}...")
+            job = run_job(job)
+            if job.status == 'completed':
+                self.stdout.write(self.style.SUCCESS(f"  ✓ {job}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"  ✗ {job}: {job.error.splitlines()[0] if job.error else ''}"))
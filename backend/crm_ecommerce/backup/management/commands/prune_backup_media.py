@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from backup.models import MediaBlob
+
+
+class Command(BaseCommand):
+    help = 'Elimina los archivos multimedia de respaldo que ya no referencia ningún backup'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=int,
+            default=24,
+            help='No eliminar contenidos más nuevos que esta cantidad de horas (backups en curso)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Muestra lo que se haría sin eliminar nada',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        orphans = MediaBlob.objects.filter(backups__isnull=True, created_at__lt=cutoff)
+
+        count = 0
+        freed = 0
+        for blob in orphans.iterator():
+            count += 1
+            freed += blob.size
+            if not options['dry_run']:
+                blob.file.delete(save=False)
+                blob.delete()
+
+        action = 'Se eliminarían' if options['dry_run'] else 'Eliminados'
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {count} archivos multimedia de respaldo ({round(freed / (1024 * 1024), 2)} MB)"
+        ))
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from backup.models import Backup
+
+# Cada cuántos respaldos programados se hace uno completo
+FULL_BACKUP_EVERY = getattr(settings, 'BACKUP_FULL_EVERY', 7)
+
+
+class Command(BaseCommand):
+    help = 'Encola los respaldos programados (incrementales) de todas las tiendas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Fuerza respaldos completos',
+        )
+        parser.add_argument(
+            '--full-every',
+            type=int,
+            default=FULL_BACKUP_EVERY,
+            help='Hace un respaldo completo tras esta cantidad de respaldos',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Muestra lo que se haría sin encolar respaldos',
+        )
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.filter(is_active=True, tienda__isnull=False)
+        queued = {'full': 0, 'incremental': 0}
+        skipped = 0
+
+        for user in users.iterator():
+            # No encolar si ya hay un respaldo en curso para el usuario
+            if Backup.objects.filter(user=user, status__in=['queued', 'running']).exists():
+                skipped += 1
+                continue
+
+            mode = 'full' if options['full'] else self.next_mode(user, options['full_every'])
+            if not options['dry_run']:
+                Backup.objects.create(
+                    user=user,
+                    backup_type='automatic',
+                    mode=mode,
+                    description='Respaldo programado'
+                )
+            queued[mode] += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Respaldos encolados: {queued['full']} completos, {queued['incremental']} incrementales"
+            f" ({skipped} usuarios con un respaldo en curso)"
+        ))
+
+    def next_mode(self, user, full_every):
+        """Completo si no hay uno previo o la cadena ya llegó a `full_every` respaldos."""
+        completed = Backup.objects.filter(user=user, status='completed').exclude(watermarks={})
+        last_full = completed.filter(mode='full').order_by('-created_at').first()
+        if last_full is None:
+            return 'full'
+        chain_length = completed.filter(mode='incremental', created_at__gt=last_full.created_at).count() + 1
+        return 'full' if chain_length >= full_every else 'incremental'
@@ -0,0 +1,206 @@
+"""
+Archivos multimedia de los backups direccionados por contenido.
+
+Cada archivo se identifica por su SHA-256. El ZIP guarda un manifiesto
+(media/manifest.json) con la ruta original de cada archivo y su hash, y el
+contenido se guarda una sola vez:
+
+- con BACKUP_MEDIA_STORE=True (por defecto) en un almacén compartido por
+  todos los backups del usuario (modelo MediaBlob), así una imagen que no
+  cambió no se vuelve a copiar en cada backup;
+- si no, dentro del ZIP en media/blobs/<hash><ext>, una vez por contenido.
+  Usarlo cuando el ZIP descargado deba incluir los archivos.
+
+Los formatos ya comprimidos (JPEG, PNG, WebP, ZIP...) se guardan con
+ZIP_STORED en lugar de volver a comprimirlos.
+"""
+import hashlib
+import json
+import os
+import shutil
+import zipfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+MEDIA_MANIFEST = 'media/manifest.json'
+MEDIA_BLOB_DIR = 'media/blobs'
+
+# Guardar el contenido en el almacén compartido en lugar de dentro de cada ZIP
+USE_MEDIA_STORE = getattr(settings, 'BACKUP_MEDIA_STORE', True)
+
+# Extensiones que no ganan nada al comprimirse de nuevo
+COMPRESSED_EXTENSIONS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.heic',
+    '.mp3', '.mp4', '.mov', '.webm',
+    '.zip', '.gz', '.bz2', '.xz', '.7z', '.rar',
+    '.docx', '.xlsx', '.pptx',
+}
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    """Calcula el SHA-256 de un archivo leyéndolo por bloques."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compress_type_for(name):
+    """ZIP_STORED para formatos ya comprimidos, ZIP_DEFLATED para el resto."""
+    ext = os.path.splitext(name)[1].lower()
+    return zipfile.ZIP_STORED if ext in COMPRESSED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def store_blobs(user, blobs):
+    """
+    Guarda en el almacén compartido los contenidos que aún no estén en él.
+
+    Args:
+        blobs: {sha256: (ruta_local, nombre_blob, tamaño)}
+
+    Returns:
+        tuple: (lista de MediaBlob referenciados, cantidad de contenidos nuevos)
+    """
+    from .models import MediaBlob
+
+    existing = {
+        blob.sha256: blob
+        for blob in MediaBlob.objects.filter(user=user, sha256__in=list(blobs))
+    }
+    new_blobs = []
+    for sha256, (file_path, name, size) in blobs.items():
+        if sha256 in existing:
+            continue
+        with open(file_path, 'rb') as f:
+            stored_name = default_storage.save(
+                f"{MediaBlob.STORE_DIR}/{user.pk}/{sha256[:2]}/{name}", File(f)
+            )
+        new_blobs.append(MediaBlob(user=user, sha256=sha256, size=size, file=stored_name))
+
+    if new_blobs:
+        MediaBlob.objects.bulk_create(new_blobs, ignore_conflicts=True)
+        existing.update({
+            blob.sha256: blob
+            for blob in MediaBlob.objects.filter(user=user, sha256__in=[b.sha256 for b in new_blobs])
+        })
+    return list(existing.values()), len(new_blobs)
+
+
+def write_media(zipf, user, media_files, backup=None, use_store=None):
+    """
+    Escribe el manifiesto de archivos multimedia y guarda cada contenido una vez.
+
+    Args:
+        media_files: lista de (ruta_local, ruta_relativa_en_MEDIA_ROOT).
+        backup: Backup al que se vinculan los contenidos del almacén.
+
+    Returns:
+        dict: archivos, contenidos únicos y contenidos nuevos en el almacén.
+    """
+    use_store = USE_MEDIA_STORE if use_store is None else use_store
+    manifest = []
+    blobs = {}
+
+    for file_path, name in media_files:
+        try:
+            sha256 = file_sha256(file_path)
+            size = os.path.getsize(file_path)
+        except OSError as e:
+            print(f"Error al leer archivo {file_path} para el backup: {str(e)}")
+            continue
+        blob = blobs.setdefault(
+            sha256, (file_path, f"{sha256}{os.path.splitext(name)[1].lower()}", size)
+        )
+        manifest.append({'path': name, 'sha256': sha256, 'size': size, 'blob': blob[1]})
+
+    stored = 0
+    if use_store:
+        referenced, stored = store_blobs(user, blobs)
+        if backup is not None and referenced:
+            backup.media_blobs.add(*referenced)
+    else:
+        for sha256, (file_path, name, size) in blobs.items():
+            try:
+                zipf.write(file_path, f"{MEDIA_BLOB_DIR}/{name}", compress_type=compress_type_for(name))
+            except Exception as e:
+                print(f"Error al agregar archivo {file_path} al backup: {str(e)}")
+
+    zipf.writestr(MEDIA_MANIFEST, json.dumps({
+        'storage': 'store' if use_store else 'archive',
+        'files': manifest,
+    }, indent=2, ensure_ascii=False))
+
+    return {'files': len(manifest), 'unique': len(blobs), 'stored': stored}
+
+
+def restore_media(zipf, user):
+    """
+    Restaura en MEDIA_ROOT los archivos del manifiesto. Los archivos que ya
+    existen con el mismo tamaño no se vuelven a copiar. Devuelve los copiados.
+    """
+    from .models import MediaBlob
+
+    names = set(zipf.namelist())
+    if MEDIA_MANIFEST not in names:
+        return restore_legacy_media(zipf)
+
+    manifest = json.loads(zipf.read(MEDIA_MANIFEST).decode('utf-8'))
+    entries = manifest.get('files', [])
+    blobs = {
+        blob.sha256: blob
+        for blob in MediaBlob.objects.filter(user=user, sha256__in={e['sha256'] for e in entries})
+    }
+
+    media_root = os.path.realpath(settings.MEDIA_ROOT)
+    restored = 0
+    for entry in entries:
+        dest_path = os.path.realpath(os.path.join(media_root, entry['path']))
+        if not dest_path.startswith(media_root + os.sep):
+            print(f"Ruta de archivo inválida en el backup: {entry['path']}")
+            continue
+        if os.path.exists(dest_path) and os.path.getsize(dest_path) == entry['size']:
+            continue
+
+        arcname = f"{MEDIA_BLOB_DIR}/{entry['blob']}"
+        try:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            if arcname in names:
+                source = zipf.open(arcname)
+            elif entry['sha256'] in blobs:
+                source = default_storage.open(blobs[entry['sha256']].file.name, 'rb')
+            else:
+                print(f"Contenido no encontrado para {entry['path']} ({entry['sha256']})")
+                continue
+            with source, open(dest_path, 'wb') as target:
+                shutil.copyfileobj(source, target)
+            restored += 1
+        except Exception as e:
+            print(f"Error al restaurar archivo {entry['path']}: {str(e)}")
+    return restored
+
+
+def restore_legacy_media(zipf):
+    """Extrae los archivos media/<tipo>/<nombre> de los backups anteriores al manifiesto."""
+    media_root = os.path.realpath(settings.MEDIA_ROOT)
+    restored = 0
+    for file_info in zipf.infolist():
+        if file_info.filename.startswith('media/') and not file_info.is_dir():
+            # media/productos/x.jpg vuelve a productos/x.jpg (el upload_to del campo)
+            dest_path = os.path.realpath(os.path.join(media_root, file_info.filename[len('media/'):]))
+            if not dest_path.startswith(media_root + os.sep):
+                print(f"Ruta de archivo inválida en el backup: {file_info.filename}")
+                continue
+            try:
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                with zipf.open(file_info) as source, open(dest_path, 'wb') as target:
+                    shutil.copyfileobj(source, target)
+                restored += 1
+            except Exception as e:
+                print(f"Error al extraer archivo {file_info.filename}: {str(e)}")
+                continue
+    return restored
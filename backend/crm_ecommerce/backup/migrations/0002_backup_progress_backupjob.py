@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-17 11:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backup', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='backup',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pendiente'), ('queued', 'En cola'), ('running', 'En ejecución'), ('completed', 'Completado'), ('failed', 'Fallido')], default='pending', max_length=20, verbose_name='Estado'),
+        ),
+        migrations.AddField(
+            model_name='backup',
+            name='progress',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Progreso (%)'),
+        ),
+        migrations.AddField(
+            model_name='backup',
+            name='progress_detail',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Progreso por modelo'),
+        ),
+        migrations.CreateModel(
+            name='BackupJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('backup', 'Respaldo'), ('restore', 'Restauración')], max_length=20, verbose_name='Tipo')),
+                ('status', models.CharField(choices=[('queued', 'En cola'), ('running', 'En ejecución'), ('completed', 'Completado'), ('failed', 'Fallido')], default='queued', max_length=20, verbose_name='Estado')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('backup', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='backup.backup', verbose_name='Respaldo')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='backup_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de respaldo',
+                'verbose_name_plural': 'Trabajos de respaldo',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='backup_job_status_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-17 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backup', '0002_backup_progress_backupjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backup',
+            name='mode',
+            field=models.CharField(choices=[('full', 'Completo'), ('incremental', 'Incremental')], default='full', max_length=20, verbose_name='Modo'),
+        ),
+        migrations.AddField(
+            model_name='backup',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='incrementals', to='backup.backup', verbose_name='Respaldo anterior'),
+        ),
+        migrations.AddField(
+            model_name='backup',
+            name='watermarks',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Marcas de agua por modelo'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-17 12:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backup', '0003_backup_incremental'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('size', models.BigIntegerField(verbose_name='Tamaño (bytes)')),
+                ('file', models.FileField(max_length=255, upload_to='backups/media', verbose_name='Archivo')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='backup_media_blobs', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Archivo multimedia de respaldo',
+                'verbose_name_plural': 'Archivos multimedia de respaldo',
+                'constraints': [models.UniqueConstraint(fields=('user', 'sha256'), name='backup_media_blob_unique_hash')],
+            },
+        ),
+        migrations.AddField(
+            model_name='backup',
+            name='media_blobs',
+            field=models.ManyToManyField(blank=True, related_name='backups', to='backup.mediablob', verbose_name='Archivos multimedia'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-17 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backup', '0004_mediablob_backup_media_blobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='backup',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='incrementals', to='backup.backup', verbose_name='Respaldo anterior'),
+        ),
+    ]
@@ -1,22 +1,28 @@
-from django.db import models, transaction, connection
+from django.db import models, transaction
 from django.utils import timezone
 from django.conf import settings
 from django.core import serializers
 from django.core.files.storage import default_storage
 import os
 import zipfile
-from io import BytesIO
 from datetime import datetime
 import tempfile
 import json
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.timezone import now
-from django.apps import apps
-from .backup_utils import generate_json_backup, save_media_files, CustomJSONEncoder
+from django.core.files import File
+from .backup_utils import (
+    get_backup_metadata, write_ndjson_backup, read_backup_records, read_tombstones,
+    save_media_files, TOMBSTONE_MODELS,
+)
+from .media_store import restore_media
+from .restore import RestoreEngine
 
 class Backup(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pendiente'),
+        ('queued', 'En cola'),
+        ('running', 'En ejecución'),
         ('completed', 'Completado'),
         ('failed', 'Fallido')
     ]
@@ -26,6 +32,11 @@ class Backup(models.Model):
         ('manual', 'Manual'),
         ('admin', 'Administrador')
     ]
+
+    MODE_CHOICES = [
+        ('full', 'Completo'),
+        ('incremental', 'Incremental')
+    ]
     
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
@@ -63,6 +74,29 @@ class Backup(models.Model):
         verbose_name='Creado por'
     )
     notes = models.TextField('Notas administrativas', blank=True)
+    progress = models.PositiveSmallIntegerField('Progreso (%)', default=0)
+    progress_detail = models.JSONField('Progreso por modelo', default=dict, blank=True)
+    mode = models.CharField(
+        'Modo',
+        max_length=20,
+        choices=MODE_CHOICES,
+        default='full'
+    )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.RESTRICT,
+        null=True,
+        blank=True,
+        related_name='incrementals',
+        verbose_name='Respaldo anterior'
+    )
+    watermarks = models.JSONField('Marcas de agua por modelo', default=dict, blank=True)
+    media_blobs = models.ManyToManyField(
+        'MediaBlob',
+        blank=True,
+        related_name='backups',
+        verbose_name='Archivos multimedia'
+    )
 
     class Meta:
         verbose_name = 'Respaldo'
@@ -84,15 +118,40 @@ class Backup(models.Model):
         # Guardar el modelo primero para tener un ID
         super().save(*args, **kwargs)
         
-        # Si es un nuevo registro y no se ha generado el archivo, generarlo
+        # Si es un nuevo registro sin archivo, encolar su generación
         if is_new and not self.file:
-            try:
-                self.create_backup_zip()
-            except Exception as e:
-                # Si hay un error, actualizar el estado a fallido
-                self.status = 'failed'
-                super().save(update_fields=['status'])
-                raise e
+            self.enqueue('backup', requested_by=self.created_by)
+
+    def delete(self, *args, **kwargs):
+        """
+        Elimina el respaldo junto con los incrementales que dependen de él y
+        borra los archivos ZIP de toda la cadena cuando la transacción se
+        confirma. Un borrado masivo (queryset) de un respaldo con
+        incrementales falla por on_delete=RESTRICT en lugar de dejarlos
+        huérfanos.
+        """
+        with transaction.atomic():
+            for incremental in self.incrementals.all():
+                incremental.delete()
+            storage, name = self.file.storage, self.file.name
+            deleted = super().delete(*args, **kwargs)
+            if name:
+                transaction.on_commit(lambda: storage.delete(name))
+        return deleted
+
+    def enqueue(self, kind, requested_by=None):
+        """
+        Encola un trabajo de backup o restauración para el worker
+        (manage.py process_backup_jobs) y deja el respaldo en estado 'queued'.
+        """
+        job = BackupJob.objects.create(backup=self, kind=kind, requested_by=requested_by)
+        self.status = 'queued'
+        self.progress = 0
+        self.progress_detail = {}
+        Backup.objects.filter(pk=self.pk).update(
+            status=self.status, progress=0, progress_detail={}
+        )
+        return job
 
     @property
     def size_mb(self):
@@ -103,7 +162,6 @@ class Backup(models.Model):
     def download_response(self):
         from django.http import FileResponse
         from wsgiref.util import FileWrapper
-        import os
         
         if not self.file:
             return None
@@ -115,61 +173,112 @@ class Backup(models.Model):
         response['Content-Disposition'] = f'attachment; filename="{os.path.basename(self.file.name)}"'
         return response
 
+    def get_chain(self):
+        """
+        Devuelve la cadena de respaldos necesaria para restaurar este:
+        el respaldo completo inicial seguido de sus incrementales en orden.
+        """
+        chain = [self]
+        current = self
+        while current.mode == 'incremental' and current.parent_id:
+            current = current.parent
+            if current in chain:
+                raise ValueError("La cadena de respaldos incrementales tiene un ciclo")
+            chain.append(current)
+        if chain[-1].mode != 'full':
+            raise ValueError("La cadena de respaldos incrementales no tiene un respaldo completo inicial")
+        return list(reversed(chain))
+
+    def find_incremental_parent(self):
+        """Último respaldo completado del usuario sobre el que basar un incremental."""
+        return (
+            Backup.objects
+            .filter(user=self.user, status='completed', created_at__lt=self.created_at)
+            .exclude(pk=self.pk)
+            .exclude(watermarks={})
+            .order_by('-created_at')
+            .first()
+        )
+
     @staticmethod
     def get_backup_filename(user_id):
         """Genera un nombre único para el archivo de backup"""
         timestamp = now().strftime("%Y%m%d_%H%M%S")
         return f'backup_{user_id}_{timestamp}.zip'
 
-    def create_backup_zip(self):
+    def create_backup_zip(self, progress=None):
         """
-        Crear un archivo ZIP con archivos JSON que contienen todos los datos del usuario.
-        
+        Crear un archivo ZIP con un archivo NDJSON por modelo con los datos del usuario.
+
+        El ZIP se escribe en un archivo temporal en disco y los datos se
+        exportan por lotes, así la memoria no crece con el tamaño de la tienda.
+        En modo incremental solo se exportan los cambios desde el último
+        respaldo completado del usuario; si no hay ninguno se hace uno completo.
+
+        Args:
+            progress: BackupProgress opcional para informar el avance por modelo.
+
         Returns:
             bool: True si el backup se creó correctamente, False en caso contrario.
         """
-        self.status = 'pending'
-        self.save(update_fields=['status'])
+        self.status = 'running'
+        since = None
+        if self.mode == 'incremental':
+            self.parent = self.find_incremental_parent()
+            if self.parent is None:
+                self.mode = 'full'
+            else:
+                since = self.parent.watermarks
+        self.save(update_fields=['status', 'mode', 'parent'])
         
         try:
-            # 1. Generar los datos del backup en formato JSON
-            backup_data = generate_json_backup(self.user)
-            if not backup_data or 'metadata' not in backup_data:
-                raise ValueError("No se pudieron generar los datos del backup")
-            
-            # 2. Crear el archivo ZIP en memoria
-            buffer = BytesIO()
-            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # 3. Agregar el archivo JSON con los datos
-                zipf.writestr('data.json', json.dumps(backup_data, indent=2, ensure_ascii=False, cls=CustomJSONEncoder))
-                
-                # 4. Guardar archivos multimedia
-                media_count = 0
-                try:
-                    media_count = save_media_files(zipf, self.user)
-                except Exception as e:
-                    print(f"Advertencia: No se pudieron guardar los archivos multimedia: {str(e)}")
-                
-                # 5. Actualizar metadatos
-                backup_data['metadata'].update({
-                    'media_files_count': media_count,
-                    'format': 'json',
-                    'database': settings.DATABASES['default']['NAME'],
-                    'created_at': now().isoformat(),
-                    'backup_type': self.backup_type,
-                    'created_by': str(self.created_by) if self.created_by else 'system'
-                })
-                
-                # 6. Guardar metadatos actualizados
-                zipf.writestr('metadata.json', json.dumps(backup_data['metadata'], indent=2, ensure_ascii=False))
-
-            # 7. Guardar el archivo ZIP en el almacenamiento
-            filename = self.get_backup_filename(self.user.id)
-            buffer.seek(0)  # Volver al inicio del buffer
-            self.file.save(filename, buffer)
-            self.size = buffer.tell()
+            with tempfile.TemporaryFile(dir=getattr(settings, 'BACKUP_TEMP_DIR', None)) as spool:
+                with zipfile.ZipFile(spool, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                    # 1. Metadatos del backup
+                    metadata = get_backup_metadata(self.user)
+                    if 'error' in metadata:
+                        raise ValueError("No se pudieron generar los datos del backup")
+
+                    # 2. Escribir los datos de cada modelo directamente en el ZIP
+                    exported, self.watermarks = write_ndjson_backup(
+                        zipf, self.user, progress=progress, since=since
+                    )
+
+                    # 3. Guardar archivos multimedia
+                    media = {'files': 0}
+                    try:
+                        media = save_media_files(zipf, self.user, backup=self)
+                    except Exception as e:
+                        print(f"Advertencia: No se pudieron guardar los archivos multimedia: {str(e)}")
+
+                    # 4. Actualizar metadatos
+                    metadata.update({
+                        'media_files_count': media['files'],
+                        'media': media,
+                        'format': 'ndjson',
+                        'mode': self.mode,
+                        'parent_id': self.parent_id,
+                        'since': since or {},
+                        'watermarks': self.watermarks,
+                        'models': exported,
+                        'database': settings.DATABASES['default']['NAME'],
+                        'created_at': now().isoformat(),
+                        'backup_type': self.backup_type,
+                        'created_by': str(self.created_by) if self.created_by else 'system'
+                    })
+
+                    # 5. Guardar metadatos
+                    zipf.writestr('metadata.json', json.dumps(metadata, indent=2, ensure_ascii=False))
+
+                # 6. Guardar el archivo ZIP en el almacenamiento
+                self.size = spool.tell()
+                spool.seek(0)
+                filename = self.get_backup_filename(self.user.id)
+                self.file.save(filename, File(spool), save=False)
+
             self.status = 'completed'
-            self.save(update_fields=['file', 'size', 'status'])
+            self.progress = 100
+            self.save(update_fields=['file', 'size', 'status', 'progress', 'watermarks'])
             return True
                 
         except Exception as e:
@@ -192,21 +301,56 @@ class Backup(models.Model):
             return self.file.url
         return None
 
-    def restore_backup(self):
+    def restore_backup(self, progress=None):
         """
-        Restaura un backup desde un archivo ZIP que contiene archivos JSON
+        Restaura un backup desde un archivo ZIP que contiene archivos JSON.
+
+        Si el backup es incremental se restaura la cadena completa: el
+        respaldo completo inicial y cada incremental en orden. Los registros
+        se insertan por lotes con RestoreEngine (ver restore.py) dentro de
+        una transacción; si algo falla no queda nada a medias.
+
+        Args:
+            progress: BackupProgress opcional para informar el avance por modelo.
         """
-        if not self.file:
-            raise ValueError("No se puede restaurar un backup sin archivo")
+        chain = self.get_chain()
+        for backup in chain:
+            if not backup.file:
+                raise ValueError(f"No se puede restaurar el backup {backup.id} sin archivo")
+
+        engine = RestoreEngine(self.user, progress=progress)
+        inserted = 0
+        with transaction.atomic():
+            for backup in chain:
+                try:
+                    inserted += backup._restore_archive(engine)
+                except ValueError:
+                    raise
+                except Exception as e:
+                    print(f"Error durante la restauración: {str(e)}")
+                    raise ValueError(f"Error al restaurar el backup {backup.id}: {str(e)}")
 
-        # Leer el archivo ZIP
+            # Los resúmenes diarios de ventas no se respaldan: se recalculan
+            from ComprasTiendaPublica.models import PedidoPublico
+            from tienda.models import Pedido
+            if engine.restored_models & {Pedido, PedidoPublico}:
+                from ComprasTiendaPublica.rollups import recalcular
+                from tienda.models import Tienda
+                recalcular(tiendas=Tienda.objects.filter(usuario=self.user))
+
+        print(f"Restauración completada exitosamente: {inserted} registros de {len(chain)} archivo(s)")
+
+        # Actualizar estado del backup
+        self.status = 'completed'
+        self.progress = 100
+        self.save(update_fields=['status', 'progress'])
+        return True
+
+    def _restore_archive(self, engine):
+        """Restaura el ZIP de este backup con `engine`. Devuelve las filas insertadas."""
         with default_storage.open(self.file.name, 'rb') as f:
             with zipfile.ZipFile(f, 'r') as zipf:
-                # 1. Verificar que el archivo de datos existe
-                if 'data.json' not in zipf.namelist():
-                    raise ValueError("El archivo de backup no contiene datos JSON válidos")
-                
-                # 2. Leer metadatos
+                # 1. Leer metadatos
                 metadata = {}
                 if 'metadata.json' in zipf.namelist():
                     try:
@@ -214,145 +358,111 @@ class Backup(models.Model):
                     except json.JSONDecodeError as e:
                         print(f"Error al decodificar metadatos: {str(e)}")
                 
-                # 3. Verificar que el backup pertenece al usuario actual
+                # 2. Verificar que el backup pertenece al usuario actual
                 backup_user_id = metadata.get('user', {}).get('id')
                 if backup_user_id and int(backup_user_id) != self.user.id:
                     raise ValueError("El backup no pertenece a este usuario")
+                if backup_user_id:
+                    engine.id_maps[engine.user_model][int(backup_user_id)] = self.user.pk
                 
-                # 4. Leer los datos del backup
-                try:
-                    backup_data = json.loads(zipf.read('data.json').decode('utf-8'))
-                except json.JSONDecodeError as e:
-                    raise ValueError(f"Error al decodificar el archivo de datos: {str(e)}")
-                
-                # 5. Procesar la restauración en una transacción
-                with transaction.atomic():
-                    try:
-                        # Deshabilitar triggers temporalmente para evitar problemas con claves foráneas
-                        with connection.cursor() as cursor:
-                            cursor.execute("SET session_replication_role = 'replica';")
-                        
-                        # Orden de restauración para respetar las relaciones
-                        # Primero modelos de autenticación y luego los que dependen de ellos
-                        restore_order = [
-                            # Modelos de autenticación
-                            ('auth_user', 'auth', 'User'),
-                            
-                            # Modelos de tienda (dependen de User)
-                            ('tienda_tienda', 'tienda', 'Tienda'),
-                            ('tienda_categoria', 'tienda', 'Categoria'),
-                            ('tienda_producto', 'tienda', 'Producto'),
-                            
-                            # Modelos de pedidos (dependen de Tienda y Producto)
-                            ('tienda_pedido', 'tienda', 'Pedido'),
-                            ('tienda_detallepedido', 'tienda', 'DetallePedido'),
-                            ('tienda_notificacionpedido', 'tienda', 'NotificacionPedido'),
-                            
-                            # Modelos de leads (dependen de Tienda)
-                            ('leads_lead', 'leads', 'Lead'),
-                            ('leads_interaccionlead', 'leads', 'InteraccionLead'),
-                            
-                            # Modelos de compras públicas (dependen de Tienda)
-                            ('ComprasTiendaPublica_pedidopublico', 'ComprasTiendaPublica', 'PedidoPublico'),
-                            ('ComprasTiendaPublica_detallepedidopublico', 'ComprasTiendaPublica', 'DetallePedidoPublico'),
-                            
-                            # Modelos de usuarios públicos (dependen de Tienda)
-                            ('UsersTiendaPublica_userstiendapublica', 'UsersTiendaPublica', 'UsersTiendaPublica'),
-                            
-                            # Modelos de pagos (dependen de Tienda)
-                            ('payments_paymentmethod', 'payments', 'PaymentMethod'),
-                            ('payments_paymenttransaction', 'payments', 'PaymentTransaction'),
-                        ]
-                        
-                        # Diccionario para mapear IDs antiguos a nuevos
-                        id_mapping = {}
-                        
-                        # Restaurar datos en el orden correcto
-                        for model_key, app_label, model_name in restore_order:
-                            if model_key in backup_data.get('data', {}):
-                                try:
-                                    model = apps.get_model(app_label, model_name)
-                                    model_data = backup_data['data'][model_key]
-                                    
-                                    if not isinstance(model_data, list):
-                                        print(f"Advertencia: Datos inválidos para {model_key}, se esperaba una lista")
-                                        continue
-                                    
-                                    print(f"Restaurando {len(model_data)} registros de {model_key}...")
-                                    
-                                    # Inicializar mapeo de IDs para este modelo
-                                    if model_key not in id_mapping:
-                                        id_mapping[model_key] = {}
-                                    
-                                    for item in model_data:
-                                        try:
-                                            # Hacer una copia para no modificar el original
-                                            item_data = item.copy()
-                                            
-                                            # Guardar el ID original
-                                            original_id = item_data.pop('id', None)
-                                            
-                                            # Reemplazar claves foráneas usando el mapeo
-                                            for field in model._meta.fields:
-                                                if field.is_relation and field.name + '_id' in item_data:
-                                                    related_model = field.related_model
-                                                    if related_model:
-                                                        related_key = f"{related_model._meta.app_label}_{related_model._meta.model_name}"
-                                                        old_related_id = item_data[field.name + '_id']
-                                                        if related_key in id_mapping and old_related_id in id_mapping[related_key]:
-                                                            item_data[field.name + '_id'] = id_mapping[related_key][old_related_id]
-                                            
-                                            # Crear el objeto
-                                            obj = model(**item_data)
-                                            obj.save()
-                                            
-                                            # Guardar el mapeo de ID antiguo a nuevo
-                                            if original_id is not None:
-                                                id_mapping[model_key][original_id] = obj.id
-                                                
-                                        except Exception as e:
-                                            print(f"Error al restaurar registro en {model_key}: {str(e)}")
-                                            continue
-                                            
-                                except Exception as e:
-                                    print(f"Error al procesar {model_key}: {str(e)}")
-                                    continue
-                        
-                        # Procesar archivos multimedia
-                        if 'media' in zipf.namelist():
-                            media_dir = settings.MEDIA_ROOT
-                            os.makedirs(media_dir, exist_ok=True)
-                            
-                            # Extraer archivos multimedia
-                            for file_info in zipf.infolist():
-                                if file_info.filename.startswith('media/') and not file_info.is_dir():
-                                    try:
-                                        # Crear directorios necesarios
-                                        dest_path = os.path.join(media_dir, os.path.basename(file_info.filename))
-                                        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                                        
-                                        # Extraer el archivo
-                                        with zipf.open(file_info) as source, open(dest_path, 'wb') as target:
-                                            shutil.copyfileobj(source, target)
-                                            
-                                    except Exception as e:
-                                        print(f"Error al extraer archivo {file_info.filename}: {str(e)}")
-                                        continue
-                        
-                        # Volver a habilitar triggers
-                        with connection.cursor() as cursor:
-                            cursor.execute("SET session_replication_role = 'origin';")
-                        
-                        print("Restauración completada exitosamente")
-                            
-                    except Exception as e:
-                        # Si hay un error, hacer rollback de la transacción
-                        print(f"Error durante la restauración: {str(e)}")
-                        raise ValueError(f"Error al restaurar el backup: {str(e)}")
-                
-                # Actualizar estado del backup
-                self.status = 'completed'
-                self.save()
-                return True
+                # 3. Restaurar los datos (NDJSON por modelo o data.json)
+                records = read_backup_records(zipf)
+                totals = {
+                    model_key: info.get('count', 0)
+                    for model_key, info in metadata.get('models', {}).items()
+                }
+                stats = engine.run(records, totals=totals)
+
+                # 4. Aplicar los borrados lógicos de los backups incrementales
+                for model_key, ids in read_tombstones(zipf).items():
+                    deleted = engine.apply_tombstones(model_key, ids, TOMBSTONE_MODELS.get(model_key, {}))
+                    print(f"Borrados aplicados en {model_key}: {deleted}")
+
+                # 5. Restaurar archivos multimedia (manifiesto por hash o formato anterior)
+                media_restored = restore_media(zipf, self.user)
+                print(f"Archivos multimedia restaurados: {media_restored}")
+
+                return sum(s['inserted'] for s in stats.values())
+
+
+class MediaBlob(models.Model):
+    """
+    Contenido de un archivo multimedia guardado una sola vez por usuario e
+    identificado por su SHA-256. Los backups lo referencian desde su
+    manifiesto (ver media_store.py).
+    """
+    STORE_DIR = 'backups/media'
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='backup_media_blobs',
+        verbose_name='Usuario'
+    )
+    sha256 = models.CharField('SHA-256', max_length=64)
+    size = models.BigIntegerField('Tamaño (bytes)')
+    file = models.FileField('Archivo', upload_to=STORE_DIR, max_length=255)
+    created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Archivo multimedia de respaldo'
+        verbose_name_plural = 'Archivos multimedia de respaldo'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'sha256'], name='backup_media_blob_unique_hash'),
+        ]
 
-        return False
\ No newline at end of file
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} bytes)"
+
+
+class BackupJob(models.Model):
+    """
+    Trabajo de backup o restauración en la cola de la base de datos.
+
+    Los procesa el comando process_backup_jobs fuera del request HTTP.
+    """
+    KIND_CHOICES = [
+        ('backup', 'Respaldo'),
+        ('restore', 'Restauración'),
+    ]
+
+    STATUS_CHOICES = [
+        ('queued', 'En cola'),
+        ('running', 'En ejecución'),
+        ('completed', 'Completado'),
+        ('failed', 'Fallido'),
+    ]
+
+    backup = models.ForeignKey(
+        Backup,
+        on_delete=models.CASCADE,
+        related_name='jobs',
+        verbose_name='Respaldo'
+    )
+    kind = models.CharField('Tipo', max_length=20, choices=KIND_CHOICES)
+    status = models.CharField('Estado', max_length=20, choices=STATUS_CHOICES, default='queued')
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='backup_jobs',
+        verbose_name='Solicitado por'
+    )
+    attempts = models.PositiveSmallIntegerField('Intentos', default=0)
+    worker = models.CharField('Worker', max_length=100, blank=True)
+    error = models.TextField('Error', blank=True)
+    created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
+    started_at = models.DateTimeField('Inicio', null=True, blank=True)
+    finished_at = models.DateTimeField('Fin', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Trabajo de respaldo'
+        verbose_name_plural = 'Trabajos de respaldo'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='backup_job_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.id} - Backup {self.backup_id} - {self.status}"
@@ -0,0 +1,445 @@
+"""
+Motor de restauración de backups.
+
+Inserta los registros de cada modelo por lotes con bulk_create en lugar de
+un save() por fila, y reasigna las claves foráneas lote a lote con los
+mapeos de IDs antiguos a nuevos de los modelos ya restaurados.
+
+Reglas de la restauración:
+- Los modelos se restauran en orden de dependencias (padres antes que hijos).
+- El usuario del backup no se inserta: sus IDs se reasignan al usuario que
+  restaura.
+- Las filas que ya existen (misma clave única, p. ej. la tienda del usuario
+  o un lead con el mismo email) se conservan y solo se mapean sus IDs. Solo
+  se buscan entre las filas del usuario que restaura (filtros de
+  get_user_models); una clave única global de otro usuario, como el slug de
+  su tienda, no se reutiliza y la inserción falla dentro de la transacción.
+- Las claves foráneas a filas que no existen quedan en NULL si el campo lo
+  permite; si no, la fila se omite.
+- bulk_create no dispara señales; con send_signals=True se envía post_save
+  con raw=True por cada fila insertada, como hace loaddata.
+- Una misma instancia puede restaurar una cadena de backups (completo más
+  incrementales): las filas cuyo ID ya se restauró se actualizan con
+  bulk_update en lugar de insertarse de nuevo.
+- Los modelos de LEGACY_MODELS se leen con el esquema que tenían en los
+  backups anteriores a su cambio.
+"""
+import time
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, models
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from .backup_utils import get_user_models
+
+# Filas por lote de bulk_create
+RESTORE_BATCH_SIZE = getattr(settings, 'BACKUP_RESTORE_BATCH_SIZE', 1000)
+
+# Enviar post_save por cada fila restaurada (por defecto se omiten los efectos secundarios)
+RESTORE_SEND_SIGNALS = getattr(settings, 'BACKUP_RESTORE_SEND_SIGNALS', False)
+
+# Claves de backups anteriores a un cambio de esquema: campos renombrados,
+# valores fijos para cada fila y, por clave foránea, la clave del backup
+# cuyos IDs originales usa (si no es la del modelo al que apunta).
+LEGACY_MODELS = {
+    # Antes de unificarse con tienda.Pedido, los pedidos de la tienda pública
+    # tenían tablas propias; ahora se restauran con origen='tienda_publica'
+    'ComprasTiendaPublica_PedidoPublico': {
+        'renames': {
+            'usuario': 'cliente_tienda_publica',
+            'fecha': 'fecha_creacion',
+            'direccion': 'direccion_entrega',
+        },
+        'values': {'origen': 'tienda_publica'},
+    },
+    'ComprasTiendaPublica_DetallePedidoPublico': {
+        'related': {'pedido': 'ComprasTiendaPublica_PedidoPublico'},
+    },
+}
+
+
+def get_model_for_key(model_key):
+    """Devuelve el modelo de una clave '<app>_<Modelo>' o None si no existe."""
+    app_label, _, model_name = model_key.rpartition('_')
+    try:
+        return apps.get_model(app_label, model_name)
+    except (LookupError, ValueError):
+        return None
+
+
+def related_model_for(model_key, field):
+    """Modelo cuyos IDs originales usa `field` en los registros de `model_key`."""
+    related_key = LEGACY_MODELS.get(model_key, {}).get('related', {}).get(field.name)
+    if related_key:
+        return get_model_for_key(related_key)
+    return field.related_model
+
+
+@contextmanager
+def preserve_timestamps(model):
+    """
+    Desactiva auto_now/auto_now_add del modelo para conservar las fechas
+    originales de los registros restaurados.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield fields
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+class RestoreEngine:
+    """
+    Restaura los registros de un backup para `owner`.
+
+    Args:
+        owner: usuario al que se restauran los datos.
+        source_owner_id: ID del usuario en el backup (metadata['user']['id']).
+        batch_size: filas por lote de bulk_create.
+        send_signals: enviar post_save por cada fila insertada.
+        progress: BackupProgress opcional para informar el avance.
+    """
+
+    def __init__(self, owner, source_owner_id=None, batch_size=None,
+                 send_signals=None, progress=None, using=DEFAULT_DB_ALIAS):
+        self.owner = owner
+        self.batch_size = batch_size or RESTORE_BATCH_SIZE
+        self.send_signals = RESTORE_SEND_SIGNALS if send_signals is None else send_signals
+        self.progress = progress
+        self.using = using
+        self.user_model = get_user_model()
+
+        # {modelo: {id_antiguo: id_nuevo}}
+        self.id_maps = {self.user_model: {}}
+        if source_owner_id is not None:
+            self.id_maps[self.user_model][int(source_owner_id)] = owner.pk
+        # Modelos incluidos en el backup que se insertan
+        self.restored_models = set()
+        self.stats = {}
+        # {modelo: filtros de las filas del usuario que restaura}
+        self.owner_scopes = self._owner_scopes()
+
+    def restore_order(self, model_keys):
+        """
+        Ordena las claves del backup de modo que cada modelo se restaure
+        después de los modelos a los que apunta. Ante un ciclo se respeta
+        el orden del backup.
+        """
+        keyed = []
+        for model_key in model_keys:
+            model = get_model_for_key(model_key)
+            if model is None:
+                print(f"Modelo no encontrado en el backup: {model_key}")
+                continue
+            keyed.append((model_key, model))
+
+        included = {model for _, model in keyed}
+        pending = list(keyed)
+        ordered = []
+        done = set()
+        while pending:
+            for index, (model_key, model) in enumerate(pending):
+                related = {
+                    related_model_for(model_key, field) for field in model._meta.concrete_fields
+                    if field.is_relation
+                }
+                dependencies = (related & included) - {model}
+                if dependencies <= done:
+                    break
+            else:
+                index = 0
+            model_key, model = pending.pop(index)
+            ordered.append((model_key, model))
+            done.add(model)
+        return ordered
+
+    def run(self, records, totals=None):
+        """
+        Restaura `records` ({model_key: iterable de diccionarios}).
+
+        Returns:
+            dict: {model_key: estadísticas del modelo}
+        """
+        ordered = self.restore_order(records.keys())
+        self.restored_models |= {model for _, model in ordered if model is not self.user_model}
+        self.stats = {}
+
+        if self.progress:
+            totals = totals or {}
+            self.progress.set_totals({model_key: totals.get(model_key, 0) for model_key, _ in ordered})
+
+        for model_key, model in ordered:
+            rows = records[model_key]
+            if isinstance(rows, dict):
+                print(f"Advertencia: Datos inválidos para {model_key}, se esperaba una lista")
+                continue
+            if model is self.user_model:
+                # El usuario ya existe: solo se usa el mapeo al usuario que restaura
+                if self.progress:
+                    self.progress.finish_model(model_key, 0)
+                continue
+            self.restore_model(model_key, model, rows)
+
+        return self.stats
+
+    def restore_model(self, model_key, model, rows):
+        """Restaura las filas de un modelo por lotes."""
+        stats = {'rows': 0, 'inserted': 0, 'updated': 0, 'matched': 0, 'skipped': 0}
+        self.id_maps.setdefault(model, {})
+        if self.progress:
+            self.progress.start_model(model_key)
+
+        started = time.monotonic()
+        batch = []
+        for item in rows:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._restore_batch(model, batch, stats, model_key)
+                batch = []
+                if self.progress:
+                    self.progress.advance(model_key, stats['rows'])
+        if batch:
+            self._restore_batch(model, batch, stats, model_key)
+
+        stats['seconds'] = round(time.monotonic() - started, 3)
+        stats['rows_per_sec'] = round(stats['rows'] / stats['seconds'], 1) if stats['seconds'] else stats['rows']
+        self.stats[model_key] = stats
+
+        print(
+            f"Restaurado {model_key}: {stats['inserted']} insertados, {stats['updated']} actualizados, "
+            f"{stats['matched']} existentes, "
+            f"{stats['skipped']} omitidos en {stats['seconds']}s ({stats['rows_per_sec']} filas/s)"
+        )
+        if self.progress:
+            self.progress.finish_model(model_key, stats['rows'], rows_per_sec=stats['rows_per_sec'])
+        return stats
+
+    def _restore_batch(self, model, batch, stats, model_key=None):
+        stats['rows'] += len(batch)
+        rows = self._prepare_rows(model, batch, model_key)
+        rows = self._remap_foreign_keys(model, rows, model_key)
+        stats['skipped'] += len(batch) - len(rows)
+
+        id_map = self.id_maps[model]
+        to_update = [(id_map[original_id], data) for original_id, data in rows if original_id in id_map]
+        if to_update:
+            rows = [(original_id, data) for original_id, data in rows if original_id not in id_map]
+            self._update_rows(model, to_update)
+            stats['updated'] += len(to_update)
+
+        existing = self._match_existing(model, rows)
+        to_insert = []
+        for index, (original_id, data) in enumerate(rows):
+            if index in existing:
+                if original_id is not None:
+                    id_map[original_id] = existing[index]
+                stats['matched'] += 1
+            else:
+                to_insert.append((original_id, data))
+
+        if not to_insert:
+            return
+
+        with preserve_timestamps(model):
+            created = model._base_manager.using(self.using).bulk_create(
+                [model(**data) for _, data in to_insert],
+                batch_size=self.batch_size,
+            )
+        for (original_id, _), obj in zip(to_insert, created):
+            if original_id is not None:
+                id_map[original_id] = obj.pk
+        stats['inserted'] += len(created)
+
+        if self.send_signals:
+            for obj in created:
+                post_save.send(sender=model, instance=obj, created=True, raw=True, using=self.using)
+
+    def _update_rows(self, model, rows):
+        """Actualiza filas ya restauradas con los datos de un backup posterior."""
+        pk_attname = model._meta.pk.attname
+        fields = set.intersection(*(set(data) for _, data in rows)) - {pk_attname}
+        if not fields:
+            return
+        objs = []
+        for pk, data in rows:
+            obj = model(**data)
+            setattr(obj, pk_attname, pk)
+            objs.append(obj)
+        with preserve_timestamps(model):
+            model._base_manager.using(self.using).bulk_update(
+                objs, sorted(fields), batch_size=self.batch_size
+            )
+
+    def apply_tombstones(self, model_key, original_ids, values):
+        """
+        Marca como borradas (p. ej. eliminado=True) las filas restauradas
+        cuyos IDs originales figuran en `original_ids`.
+        """
+        model = get_model_for_key(model_key)
+        if model is None:
+            return 0
+        id_map = self.id_maps.get(model, {})
+        ids = [id_map[original_id] for original_id in original_ids if original_id in id_map]
+        if not ids:
+            return 0
+        return model._base_manager.using(self.using).filter(pk__in=ids).update(**values)
+
+    def _prepare_rows(self, model, batch, model_key=None):
+        """
+        Convierte los registros del backup en (id_original, campos). Se
+        ignoran las columnas que el modelo ya no tiene y se aceptan las
+        claves foráneas guardadas por nombre (formato anterior).
+        """
+        legacy = LEGACY_MODELS.get(model_key, {})
+        renames = legacy.get('renames', {})
+        values = legacy.get('values', {})
+        pk_attname = model._meta.pk.attname
+        attnames = {field.attname for field in model._meta.concrete_fields}
+        fk_names = {
+            field.name: field.attname for field in model._meta.concrete_fields
+            if field.is_relation
+        }
+        timestamp_fields = [
+            field.attname for field in model._meta.concrete_fields
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+        ]
+        now = timezone.now()
+
+        rows = []
+        for item in batch:
+            if renames:
+                item = {renames.get(key, key): value for key, value in item.items()}
+            data = {}
+            for key, value in item.items():
+                if key in attnames:
+                    data[key] = value
+                elif key in fk_names and fk_names[key] not in item:
+                    data[fk_names[key]] = value
+            data.update(values)
+            original_id = data.pop(pk_attname, None)
+            if original_id is None:
+                original_id = item.get('id')
+            for attname in timestamp_fields:
+                if data.get(attname) is None:
+                    data[attname] = now
+            rows.append((original_id, data))
+        return rows
+
+    def _remap_foreign_keys(self, model, rows, model_key=None):
+        """
+        Reasigna cada clave foránea del lote de una vez: con el mapeo de IDs
+        si el modelo relacionado se restauró, o verificando en una sola
+        consulta que los IDs existan si el modelo no está en el backup.
+        """
+        dropped = set()
+        for field in model._meta.concrete_fields:
+            if not field.is_relation or field.related_model is None:
+                continue
+            attname = field.attname
+            related_model = related_model_for(model_key, field)
+            values = {data[attname] for _, data in rows if data.get(attname) is not None}
+            if not values:
+                continue
+
+            if related_model in self.restored_models:
+                mapping = self.id_maps.get(related_model, {})
+            else:
+                # Modelos externos (tenant, usuarios): mapear el dueño y verificar el resto
+                mapping = dict(self.id_maps.get(related_model, {}))
+                target_field = field.target_field.attname
+                unknown = values - set(mapping)
+                if unknown:
+                    found = related_model._base_manager.using(self.using).filter(
+                        **{f'{target_field}__in': unknown}
+                    ).values_list(target_field, flat=True)
+                    mapping.update({value: value for value in found})
+
+            for index, (_, data) in enumerate(rows):
+                value = data.get(attname)
+                if value is None:
+                    continue
+                new_value = mapping.get(value)
+                if new_value is None and not field.null:
+                    dropped.add(index)
+                data[attname] = new_value
+
+        if dropped:
+            return [row for index, row in enumerate(rows) if index not in dropped]
+        return rows
+
+    def _unique_sets(self, model):
+        """Conjuntos de columnas únicas (sin la pk) del modelo."""
+        fields_by_name = {field.name: field for field in model._meta.concrete_fields}
+        unique_sets = [
+            (field.attname,) for field in model._meta.concrete_fields
+            if field.unique and not field.primary_key
+        ]
+        for names in model._meta.unique_together:
+            unique_sets.append(tuple(fields_by_name[name].attname for name in names))
+        for constraint in model._meta.constraints:
+            if isinstance(constraint, models.UniqueConstraint) and constraint.fields and constraint.condition is None:
+                unique_sets.append(tuple(fields_by_name[name].attname for name in constraint.fields))
+        return unique_sets
+
+    def _owner_scopes(self):
+        """Filtros de get_user_models con el pk de `owner` en lugar de F('pk')."""
+        scopes = {}
+        for app_label, model_name, filters in get_user_models():
+            try:
+                model = apps.get_model(app_label, model_name)
+            except LookupError:
+                continue
+            scopes[model] = {
+                lookup: self.owner.pk if isinstance(value, models.F) else value
+                for lookup, value in filters.items()
+            }
+        return scopes
+
+    def _match_existing(self, model, rows):
+        """
+        Devuelve {índice_en_el_lote: pk_existente} de las filas que ya
+        existen entre las del usuario que restaura. Los modelos sin filtro
+        de dueño no se emparejan: sus filas siempre se insertan.
+        """
+        existing = {}
+        scope = self.owner_scopes.get(model._meta.concrete_model)
+        if scope is None:
+            return existing
+        manager = model._base_manager.using(self.using).filter(**scope)
+        pk_attname = model._meta.pk.attname
+
+        for unique_set in self._unique_sets(model):
+            candidates = {}
+            for index, (_, data) in enumerate(rows):
+                if index in existing:
+                    continue
+                key = tuple(data.get(attname) for attname in unique_set)
+                if None not in key:
+                    candidates.setdefault(key, []).append(index)
+            if not candidates:
+                continue
+
+            if len(unique_set) == 1:
+                queryset = manager.filter(**{f'{unique_set[0]}__in': [key[0] for key in candidates]})
+            else:
+                condition = models.Q()
+                for key in candidates:
+                    condition |= models.Q(**dict(zip(unique_set, key)))
+                queryset = manager.filter(condition)
+
+            for values in queryset.values_list(*unique_set, pk_attname):
+                for index in candidates.get(tuple(values[:-1]), []):
+                    existing[index] = values[-1]
+        return existing
@@ -9,8 +9,8 @@ class BackupSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Backup
-        fields = ['id', 'user', 'user_id', 'username', 'email', 'tenant_id', 'created_at', 'status', 'file', 'size', 'description']
-        read_only_fields = ['id', 'user', 'user_id', 'username', 'email', 'tenant_id', 'created_at', 'status', 'file', 'size']
+        fields = ['id', 'user', 'user_id', 'username', 'email', 'tenant_id', 'created_at', 'status', 'mode', 'parent', 'progress', 'progress_detail', 'file', 'size', 'description']
+        read_only_fields = ['id', 'user', 'user_id', 'username', 'email', 'tenant_id', 'created_at', 'status', 'parent', 'progress', 'progress_detail', 'file', 'size']
 
 
 class BackupAdminSerializer(BackupSerializer):
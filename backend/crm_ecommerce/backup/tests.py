@@ -1,3 +1,303 @@
-from django.test import TestCase
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import RestrictedError
+from django.test import TestCase, override_settings
+
+from leads.models import Lead
+from tenants.models import Tenant
+from tienda.models import Categoria, Producto, Tienda
+from users.models import CustomUser
+
+from .backup_utils import serialize_instance, write_ndjson_backup
+from .models import Backup
+from .restore import RestoreEngine
+
+# ID del usuario en los backups de prueba (distinto del usuario que restaura)
+ID_ORIGINAL = 9000
+
+
+def crear_vendedor(nombre):
+    """Tenant y vendedor con la tienda que se le crea por defecto."""
+    tenant = Tenant.objects.create(name=nombre, schema_name=nombre, domain=f'{nombre}.example.com')
+    return CustomUser.objects.create_user(
+        username=f'vendedor_{nombre}',
+        email=f'vendedor@{nombre}.example.com',
+        password='clave-de-prueba',
+        role='vendedor',
+        tenant=tenant,
+    )
+
+
+def registro_tienda(vendedor, id_original=500, slug=None, tenant=None):
+    return {
+        'id': id_original,
+        'usuario': ID_ORIGINAL,
+        'tenant': (tenant or vendedor.tenant).pk,
+        'nombre': 'Tienda restaurada',
+        'slug': slug or vendedor.username,
+    }
+
+
+def registros_catalogo(id_tienda=500, categorias=3, productos=5, stock=4):
+    """Categorías y productos del backup; cada producto apunta a una categoría."""
+    return {
+        'tienda_Categoria': [
+            {'id': 100 + i, 'tienda': id_tienda, 'nombre': f'categoria {i}'}
+            for i in range(categorias)
+        ],
+        'tienda_Producto': [
+            {
+                'id': 200 + i,
+                'tienda': id_tienda,
+                'categoria': 100 + i % categorias,
+                'nombre': f'producto {i}',
+                'descripcion': '',
+                'precio': '10.00',
+                'stock': stock,
+            }
+            for i in range(productos)
+        ],
+    }
+
+
+class OrdenRestauracionTests(TestCase):
+    def test_restaura_los_padres_antes_que_los_hijos(self):
+        engine = RestoreEngine(crear_vendedor('orden'))
+
+        orden = [
+            model_key for model_key, _ in engine.restore_order([
+                'tienda_DetallePedido',
+                'tienda_Producto',
+                'tienda_Pedido',
+                'tienda_Categoria',
+                'tienda_Tienda',
+            ])
+        ]
+
+        posicion = {model_key: index for index, model_key in enumerate(orden)}
+        self.assertEqual(orden[0], 'tienda_Tienda')
+        self.assertLess(posicion['tienda_Categoria'], posicion['tienda_Producto'])
+        self.assertLess(posicion['tienda_Producto'], posicion['tienda_DetallePedido'])
+        self.assertLess(posicion['tienda_Pedido'], posicion['tienda_DetallePedido'])
+
+    def test_omite_las_claves_de_modelos_inexistentes(self):
+        engine = RestoreEngine(crear_vendedor('inexistente'))
+
+        orden = engine.restore_order(['tienda_Tienda', 'tienda_NoExiste'])
+
+        self.assertEqual([model_key for model_key, _ in orden], ['tienda_Tienda'])
+
+
+class RemapeoClavesForaneasTests(TestCase):
+    def test_reasigna_las_claves_foraneas_entre_lotes(self):
+        vendedor = crear_vendedor('lotes')
+        tienda = Tienda.objects.get(usuario=vendedor)
+        engine = RestoreEngine(vendedor, source_owner_id=ID_ORIGINAL, batch_size=2)
+
+        records = {'tienda_Tienda': [registro_tienda(vendedor)], **registros_catalogo()}
+        stats = engine.run(records)
+
+        self.assertEqual(stats['tienda_Tienda']['matched'], 1)
+        self.assertEqual(stats['tienda_Categoria']['inserted'], 3)
+        self.assertEqual(stats['tienda_Producto']['inserted'], 5)
+        productos = Producto.all_objects.filter(tienda=tienda).select_related('categoria')
+        self.assertEqual(
+            {producto.nombre: producto.categoria.nombre for producto in productos},
+            {f'producto {i}': f'categoria {i % 3}' for i in range(5)},
+        )
+        self.assertEqual({producto.categoria.tienda_id for producto in productos}, {tienda.pk})
+
+    def test_una_segunda_restauracion_actualiza_en_lugar_de_insertar(self):
+        vendedor = crear_vendedor('cadena')
+        engine = RestoreEngine(vendedor, source_owner_id=ID_ORIGINAL, batch_size=2)
+        engine.run({'tienda_Tienda': [registro_tienda(vendedor)], **registros_catalogo()})
+
+        stats = engine.run(registros_catalogo(stock=9))
+
+        self.assertEqual(stats['tienda_Producto']['inserted'], 0)
+        self.assertEqual(stats['tienda_Producto']['updated'], 5)
+        self.assertEqual(
+            set(Producto.all_objects.filter(tienda__usuario=vendedor).values_list('stock', flat=True)),
+            {9},
+        )
+
+
+class FilasExistentesTests(TestCase):
+    def test_empareja_la_tienda_del_usuario_que_restaura(self):
+        vendedor = crear_vendedor('propia')
+        tienda = Tienda.objects.get(usuario=vendedor)
+        engine = RestoreEngine(vendedor, source_owner_id=ID_ORIGINAL)
+
+        engine.run({'tienda_Tienda': [registro_tienda(vendedor)]})
+
+        self.assertEqual(engine.id_maps[Tienda], {500: tienda.pk})
+        self.assertEqual(Tienda.objects.filter(usuario=vendedor).count(), 1)
+
+    def test_empareja_los_leads_del_usuario_por_email(self):
+        vendedor = crear_vendedor('leads')
+        lead = Lead.objects.create(usuario=vendedor, nombre='Cliente', email='cliente@example.com')
+        total = Lead.objects.count()
+        engine = RestoreEngine(vendedor, source_owner_id=ID_ORIGINAL)
+
+        engine.run({'leads_Lead': [
+            {'id': 700, 'usuario': ID_ORIGINAL, 'nombre': 'Cliente', 'email': 'cliente@example.com'},
+        ]})
+
+        self.assertEqual(engine.id_maps[Lead], {700: lead.pk})
+        self.assertEqual(Lead.objects.count(), total)
+
+    def test_no_empareja_filas_de_otro_usuario(self):
+        vendedor = crear_vendedor('sin_tienda')
+        Tienda.objects.filter(usuario=vendedor).delete()
+        ajena = Tienda.objects.get(usuario=crear_vendedor('ajena'))
+        engine = RestoreEngine(vendedor, source_owner_id=ID_ORIGINAL)
+
+        existentes = engine._match_existing(
+            Tienda, [(500, {'usuario_id': vendedor.pk, 'tenant_id': ajena.tenant_id, 'slug': ajena.slug})]
+        )
+
+        self.assertEqual(existentes, {})
+
+    def test_un_slug_de_otro_usuario_no_recibe_los_datos_restaurados(self):
+        vendedor = crear_vendedor('restaura')
+        Tienda.objects.filter(usuario=vendedor).delete()
+        ajena = Tienda.objects.get(usuario=crear_vendedor('otra'))
+        engine = RestoreEngine(vendedor, source_owner_id=ID_ORIGINAL)
+
+        records = {
+            'tienda_Tienda': [registro_tienda(vendedor, slug=ajena.slug, tenant=ajena.tenant)],
+            **registros_catalogo(),
+        }
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                engine.run(records)
+
+        self.assertFalse(Producto.all_objects.filter(tienda=ajena).exists())
+        self.assertFalse(Categoria.objects.filter(tienda=ajena).exists())
+
+
+class MediaTemporalMixin:
+    """Guarda los archivos de los backups en un MEDIA_ROOT temporal."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def crear_backup(self, vendedor, records, **kwargs):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zipf:
+            zipf.writestr('metadata.json', json.dumps({'user': {'id': vendedor.pk}}))
+            for model_key, rows in records.items():
+                zipf.writestr(f'data/{model_key}.ndjson', ''.join(json.dumps(row) + '\n' for row in rows))
+        nombre = default_storage.save('backups/prueba.zip', ContentFile(buffer.getvalue()))
+        return Backup.objects.create(user=vendedor, file=nombre, **kwargs)
+
+
+class RestauracionAtomicaTests(MediaTemporalMixin, TestCase):
+
+    def test_un_error_deshace_todo_lo_restaurado(self):
+        vendedor = crear_vendedor('atomica')
+        tienda = Tienda.objects.get(usuario=vendedor)
+        records = registros_catalogo(id_tienda=tienda.pk)
+        # Un stock negativo viola la restricción de la columna al insertar los productos
+        records['tienda_Producto'][-1]['stock'] = -1
+        backup = self.crear_backup(vendedor, {'tienda_Tienda': [{'id': tienda.pk, 'usuario': vendedor.pk}], **records})
+
+        with self.assertRaises(ValueError):
+            backup.restore_backup()
+
+        self.assertFalse(Categoria.objects.filter(tienda=tienda).exists())
+        self.assertFalse(Producto.all_objects.filter(tienda=tienda).exists())
+        backup.refresh_from_db()
+        self.assertNotEqual(backup.status, 'completed')
+
+    def test_restaura_el_backup_completo(self):
+        vendedor = crear_vendedor('completa')
+        tienda = Tienda.objects.get(usuario=vendedor)
+        backup = self.crear_backup(vendedor, {
+            'tienda_Tienda': [{'id': tienda.pk, 'usuario': vendedor.pk}],
+            **registros_catalogo(id_tienda=tienda.pk),
+        })
+
+        backup.restore_backup()
+
+        self.assertEqual(Categoria.objects.filter(tienda=tienda).count(), 3)
+        self.assertEqual(Producto.all_objects.filter(tienda=tienda).count(), 5)
+        backup.refresh_from_db()
+        self.assertEqual(backup.status, 'completed')
+
+
+class BorradoCadenaTests(MediaTemporalMixin, TestCase):
+    def crear_cadena(self):
+        vendedor = crear_vendedor('borrado')
+        completo = self.crear_backup(vendedor, {})
+        incremental = self.crear_backup(vendedor, {}, mode='incremental', parent=completo)
+        siguiente = self.crear_backup(vendedor, {}, mode='incremental', parent=incremental)
+        return completo, incremental, siguiente
+
+    def test_borrar_un_completo_elimina_sus_incrementales_y_archivos(self):
+        cadena = self.crear_cadena()
+        archivos = [backup.file.name for backup in cadena]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cadena[0].delete()
+
+        self.assertFalse(Backup.objects.filter(pk__in=[backup.pk for backup in cadena]).exists())
+        for nombre in archivos:
+            self.assertFalse(default_storage.exists(nombre))
+
+    def test_borrar_un_incremental_conserva_los_anteriores(self):
+        completo, incremental, siguiente = self.crear_cadena()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            incremental.delete()
+
+        self.assertTrue(Backup.objects.filter(pk=completo.pk).exists())
+        self.assertTrue(default_storage.exists(completo.file.name))
+        self.assertFalse(Backup.objects.filter(pk=siguiente.pk).exists())
+
+    def test_el_borrado_masivo_no_deja_incrementales_huerfanos(self):
+        completo, _, _ = self.crear_cadena()
+
+        with self.assertRaises(RestrictedError):
+            Backup.objects.filter(pk=completo.pk).delete()
+
+
+class EscrituraNdjsonTests(TestCase):
+    def test_un_modelo_que_falla_no_deja_una_entrada_truncada(self):
+        vendedor = crear_vendedor('ndjson')
+        tienda = Tienda.objects.get(usuario=vendedor)
+        for i in range(3):
+            Producto.objects.create(tienda=tienda, nombre=f'producto {i}', descripcion='', precio='10.00', stock=1)
+        querysets = [
+            ('tienda_Tienda', Tienda.objects.filter(pk=tienda.pk)),
+            ('tienda_Producto', Producto.all_objects.filter(tienda=tienda)),
+        ]
+        llamadas = []
+
+        def serializar_con_error(obj):
+            llamadas.append(obj)
+            if len(llamadas) == 3:
+                raise RuntimeError('fallo de prueba')
+            return serialize_instance(obj)
+
+        buffer = io.BytesIO()
+        with mock.patch('backup.backup_utils.iter_backup_querysets', return_value=querysets), \
+                mock.patch('backup.backup_utils.serialize_instance', side_effect=serializar_con_error):
+            with zipfile.ZipFile(buffer, 'w') as zipf:
+                exported, _ = write_ndjson_backup(zipf, vendedor)
+
+        with zipfile.ZipFile(buffer) as zipf:
+            self.assertEqual(zipf.namelist(), ['data/tienda_Tienda.ndjson'])
+        self.assertEqual(list(exported), ['tienda_Tienda'])
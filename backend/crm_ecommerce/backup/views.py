@@ -76,18 +76,18 @@ class BackupViewSet(viewsets.ModelViewSet):
             # Usuario normal solo puede crear backups para sí mismo
             user = self.request.user
             
-        backup = serializer.save(
+        # Al guardarse se encola la generación del ZIP (ver Backup.save)
+        serializer.save(
             user=user,
             created_by=self.request.user,
             backup_type='admin' if (self.request.user.is_staff or self.request.user.has_perm('backup.can_manage_all_backups')) else 'manual'
         )
-        
-        # Generar el archivo ZIP
-        try:
-            backup.create_backup_zip()
-        except Exception as e:
-            backup.delete()  # Eliminar el backup si falla la creación del ZIP
-            raise e  # Propagar el error para que DRF lo maneje
+
+    def create(self, request, *args, **kwargs):
+        """Crear un backup; el archivo se genera en segundo plano"""
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
             
     def destroy(self, request, *args, **kwargs):
         """Eliminar un backup"""
@@ -98,10 +98,7 @@ class BackupViewSet(viewsets.ModelViewSet):
             if instance.user != request.user:
                 raise PermissionDenied("No tienes permiso para eliminar este backup")
                 
-            # Eliminar el archivo asociado si existe
-            if instance.file:
-                instance.file.delete(save=False)
-                
+            # Backup.delete elimina también los incrementales y sus archivos
             self.perform_destroy(instance)
             return Response(status=status.HTTP_204_NO_CONTENT)
             
@@ -120,9 +117,18 @@ class BackupViewSet(viewsets.ModelViewSet):
         if backup.user != request.user:
             raise PermissionDenied("Solo el usuario que creó el backup puede restaurarlo")
             
+        if not backup.file:
+            return Response(
+                {'error': 'El archivo de backup no existe'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         try:
-            backup.restore_backup()
-            return Response({'message': 'Backup restaurado exitosamente'})
+            job = backup.enqueue('restore', requested_by=request.user)
+            return Response(
+                {'message': 'Restauración en cola', 'job_id': job.id, 'backup_id': backup.id},
+                status=status.HTTP_202_ACCEPTED
+            )
         except Exception as e:
             return Response(
                 {'error': str(e)},
@@ -163,17 +169,12 @@ class BackupViewSet(viewsets.ModelViewSet):
                 description='Restauración manual'
             )
 
-            # Intentar restaurar el backup
-            try:
-                backup.restore_backup()
-                return Response(
-                    {'success': True, 'message': 'Restauración completada exitosamente'},
-                    status=status.HTTP_200_OK
-                )
-            except Exception as e:
-                # Si falla la restauración, eliminar el backup temporal
-                backup.delete()
-                raise e
+            # Encolar la restauración; el avance se consulta en /progress/
+            job = backup.enqueue('restore', requested_by=request.user)
+            return Response(
+                {'success': True, 'message': 'Restauración en cola', 'job_id': job.id, 'backup_id': backup.id},
+                status=status.HTTP_202_ACCEPTED
+            )
 
         except Exception as e:
             return Response(
@@ -181,6 +182,29 @@ class BackupViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=True, methods=['get'])
+    def progress(self, request, pk=None):
+        """Estado y avance del último trabajo de backup o restauración"""
+        backup = self.get_object()
+        job = backup.jobs.order_by('-created_at').first()
+
+        return Response({
+            'id': backup.id,
+            'status': backup.status,
+            'progress': backup.progress,
+            'progress_detail': backup.progress_detail,
+            'job': {
+                'id': job.id,
+                'kind': job.kind,
+                'status': job.status,
+                'attempts': job.attempts,
+                'error': job.error.splitlines()[0] if job.error else '',
+                'created_at': job.created_at,
+                'started_at': job.started_at,
+                'finished_at': job.finished_at,
+            } if job else None,
+        })
+
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
         """Descargar un backup específico"""
@@ -0,0 +1,114 @@
+"""
+Paginación por cursor (keyset) para los listados de mayor volumen.
+
+A diferencia de la paginación por página/offset, cada página se obtiene con
+un WHERE sobre la columna de orden (por ejemplo fecha_creacion < cursor) en
+lugar de un OFFSET, así el costo de pedir una página no crece con el tamaño
+de la tabla. El total de registros no se calcula salvo que se pida con
+?con_total=1, porque requiere un COUNT(*) sobre todo el listado; los enlaces
+next/previous no repiten ese parámetro, así el conteo se hace una sola vez.
+
+Respuesta: {"next": url|null, "previous": url|null, "results": [...]} y
+"count" cuando se pide el total.
+"""
+from rest_framework.pagination import CursorPagination as BaseCursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param
+
+VALORES_VERDADEROS = ('1', 'true', 'si', 'sí', 'yes')
+
+
+class CursorPagination(BaseCursorPagination):
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    count_query_param = 'con_total'
+
+    # Parámetro opcional para elegir el orden entre `allowed_orderings`
+    ordering_query_param = None
+    allowed_orderings = ()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.total = None
+        if request.query_params.get(self.count_query_param, '').lower() in VALORES_VERDADEROS:
+            self.total = queryset.order_by().count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        if self.ordering_query_param:
+            orden = request.query_params.get(self.ordering_query_param)
+            if orden in self.allowed_orderings:
+                return (orden,)
+        return super().get_ordering(request, queryset, view)
+
+    def get_next_link(self):
+        return self.sin_total(super().get_next_link())
+
+    def get_previous_link(self):
+        return self.sin_total(super().get_previous_link())
+
+    def sin_total(self, url):
+        if url is None:
+            return None
+        return remove_query_param(url, self.count_query_param)
+
+    def get_paginated_response(self, data):
+        respuesta = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.total is not None:
+            respuesta['count'] = self.total
+        return Response(respuesta)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {'type': 'integer', 'example': 123}
+        return response_schema
+
+
+class LeadCursorPagination(CursorPagination):
+    ordering = '-fecha_creacion'
+    page_size = 100
+    max_page_size = 500
+    ordering_query_param = 'orden'
+    allowed_orderings = (
+        '-fecha_creacion', 'fecha_creacion',
+        '-ultima_actualizacion', 'ultima_actualizacion',
+    )
+
+
+class ProductoCursorPagination(CursorPagination):
+    ordering = '-fecha_creacion'
+    page_size = 50
+    max_page_size = 200
+
+
+class PedidoCursorPagination(CursorPagination):
+    ordering = '-fecha_creacion'
+    page_size = 50
+    max_page_size = 200
+
+
+class PedidoPublicoCursorPagination(CursorPagination):
+    ordering = '-fecha_creacion'
+    page_size = 50
+    max_page_size = 200
+
+
+class AuditLogCursorPagination(CursorPagination):
+    ordering = '-created_at'
+    page_size = 100
+    max_page_size = 500
+
+
+class BusquedaPagination(PageNumberPagination):
+    """
+    Resultados de búsqueda ordenados por relevancia. La relevancia no es una
+    columna estable, así que se pagina por número de página; las búsquedas
+    rara vez pasan de las primeras páginas.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
@@ -49,6 +49,7 @@ os.makedirs(AUDIT_LOG_DIR, exist_ok=True, mode=0o750)
 AUDIT_MAX_LOG_SIZE = 20 * 1024 * 1024  # 20MB
 AUDIT_BACKUP_COUNT = 10
 AUDIT_RETENTION_DAYS = 90
+AUDIT_PARTITION_MONTHS_AHEAD = 3  # Particiones mensuales de AuditLog creadas por adelantado
 AUDIT_LOG_LEVEL = 'INFO'
 AUDIT_SIGNING_KEY = SECRET_KEY
 AUDIT_SIGNING_SALT = 'audit.log.salt'
@@ -67,6 +68,23 @@ AUDIT_SENSITIVE_FIELDS = [
     'card_number', 'cvv', 'expiry_date', 'ssn', 'dni'
 ]
 
+# Escritura de auditoría en segundo plano (audit_log/writer.py)
+AUDIT_ENABLE_ASYNC_WRITES = True
+AUDIT_BUFFER_MAX_SIZE = 10000
+AUDIT_BUFFER_BATCH_SIZE = 200
+AUDIT_BUFFER_FLUSH_INTERVAL_MS = 500
+AUDIT_BUFFER_OVERFLOW_POLICY = 'drop_oldest'  # drop_newest, drop_oldest, sync
+
+# Reglas de auditoría de lecturas (audit_log/rules.py). Las mutaciones
+# siempre se registran; los GET se agregan en contadores por minuto.
+AUDIT_READ_POLICY = 'aggregate'  # all, sample, aggregate, none
+AUDIT_READ_SAMPLE_RATE = 0.05
+AUDIT_EXCLUDED_PATHS = [
+    r'/public_products/', r'/public_store/', r'/public_categories/',
+    r'/estilos-publicos/', r'^/api/audit-logs/',
+]
+AUDIT_PATH_RULES = []
+
 # Configuración de rotación de logs
 import datetime
 LOG_ROTATION_WHEN = 'midnight'
@@ -79,6 +97,10 @@ LOG_ROTATION_AT_TIME = datetime.time(0, 0)  # Medianoche
 LOG_DIR = os.path.join(BASE_DIR, 'logs')
 os.makedirs(LOG_DIR, exist_ok=True, mode=0o750)
 
+# Logging estructurado de las rutas de mayor tráfico (crm_ecommerce/structured_logging.py)
+STRUCTURED_LOG_LEVEL = 'INFO'  # Nivel de los loggers que lo usan (tienda)
+STRUCTURED_LOG_SAMPLE_RATE = 1.0  # Fracción de eventos DEBUG/INFO que se escriben
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -93,6 +115,9 @@ LOGGING = {
             'format': '%(asctime)s - %(levelname)s - %(message)s',
             'datefmt': '%Y-%m-%d %H:%M:%S',
         },
+        'json': {
+            '()': 'crm_ecommerce.structured_logging.JSONLinesFormatter',
+        },
     },
     'filters': {
         'require_debug_false': {
@@ -136,6 +161,14 @@ LOGGING = {
             'atTime': LOG_ROTATION_AT_TIME,
             'formatter': 'audit',
         },
+        'structured_file': {
+            'level': 'DEBUG',
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': os.path.join(LOG_DIR, 'structured.log'),
+            'maxBytes': 1024 * 1024 * 5,  # 5 MB
+            'backupCount': 5,
+            'formatter': 'json',
+        },
         'mail_admins': {
             'level': 'ERROR',
             'class': 'django.utils.log.AdminEmailHandler',
@@ -154,6 +187,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'tienda': {
+            'handlers': ['console', 'structured_file'],
+            'level': STRUCTURED_LOG_LEVEL,
+            'propagate': False,
+        },
     },
 }
 
@@ -167,6 +205,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'users',
@@ -231,6 +270,10 @@ DATABASES = {
         'PASSWORD': 'admin',
         'HOST': 'localhost',
         'PORT': '5432',
+        # Conexiones persistentes; tenants.utils.set_schema recuerda el schema
+        # activo de cada conexión para no repetir SET search_path.
+        'CONN_MAX_AGE': int(os.getenv('DJANGO_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
         'OPTIONS': {
             'options': '-c search_path=public',
         },
@@ -243,6 +286,15 @@ DATABASE_SCHEMAS = {
     'default': 'public',
 }
 
+# Segundos que un tenant permanece en el caché de resolución del middleware
+TENANT_CACHE_TTL = 300
+
+# Segundos que se reutiliza el resumen de LeadViewSet.metricas por tenant
+LEAD_METRICS_CACHE_TTL = 30
+
+# Interacciones recientes incluidas por lead en el listado de leads
+LEAD_LIST_INTERACCIONES = 3
+
 # Configuración de migraciones
 MIGRATION_MODULES = {
     'tenants': 'tenants.migrations',
@@ -295,7 +347,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Reutiliza el usuario ya autenticado por TenantMiddleware
+        'tenants.authentication.TenantJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',  # Cambiado a AllowAny por defecto
@@ -321,11 +374,37 @@ SIMPLE_JWT = {
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
 
+from corsheaders.defaults import default_headers
+
+# El checkout envía Idempotency-Key (ComprasTiendaPublica/idempotency.py)
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+
 import os
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Configuración de backups
+BACKUP_EXPORT_CHUNK_SIZE = 2000  # Filas por consulta al exportar cada modelo
+BACKUP_TEMP_DIR = None  # Directorio del archivo temporal del ZIP (None: el del sistema)
+BACKUP_PROGRESS_UPDATE_INTERVAL = 1.0  # Segundos mínimos entre escrituras de progreso
+BACKUP_JOB_STALE_MINUTES = 60  # Un trabajo 'running' sin terminar tras este tiempo se reintenta
+BACKUP_JOB_MAX_ATTEMPTS = 3  # Intentos antes de marcar un trabajo abandonado como fallido
+BACKUP_RESTORE_BATCH_SIZE = 1000  # Filas por lote al restaurar cada modelo
+BACKUP_RESTORE_SEND_SIGNALS = False  # Enviar post_save por cada fila restaurada
+BACKUP_INCREMENTAL_OVERLAP_SECONDS = 60  # Margen al exportar cambios desde el backup anterior
+BACKUP_FULL_EVERY = 7  # Respaldos programados por cadena antes de volver a uno completo
+BACKUP_MEDIA_STORE = True  # Guardar los archivos multimedia una sola vez por hash fuera de cada ZIP
+
+# Caché de la API pública de la tienda (tienda/storefront.py). Con varios
+# workers conviene un caché compartido (Redis) en CACHES['default'].
+STOREFRONT_CACHE_TTL = 300  # Segundos que se guarda cada respuesta renderizada
+STOREFRONT_MAX_AGE = 60  # max-age enviado a navegadores y CDN
+
+# Claves de idempotencia del checkout y de los leads de la tienda
+IDEMPOTENCY_KEY_TTL_HOURS = 24  # Horas que se guarda la respuesta de cada clave
+IDEMPOTENCY_LOCK_TIMEOUT_SECONDS = 60  # Una clave en proceso por más tiempo se considera abandonada
+
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000", # Asegúrate que es tu puerto frontend
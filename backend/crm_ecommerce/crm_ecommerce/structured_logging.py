@@ -0,0 +1,153 @@
+"""
+Logging estructurado para las rutas de mayor tráfico: un evento con nombre
+y campos en lugar de mensajes armados con f-strings.
+
+    log = get_logger(__name__)
+    log.info('tienda.config', tienda_id=tienda.pk, datos=lambda: request.data)
+
+- Si el nivel está desactivado la llamada solo cuesta logger.isEnabledFor():
+  no se arma ningún texto.
+- Los campos que son callables (p. ej. lambda: serializer.data) se evalúan
+  recién cuando un handler escribe el evento.
+- Los eventos DEBUG e INFO se muestrean con STRUCTURED_LOG_SAMPLE_RATE (o
+  sample_rate=... en la llamada); WARNING y superiores se escriben siempre.
+- Las claves que contienen alguno de AUDIT_SENSITIVE_FIELDS (password,
+  token, authorization...) se escriben como '***', también dentro de
+  diccionarios y listas.
+
+JSONLinesFormatter escribe cada registro como una línea JSON (fecha, nivel,
+logger, evento y campos). Con otros formatters el mensaje es el JSON del
+evento.
+"""
+import json
+import logging
+import random
+from collections.abc import Mapping
+
+from django.conf import settings
+
+MASK = '***'
+
+# Fracción de eventos DEBUG/INFO que se escriben (1.0: todos)
+SAMPLE_RATE = getattr(settings, 'STRUCTURED_LOG_SAMPLE_RATE', 1.0)
+
+# Claves cuyo valor nunca se escribe (las mismas que enmascara la auditoría)
+SENSITIVE_FIELDS = tuple(
+    field.lower() for field in getattr(settings, 'AUDIT_SENSITIVE_FIELDS', [
+        'password', 'token', 'api_key', 'secret', 'authorization'
+    ])
+)
+
+
+def is_sensitive(key):
+    key = str(key).lower()
+    return any(field in key for field in SENSITIVE_FIELDS)
+
+
+def redact(value):
+    """Copia de `value` con los valores de las claves sensibles reemplazados por '***'."""
+    if isinstance(value, Mapping):
+        return {
+            str(key): MASK if is_sensitive(key) else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [redact(item) for item in value]
+    return value
+
+
+class LogEvent:
+    """
+    Mensaje de un evento. Los campos se evalúan, enmascaran y serializan la
+    primera vez que un handler lo formatea, y el resultado se reutiliza en
+    los demás handlers.
+    """
+    __slots__ = ('event', 'fields', '_data', '_json')
+
+    def __init__(self, event, fields):
+        self.event = event
+        self.fields = fields
+        self._data = None
+        self._json = None
+
+    def data(self):
+        if self._data is None:
+            data = {'event': self.event}
+            for key, value in self.fields.items():
+                if is_sensitive(key):
+                    data[key] = MASK
+                    continue
+                if callable(value):
+                    try:
+                        value = value()
+                    except Exception as e:
+                        value = f"<error: {e}>"
+                data[key] = redact(value)
+            self._data = data
+        return self._data
+
+    def __str__(self):
+        if self._json is None:
+            self._json = json.dumps(self.data(), default=str, ensure_ascii=False)
+        return self._json
+
+
+class StructuredLogger:
+    """Envuelve un logging.Logger para escribir eventos (ver el docstring del módulo)."""
+
+    def __init__(self, name, sample_rate=None):
+        self.logger = logging.getLogger(name)
+        self.sample_rate = SAMPLE_RATE if sample_rate is None else sample_rate
+
+    def isEnabledFor(self, level):
+        return self.logger.isEnabledFor(level)
+
+    def _log(self, level, event, fields, exc_info=False):
+        if not self.logger.isEnabledFor(level):
+            return
+        sample_rate = fields.pop('sample_rate', None)
+        if sample_rate is None:
+            sample_rate = self.sample_rate
+        if level < logging.WARNING and sample_rate < 1 and random.random() >= sample_rate:
+            return
+        # stacklevel=3: el registro apunta a quien llamó a info(), warning()...
+        self.logger.log(level, LogEvent(event, fields), exc_info=exc_info, stacklevel=3)
+
+    def debug(self, event, **fields):
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event, **fields):
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event, **fields):
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event, **fields):
+        self._log(logging.ERROR, event, fields)
+
+    def exception(self, event, **fields):
+        """Como error(), con el traceback de la excepción en curso."""
+        self._log(logging.ERROR, event, fields, exc_info=True)
+
+
+def get_logger(name, sample_rate=None):
+    return StructuredLogger(name, sample_rate=sample_rate)
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """Formatea cada registro como una línea JSON."""
+
+    def format(self, record):
+        if isinstance(record.msg, LogEvent):
+            data = record.msg.data()
+        else:
+            data = {'event': record.getMessage()}
+        line = {
+            'ts': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            **data,
+        }
+        if record.exc_info:
+            line['exc'] = self.formatException(record.exc_info)
+        return json.dumps(line, default=str, ensure_ascii=False)
@@ -0,0 +1,88 @@
+"""
+Métricas del pipeline de leads para el dashboard del CRM.
+
+resumen_leads() calcula todo el resumen con una sola consulta de
+agregación condicional (COUNT ... FILTER por estado), y MetricasCache lo
+guarda por tenant durante unos segundos porque el dashboard consulta el
+endpoint periódicamente.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from .models import Lead
+
+# Días sin actualización tras los cuales un lead deja de contarse como activo
+DIAS_LEAD_ACTIVO = 30
+
+
+def resumen_leads(tenant):
+    """Resumen del pipeline de leads de `tenant` en una sola consulta."""
+    agregados = {
+        'total_leads': Count('id'),
+        'valor_total_pipeline': Sum('valor_estimado'),
+        'leads_activos': Count('id', filter=Q(
+            ultima_actualizacion__gte=timezone.now() - timedelta(days=DIAS_LEAD_ACTIVO)
+        )),
+        'valor_total_compras': Sum('valor_total_compras'),
+        'promedio_compras': Avg('valor_total_compras'),
+    }
+    for estado, _ in Lead.ESTADOS:
+        agregados[f'estado_{estado}'] = Count('id', filter=Q(estado=estado))
+
+    fila = Lead.objects.filter(tenant=tenant).order_by().aggregate(**agregados)
+
+    return {
+        'total_leads': fila['total_leads'],
+        'leads_por_estado': {
+            estado: fila[f'estado_{estado}']
+            for estado, _ in Lead.ESTADOS
+        },
+        'valor_total_pipeline': fila['valor_total_pipeline'] or 0,
+        'leads_activos': fila['leads_activos'],
+        'valor_total_compras': fila['valor_total_compras'] or 0,
+        'promedio_compras': fila['promedio_compras'] or 0,
+    }
+
+
+class MetricasCache:
+    """
+    Caché local al proceso del resumen de leads por tenant, con expiración (TTL).
+
+    Se invalida desde las señales de guardado/borrado de Lead. Los demás
+    workers, y las actualizaciones masivas que no emiten señales, se reflejan
+    cuando vence el TTL.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'LEAD_METRICS_CACHE_TTL', 30)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, tenant):
+        """Obtiene el resumen del caché o lo calcula si expiró."""
+        tenant_id = tenant.pk if tenant is not None else None
+        entry = self._entries.get(tenant_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        metricas = resumen_leads(tenant)
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[tenant_id] = (time.monotonic() + self.ttl, metricas)
+        return metricas
+
+    def invalidate(self, tenant_id=None):
+        """Invalida el resumen de un tenant, o todos si no se indica id."""
+        with self._lock:
+            if tenant_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(tenant_id, None)
+
+
+metricas_cache = MetricasCache()
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0003_alter_lead_usuario'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['usuario', 'ultima_actualizacion'], name='lead_usuario_actualiz_idx'),
+        ),
+    ]
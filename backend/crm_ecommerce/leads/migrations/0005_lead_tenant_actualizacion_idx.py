@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-17 16:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0004_lead_usuario_actualizacion_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='lead',
+            name='lead_usuario_actualiz_idx',
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['tenant', 'ultima_actualizacion'], name='lead_tenant_actualiz_idx'),
+        ),
+    ]
@@ -4,6 +4,31 @@ from tenants.models import Tenant
 
 User = get_user_model()
 
+
+class LeadQuerySet(models.QuerySet):
+    def con_ultima_interaccion(self):
+        """
+        Anota tipo, fecha y descripción de la última interacción de cada lead
+        con subconsultas, sin una consulta adicional por lead.
+        """
+        ultima = InteraccionLead.objects.filter(lead=models.OuterRef('pk')).order_by('-fecha')
+        return self.annotate(
+            ultima_interaccion_tipo=models.Subquery(ultima.values('tipo')[:1]),
+            ultima_interaccion_fecha=models.Subquery(ultima.values('fecha')[:1]),
+            ultima_interaccion_descripcion=models.Subquery(ultima.values('descripcion')[:1]),
+        )
+
+    def con_interacciones(self, limite=None):
+        """
+        Precarga las interacciones de los leads. Con `limite` solo trae las
+        últimas `limite` de cada lead (Django lo resuelve con ROW_NUMBER()).
+        """
+        interacciones = InteraccionLead.objects.order_by('-fecha')
+        if limite is not None:
+            interacciones = interacciones[:limite]
+        return self.prefetch_related(models.Prefetch('interacciones', queryset=interacciones))
+
+
 class Lead(models.Model):
     ESTADOS = [
         ('nuevo', 'Nuevo'),
@@ -39,9 +64,15 @@ class Lead(models.Model):
     ultima_compra = models.DateTimeField(null=True, blank=True)
     frecuencia_compra = models.IntegerField(default=0)  # días entre compras
 
+    objects = LeadQuerySet.as_manager()
+
     class Meta:
         ordering = ['-fecha_creacion']
         unique_together = ('usuario', 'email')
+        indexes = [
+            # Leads del tenant por fecha de actualización (leads_activos)
+            models.Index(fields=['tenant', 'ultima_actualizacion'], name='lead_tenant_actualiz_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre} - {self.estado}"
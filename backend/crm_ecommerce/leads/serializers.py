@@ -27,6 +27,16 @@ class LeadSerializer(serializers.ModelSerializer):
         return dict(Lead.ESTADOS).get(obj.estado, obj.estado)
 
     def get_ultima_interaccion(self, obj):
+        # Anotada por LeadQuerySet.con_ultima_interaccion()
+        if hasattr(obj, 'ultima_interaccion_fecha'):
+            if obj.ultima_interaccion_fecha is None:
+                return None
+            return {
+                'tipo': obj.ultima_interaccion_tipo,
+                'fecha': obj.ultima_interaccion_fecha,
+                'descripcion': obj.ultima_interaccion_descripcion
+            }
+
         ultima = obj.interacciones.first()
         if ultima:
             return {
@@ -41,4 +51,17 @@ class LeadSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request and hasattr(request, 'user') and hasattr(request.user, 'tenant'):
             validated_data['tenant'] = request.user.tenant
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+class LeadListSerializer(LeadSerializer):
+    """
+    Versión compacta para listados: en lugar del historial completo incluye
+    `interacciones_recientes`, las últimas interacciones precargadas con
+    LeadQuerySet.con_interacciones(limite). El detalle usa LeadSerializer.
+    """
+    interacciones_recientes = InteraccionLeadSerializer(source='interacciones', many=True, read_only=True)
+
+    class Meta(LeadSerializer.Meta):
+        fields = [
+            field for field in LeadSerializer.Meta.fields if field != 'interacciones'
+        ] + ['interacciones_recientes']
@@ -1,13 +1,22 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from .models import Lead, InteraccionLead
+from .metrics import metricas_cache
 from ComprasTiendaPublica.models import PedidoPublico
 from UsersTiendaPublica.models import UsersTiendaPublica
 from tienda.models import Tienda
 
 User = get_user_model()
 
+@receiver(post_save, sender=Lead)
+@receiver(post_delete, sender=Lead)
+def invalidar_metricas_leads(sender, instance, **kwargs):
+    """
+    Invalida el resumen de métricas del tenant del lead guardado o eliminado.
+    """
+    metricas_cache.invalidate(instance.tenant_id)
+
 @receiver(post_save, sender=User)
 def crear_lead_desde_usuario(sender, instance, created, **kwargs):
     if created:
@@ -3,31 +3,53 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
-from django.db.models import Sum
 from django.utils import timezone
 from django.db import transaction
 from django.db.models import Count, Q
 from django.contrib.auth import get_user_model
-from tenants.utils import get_current_tenant, set_current_tenant
+from tenants.utils import get_current_tenant, set_current_tenant, set_schema
 
 from .models import Lead, InteraccionLead
-from .serializers import LeadSerializer, InteraccionLeadSerializer
+from .metrics import metricas_cache
+from .serializers import LeadSerializer, LeadListSerializer, InteraccionLeadSerializer
 from users.permissions import IsCRMManager, IsMarketingReadOnly
 from users.permissions import IsMarketing
 from rest_framework.exceptions import ValidationError
+from django.conf import settings
+from crm_ecommerce.pagination import LeadCursorPagination
+from ComprasTiendaPublica.idempotency import idempotente
+
+# Interacciones recientes incluidas por lead en los listados
+LEAD_LIST_INTERACCIONES = getattr(settings, 'LEAD_LIST_INTERACCIONES', 3)
 
 
 class LeadViewSet(viewsets.ModelViewSet):
     serializer_class = LeadSerializer
     queryset = Lead.objects.all()
     permission_classes = [IsAuthenticated, IsCRMManager | IsMarketingReadOnly]
+    pagination_class = LeadCursorPagination
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'leads_recientes', 'leads_activos'):
+            return LeadListSerializer
+        return LeadSerializer
+
+    def optimizar(self, queryset):
+        """Precarga las interacciones que usa el serializer de la acción actual."""
+        queryset = queryset.con_ultima_interaccion()
+        if self.get_serializer_class() is LeadListSerializer:
+            return queryset.con_interacciones(limite=LEAD_LIST_INTERACCIONES)
+        return queryset.con_interacciones()
 
     def get_queryset(self):
         tenant = get_current_tenant()
-        queryset = Lead.objects.filter(tenant=tenant)
+        queryset = self.optimizar(Lead.objects.filter(tenant=tenant))
         estado = self.request.query_params.get('estado', None)
         if estado:
             queryset = queryset.filter(estado=estado)
+        q = self.request.query_params.get('q', '').strip()
+        if q:
+            queryset = queryset.filter(Q(nombre__icontains=q) | Q(email__icontains=q))
         orden = self.request.query_params.get('orden', '-fecha_creacion')
         if orden:
             queryset = queryset.order_by(orden)
@@ -51,45 +73,24 @@ class LeadViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def metricas(self, request):
-        tenant = get_current_tenant()
-        leads = Lead.objects.filter(tenant=tenant)
-        
-        return Response({
-            'total_leads': leads.count(),
-            'leads_por_estado': {
-                estado: leads.filter(estado=estado).count()
-                for estado, _ in Lead.ESTADOS
-            },
-            'valor_total_pipeline': leads.aggregate(
-                total=Sum('valor_estimado')
-            )['total'] or 0,
-            'leads_activos': leads.filter(
-                ultima_actualizacion__gte=timezone.now() - timezone.timedelta(days=30)
-            ).count(),
-            'valor_total_compras': leads.aggregate(
-                total=Sum('valor_total_compras')
-            )['total'] or 0,
-            'promedio_compras': leads.aggregate(
-                promedio=Sum('valor_total_compras') / leads.count()
-            )['promedio'] or 0
-        })
+        return Response(metricas_cache.get(get_current_tenant()))
     
     @action(detail=False, methods=['get'])
     def leads_recientes(self, request):
         tenant = get_current_tenant()
-        leads = Lead.objects.filter(
+        leads = self.optimizar(Lead.objects.filter(
             tenant=tenant
-        ).order_by('-fecha_creacion')[:5]
+        )).order_by('-fecha_creacion')[:5]
         
         return Response(self.get_serializer(leads, many=True).data)
     
     @action(detail=False, methods=['get'])
     def leads_activos(self, request):
         tenant = get_current_tenant()
-        leads = Lead.objects.filter(
+        leads = self.optimizar(Lead.objects.filter(
             tenant=tenant,
             ultima_actualizacion__gte=timezone.now() - timezone.timedelta(days=30)
-        ).order_by('-ultima_actualizacion')
+        )).order_by('-ultima_actualizacion')
         
         return Response(self.get_serializer(leads, many=True).data)
     
@@ -208,10 +209,11 @@ class CrearLeadDesdeTiendaView(APIView):
         response = Response(status=200)
         response['Access-Control-Allow-Origin'] = '*'
         response['Access-Control-Allow-Methods'] = 'POST, OPTIONS'
-        response['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Requested-With'
+        response['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Requested-With, Idempotency-Key'
         response['Access-Control-Max-Age'] = '86400'  # 24 hours
         return response
 
+    @idempotente('lead_tienda')
     def post(self, request):
         data = request.data
         
@@ -235,8 +237,7 @@ class CrearLeadDesdeTiendaView(APIView):
                 set_current_tenant(tenant)
             else:
                 # Si no hay tenant, usamos el esquema público
-                from django.db import connection
-                connection.set_schema('public')
+                set_schema('public')
                 tenant = None
             
             # Verificar si ya existe un lead con este email
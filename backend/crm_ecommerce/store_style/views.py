@@ -11,6 +11,7 @@ from rest_framework.permissions import AllowAny
 from django.db import transaction
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
+from tienda.storefront import respuesta_publica
 
 class StoreStyleViewSet(viewsets.ModelViewSet):
     """
@@ -95,22 +96,25 @@ class StoreStyleViewSet(viewsets.ModelViewSet):
 @api_view(['GET', 'PATCH'])
 @permission_classes([AllowAny])
 def estilo_publico(request, slug):
-    print("🔍 Entró a estilo_publico con slug:", slug)  # <--- agregado
+    if request.method == 'GET':
+        def build():
+            tienda = Tienda.objects.get(slug=slug, publicado=True)
+            estilo, _ = StoreStyle.objects.get_or_create(tienda=tienda)
+            return StoreStyleSerializer(estilo).data
+
+        try:
+            return respuesta_publica(request, slug, 'estilo', build)
+        except Tienda.DoesNotExist:
+            return Response({"error": "Tienda no encontrada o no publicada"}, status=404)
 
     try:
         tienda = Tienda.objects.get(slug=slug, publicado=True)
     except Tienda.DoesNotExist:
-        print("❌ Tienda no encontrada:", slug)
         return Response({"error": "Tienda no encontrada o no publicada"}, status=404)
 
     estilo, _ = StoreStyle.objects.get_or_create(tienda=tienda)
-    print("✅ Estilo encontrado o creado para tienda:", tienda.nombre)
 
-    if request.method == 'GET':
-        serializer = StoreStyleSerializer(estilo)
-        return Response(serializer.data)
-
-    elif request.method == 'PATCH':
+    if request.method == 'PATCH':
         bloques_data = request.data.pop("bloques_bienvenida", None)
         serializer = StoreStyleSerializer(estilo, data=request.data, partial=True)
 
@@ -143,21 +147,22 @@ def estilo_publico(request, slug):
             return Response(serializer.data)
         return Response(serializer.errors, status=400)
 
-   
+
 
 class PublicStoreWithStyleView(APIView):
     """
     Vista pública que retorna los datos generales y estilo de una tienda por su slug.
     """
     def get(self, request, slug):
+        def build():
+            tienda = Tienda.objects.select_related('style').prefetch_related('style__bloques').get(slug=slug)
+            return StorePublicSerializer(tienda).data
+
         try:
-            tienda = Tienda.objects.get(slug=slug)
+            return respuesta_publica(request, slug, 'tienda_estilo', build)
         except Tienda.DoesNotExist:
             return Response({"detail": "Tienda no encontrada"}, status=status.HTTP_404_NOT_FOUND)
 
-        serializer = StorePublicSerializer(tienda)
-        return Response(serializer.data)
-
 
 class BloqueBienvenidaViewSet(viewsets.ModelViewSet):
     """
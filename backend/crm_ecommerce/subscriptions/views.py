@@ -7,7 +7,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from tenants.utils import set_schema, get_schema_name
+from tenants.utils import schema_context
 from .models import Plan, Subscription
 from .serializers import PlanSerializer, SubscriptionSerializer
 
@@ -145,16 +145,10 @@ class SimulatePaymentView(APIView):
             )
         
         try:
-            # Cambiar al esquema público para buscar el plan
-            current_schema = get_schema_name()
-            set_schema('public')
-            plan = Plan.objects.get(id=plan_id, is_active=True)
-            # Volver al esquema del tenant
-            set_schema(current_schema)
+            # Buscar el plan en el esquema público y volver al del tenant
+            with schema_context('public'):
+                plan = Plan.objects.get(id=plan_id, is_active=True)
         except Plan.DoesNotExist:
-            # Asegurarse de volver al esquema original en caso de error
-            if 'current_schema' in locals():
-                set_schema(current_schema)
             return Response(
                 {'error': 'Plan no encontrado o inactivo'},
                 status=status.HTTP_404_NOT_FOUND
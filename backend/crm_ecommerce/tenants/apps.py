@@ -5,4 +5,5 @@ class TenantsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tenants'
 
- 
\ No newline at end of file
+    def ready(self):
+        from . import signals  # noqa
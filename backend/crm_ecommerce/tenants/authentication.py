@@ -0,0 +1,18 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .resolver import REQUEST_AUTH_ATTR
+
+
+class TenantJWTAuthentication(JWTAuthentication):
+    """
+    Autenticación JWT que reutiliza el usuario ya resuelto por TenantMiddleware.
+
+    Si el middleware no autenticó el request (token inválido o ausente), se
+    comporta igual que JWTAuthentication.
+    """
+
+    def authenticate(self, request):
+        auth_tuple = getattr(request._request, REQUEST_AUTH_ATTR, None)
+        if auth_tuple is not None:
+            return auth_tuple
+        return super().authenticate(request)
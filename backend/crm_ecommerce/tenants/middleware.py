@@ -1,71 +1,65 @@
-from django.db import connection
-from django.conf import settings
-from .models import Tenant
-from .utils import set_schema, set_current_tenant, get_current_tenant
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.contrib.auth import get_user_model
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from .utils import set_schema, set_current_tenant, reset_current_tenant
+from .resolver import TenantResolver
 import logging
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
 logger = logging.getLogger(__name__)
-User = get_user_model()
 
 class TenantMiddleware:
+    """
+    Resuelve el tenant del request a partir del token JWT.
+
+    El token se decodifica una sola vez y el usuario autenticado queda
+    disponible para DRF (ver tenants.authentication.TenantJWTAuthentication).
+    El tenant se obtiene de un caché local al proceso y se guarda en un
+    ContextVar que se restaura al terminar el request, tanto en WSGI como
+    en ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
-        self.jwt_auth = JWTAuthentication()
+        self.resolver = TenantResolver()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        # Lista de rutas que no requieren tenant
-        public_paths = [
-            '/api/subscriptions/plans/public/',
-        ]
-        # Intentar obtener el usuario autenticado
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        tenant = self.resolve_tenant(request)
+        token = set_current_tenant(tenant)
+        try:
+            return self.get_response(request)
+        finally:
+            reset_current_tenant(token)
+
+    async def __acall__(self, request):
+        # La autenticación y el SET search_path usan la base de datos
+        tenant = await sync_to_async(self.resolve_tenant)(request)
+        token = set_current_tenant(tenant)
+        try:
+            return await self.get_response(request)
+        finally:
+            reset_current_tenant(token)
+
+    def resolve_tenant(self, request):
+        """Obtiene el tenant del request y cambia la conexión a su schema."""
+        tenant = None
         try:
-            # Verificar si hay un token en el header
-            auth_header = request.headers.get('Authorization', '')
-            logger.info(f"Auth header recibido: {auth_header}")
-            
-            if auth_header.startswith('Bearer '):
-                try:
-                    # Obtener el usuario del token
-                    auth_tuple = self.jwt_auth.authenticate(request)
-                    if auth_tuple is not None:
-                        user, _ = auth_tuple
-                        logger.info(f"Usuario autenticado: {user.username}")
-                        
-                        # Verificar si el usuario tiene un tenant asignado
-                        if hasattr(user, 'tenant') and user.tenant:
-                            logger.info(f"Tenant encontrado: {user.tenant.name}")
-                            request.tenant = user.tenant
-                            set_current_tenant(user.tenant)
-                            set_schema(user.tenant.schema_name)
-                        else:
-                            logger.warning(f"Usuario {user.username} no tiene tenant asignado")
-                            request.tenant = None
-                            set_current_tenant(None)
-                            set_schema('public')
-                except (InvalidToken, TokenError) as e:
-                    logger.error(f"Error de token: {str(e)}")
-                    request.tenant = None
-                    set_current_tenant(None)
-                    set_schema('public')
-                except Exception as e:
-                    logger.error(f"Error al autenticar: {str(e)}")
-                    request.tenant = None
-                    set_current_tenant(None)
-                    set_schema('public')
-            else:
-                logger.info("No se encontró token Bearer en el header")
-                request.tenant = None
-                set_current_tenant(None)
-                set_schema('public')
-                
+            auth_tuple = self.resolver.authenticate(request)
+            if auth_tuple is not None:
+                user, _ = auth_tuple
+                tenant = self.resolver.get_tenant_for_user(user)
+                if tenant is None:
+                    logger.warning(f"Usuario {user.username} no tiene tenant asignado")
+        except (InvalidToken, TokenError) as e:
+            logger.error(f"Error de token: {str(e)}")
         except Exception as e:
-            logger.error(f"Error en TenantMiddleware: {str(e)}")
-            request.tenant = None
-            set_current_tenant(None)
-            set_schema('public')
+            logger.error(f"Error al autenticar: {str(e)}")
 
-        response = self.get_response(request)
-        return response 
\ No newline at end of file
+        request.tenant = tenant
+        set_schema(tenant.schema_name if tenant else 'public')
+        return tenant
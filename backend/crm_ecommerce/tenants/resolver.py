@@ -0,0 +1,88 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .models import Tenant
+
+# Atributo del request donde se guarda el resultado de la autenticación JWT
+# para que DRF lo reutilice sin volver a decodificar el token.
+REQUEST_AUTH_ATTR = '_tenant_auth'
+
+
+class TenantCache:
+    """
+    Caché local al proceso de tenants por id, con expiración (TTL).
+
+    Se invalida desde las señales de guardado/borrado de Tenant. Como es local
+    al proceso, los demás workers ven el cambio cuando vence el TTL.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'TENANT_CACHE_TTL', 300)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, tenant_id):
+        """Obtiene el tenant del caché o de la base de datos si expiró."""
+        if tenant_id is None:
+            return None
+
+        entry = self._entries.get(tenant_id)
+        if entry is not None and entry[0] > time.monotonic():
+            tenant = entry[1]
+        else:
+            tenant = Tenant.objects.filter(pk=tenant_id).first()
+            with self._lock:
+                self._entries[tenant_id] = (time.monotonic() + self.ttl, tenant)
+
+        # Cada request recibe su propia copia para no compartir relaciones
+        # cacheadas (por ejemplo tenant.subscription) entre requests.
+        return copy.copy(tenant) if tenant is not None else None
+
+    def invalidate(self, tenant_id=None):
+        """Invalida un tenant o todo el caché si no se indica id."""
+        with self._lock:
+            if tenant_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(tenant_id, None)
+
+
+tenant_cache = TenantCache()
+
+
+class TenantResolver:
+    """
+    Resuelve el usuario y el tenant de un request con una sola decodificación
+    del token JWT y una sola consulta del usuario.
+    """
+
+    def __init__(self, cache=None):
+        self.jwt_auth = JWTAuthentication()
+        self.cache = cache or tenant_cache
+
+    def authenticate(self, request):
+        """
+        Autentica el request y guarda el resultado en el request para que
+        TenantJWTAuthentication lo reutilice en la vista.
+        """
+        if hasattr(request, REQUEST_AUTH_ATTR):
+            return getattr(request, REQUEST_AUTH_ATTR)
+
+        # Los errores de token se propagan y no se guardan, así DRF vuelve a
+        # evaluar el token y responde 401 como antes.
+        auth_tuple = self.jwt_auth.authenticate(request)
+        setattr(request, REQUEST_AUTH_ATTR, auth_tuple)
+        return auth_tuple
+
+    def get_tenant_for_user(self, user):
+        """Obtiene el tenant del usuario desde el caché, sin consultar user.tenant."""
+        tenant = self.cache.get(getattr(user, 'tenant_id', None))
+        if tenant is not None:
+            # Deja la relación cacheada en el usuario para que request.user.tenant
+            # no dispare otra consulta.
+            user.tenant = tenant
+        return tenant
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Tenant
+from .resolver import tenant_cache
+
+
+@receiver(post_save, sender=Tenant)
+@receiver(post_delete, sender=Tenant)
+def invalidar_cache_tenant(sender, instance, **kwargs):
+    """
+    Invalida el tenant en el caché de resolución cuando se guarda o elimina.
+    """
+    tenant_cache.invalidate(instance.pk)
@@ -1,9 +1,24 @@
-from django.db import connection
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import connection, connections, DEFAULT_DB_ALIAS
+from django.db.backends.signals import connection_created
 from django.conf import settings
 from .models import Tenant
-from threading import local
 
-_thread_locals = local()
+# Tenant del request actual. Un ContextVar queda aislado por hilo y también
+# por tarea asyncio, así que funciona tanto con WSGI como con ASGI.
+_current_tenant = ContextVar('current_tenant', default=None)
+
+# Atributo del wrapper de conexión donde se recuerda el schema activo.
+# Con CONN_MAX_AGE la conexión se reutiliza entre requests, así que solo se
+# emite SET search_path cuando el schema realmente cambia.
+_SCHEMA_ATTR = '_tenant_schema'
+
+def _reset_schema_tracking(sender, connection, **kwargs):
+    """Una conexión nueva no tiene schema conocido hasta el primer SET."""
+    setattr(connection, _SCHEMA_ATTR, None)
+
+connection_created.connect(_reset_schema_tracking, dispatch_uid='tenants_reset_schema_tracking')
 
 def create_schema(schema_name):
     """Crea un nuevo schema en la base de datos."""
@@ -15,21 +30,76 @@ def delete_schema(schema_name):
     with connection.cursor() as cursor:
         cursor.execute(f'DROP SCHEMA IF EXISTS {schema_name} CASCADE')
 
-def set_schema(schema_name):
-    """Establece el schema actual para la conexión."""
-    with connection.cursor() as cursor:
+def set_schema(schema_name, using=DEFAULT_DB_ALIAS):
+    """
+    Establece el schema actual para la conexión.
+
+    No emite SQL si la conexión ya está en ese schema. Dentro de una
+    transacción el cambio puede revertirse con un rollback, por eso allí
+    siempre se ejecuta y el schema queda como desconocido.
+    """
+    conn = connections[using]
+    if (
+        conn.connection is not None
+        and not conn.in_atomic_block
+        and getattr(conn, _SCHEMA_ATTR, None) == schema_name
+    ):
+        return
+
+    with conn.cursor() as cursor:
         cursor.execute(f'SET search_path TO {schema_name}, public')
+    setattr(conn, _SCHEMA_ATTR, None if conn.in_atomic_block else schema_name)
 
-def get_schema_name():
+def get_schema_name(using=DEFAULT_DB_ALIAS):
     """Obtiene el nombre del schema actual."""
-    with connection.cursor() as cursor:
+    conn = connections[using]
+    schema_name = getattr(conn, _SCHEMA_ATTR, None)
+    if conn.connection is not None and schema_name is not None:
+        return schema_name
+
+    with conn.cursor() as cursor:
         cursor.execute('SHOW search_path')
-        return cursor.fetchone()[0]
+        search_path = cursor.fetchone()[0]
+    schema_name = search_path.split(',')[0].strip().strip('"')
+    if not conn.in_atomic_block:
+        setattr(conn, _SCHEMA_ATTR, schema_name)
+    return schema_name
+
+@contextmanager
+def schema_context(schema_name, using=DEFAULT_DB_ALIAS):
+    """
+    Cambia temporalmente de schema y restaura el anterior al salir,
+    incluso si ocurre una excepción.
+    """
+    previous_schema = get_schema_name(using)
+    set_schema(schema_name, using)
+    try:
+        yield
+    finally:
+        set_schema(previous_schema, using)
 
 def set_current_tenant(tenant):
-    """Establece el tenant actual en el thread local."""
-    _thread_locals.tenant = tenant
+    """
+    Establece el tenant actual en el contexto de ejecución.
+
+    Devuelve un token que se puede pasar a reset_current_tenant para
+    restaurar el valor anterior.
+    """
+    return _current_tenant.set(tenant)
+
+def reset_current_tenant(token):
+    """Restaura el tenant que había antes de set_current_tenant."""
+    _current_tenant.reset(token)
 
 def get_current_tenant():
-    """Obtiene el tenant actual del thread local."""
-    return getattr(_thread_locals, 'tenant', None) 
\ No newline at end of file
+    """Obtiene el tenant actual del contexto de ejecución."""
+    return _current_tenant.get()
+
+@contextmanager
+def tenant_context(tenant):
+    """Usa temporalmente otro tenant como tenant actual."""
+    token = set_current_tenant(tenant)
+    try:
+        yield tenant
+    finally:
+        reset_current_tenant(token)
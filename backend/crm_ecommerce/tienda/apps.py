@@ -8,3 +8,4 @@ class LeadsConfig(AppConfig):
     def ready(self):
         if not any(cmd in sys.argv for cmd in ['makemigrations', 'migrate', 'collectstatic', 'test']):
             import leads.signals
+            import tienda.signals
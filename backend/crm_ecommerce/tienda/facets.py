@@ -0,0 +1,104 @@
+"""
+Filtros por facetas del catálogo público: categoría, rango de precio y
+disponibilidad, con la cantidad de productos de cada opción.
+
+Los conteos son disyuntivos: los de cada faceta se calculan con los filtros
+de las demás facetas pero no con el propio, así el cliente puede mostrar
+cuántos productos habría al cambiar de opción. Se resuelven con dos
+consultas (GROUP BY por categoría y un aggregate con COUNT ... FILTER para
+precios y stock) que usan el índice (tienda, eliminado, categoria, precio),
+y se guardan en el caché de la tienda pública por versión de la tienda.
+"""
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .search import buscar_productos
+
+# (clave, desde, hasta): productos con desde <= precio < hasta; hasta None sin límite
+RANGOS_PRECIO = getattr(settings, 'CATALOG_PRICE_RANGES', [
+    ('0-25', 0, 25),
+    ('25-50', 25, 50),
+    ('50-100', 50, 100),
+    ('100+', 100, None),
+])
+
+
+def filtro_rango_precio(clave):
+    """Q del rango de precio `clave`, o None si no es un rango conocido."""
+    for rango, desde, hasta in RANGOS_PRECIO:
+        if rango == clave:
+            filtro = Q(precio__gte=desde)
+            if hasta is not None:
+                filtro &= Q(precio__lt=hasta)
+            return filtro
+    return None
+
+
+class FiltrosCatalogo:
+    """Filtros de facetas pedidos por el cliente."""
+
+    def __init__(self, categoria=None, precio=None, en_stock=None):
+        self.categoria = categoria
+        self.precio = precio
+        self.en_stock = en_stock
+
+    def q(self, excluir=None):
+        """Filtros combinados, sin los de la faceta `excluir`."""
+        filtro = Q()
+        if self.categoria is not None and excluir != 'categoria':
+            filtro &= Q(categoria_id=self.categoria)
+        if self.precio and excluir != 'precio':
+            filtro &= filtro_rango_precio(self.precio)
+        if self.en_stock is not None and excluir != 'stock':
+            filtro &= Q(stock__gt=0) if self.en_stock else Q(stock=0)
+        return filtro
+
+    def clave(self):
+        return f'{self.categoria}|{self.precio}|{self.en_stock}'
+
+
+def contar_facetas(productos, filtros):
+    """
+    Conteos por faceta de `productos` (el catálogo de la tienda, ya filtrado
+    por la búsqueda de texto si la hay).
+    """
+    categorias = (
+        productos.filter(filtros.q(excluir='categoria'))
+        .order_by()
+        .values('categoria_id', 'categoria__nombre')
+        .annotate(cantidad=Count('id'))
+        .order_by('categoria__nombre')
+    )
+
+    sin_precio = filtros.q(excluir='precio')
+    sin_stock = filtros.q(excluir='stock')
+    agregados = {
+        f'precio_{rango}': Count('id', filter=sin_precio & filtro_rango_precio(rango))
+        for rango, _, _ in RANGOS_PRECIO
+    }
+    agregados['en_stock'] = Count('id', filter=sin_stock & Q(stock__gt=0))
+    agregados['agotado'] = Count('id', filter=sin_stock & Q(stock=0))
+    conteos = productos.order_by().aggregate(**agregados)
+
+    return {
+        'categorias': [
+            {'id': fila['categoria_id'], 'nombre': fila['categoria__nombre'], 'cantidad': fila['cantidad']}
+            for fila in categorias
+        ],
+        'precios': [
+            {'rango': rango, 'desde': desde, 'hasta': hasta, 'cantidad': conteos[f'precio_{rango}']}
+            for rango, desde, hasta in RANGOS_PRECIO
+        ],
+        'stock': {'en_stock': conteos['en_stock'], 'agotado': conteos['agotado']},
+    }
+
+
+def filtrar_catalogo(tienda, texto='', filtros=None):
+    """
+    Devuelve (productos filtrados, base para los conteos). La base solo
+    tiene aplicada la búsqueda de texto; los filtros de facetas se aplican
+    sobre ella.
+    """
+    filtros = filtros or FiltrosCatalogo()
+    base = buscar_productos(tienda, texto)
+    return base.filter(filtros.q()), base
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-17 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0005_alter_producto_descripcion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['tienda', 'fecha_actualizacion'], name='producto_tienda_actualiz_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['tienda', 'fecha_actualizacion'], name='pedido_tienda_actualiz_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-17 14:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Mantiene producto.search_vector: nombre con peso A y descripción con peso B,
+# con el diccionario español (stemming y palabras vacías).
+TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION tienda_producto_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('spanish', coalesce(NEW.nombre, '')), 'A') ||
+        setweight(to_tsvector('spanish', coalesce(NEW.descripcion, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tienda_producto_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF nombre, descripcion ON tienda_producto
+    FOR EACH ROW EXECUTE FUNCTION tienda_producto_search_vector_update();
+
+UPDATE tienda_producto SET search_vector =
+    setweight(to_tsvector('spanish', coalesce(nombre, '')), 'A') ||
+    setweight(to_tsvector('spanish', coalesce(descripcion, '')), 'B');
+"""
+
+REVERSE_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS tienda_producto_search_vector_trigger ON tienda_producto;
+DROP FUNCTION IF EXISTS tienda_producto_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0006_producto_pedido_actualizacion_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='producto',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(TRIGGER_SQL, REVERSE_TRIGGER_SQL),
+        migrations.AddIndex(
+            model_name='producto',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='producto_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['nombre'], name='producto_nombre_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
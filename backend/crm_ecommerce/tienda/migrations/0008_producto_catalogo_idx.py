@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0007_producto_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['tienda', 'eliminado', 'categoria', 'precio'], name='producto_catalogo_idx'),
+        ),
+    ]
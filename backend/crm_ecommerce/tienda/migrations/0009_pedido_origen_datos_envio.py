@@ -0,0 +1,67 @@
+# Generated by Django 5.2 on 2026-10-17 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0008_producto_catalogo_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedido',
+            name='origen',
+            field=models.CharField(choices=[('crm', 'CRM'), ('tienda_publica', 'Tienda pública')], default='crm', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='pedido',
+            name='metodo_pago',
+            field=models.CharField(choices=[('efectivo', 'Efectivo'), ('tarjeta', 'Tarjeta de Crédito/Débito'), ('transferencia', 'Transferencia Bancaria'), ('qr', 'Pago con QR'), ('paypal', 'PayPal'), ('stripe', 'Stripe'), ('credit_card', 'Tarjeta de Crédito'), ('debit_card', 'Tarjeta de Débito'), ('bank_transfer', 'Transferencia Bancaria'), ('cash', 'Efectivo'), ('crypto', 'Criptomonedas')], max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='pedido',
+            name='codigo_seguimiento',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='nombre',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='apellido',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='ci',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='ciudad',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='provincia',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='referencia',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='correo',
+            field=models.EmailField(blank=True, max_length=254),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['tienda', 'origen', 'fecha_creacion'], name='pedido_tienda_origen_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 # tienda/models.py
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from users.models import CustomUser
 from tenants.models import Tenant
 from django.db.models.signals import post_save
@@ -84,6 +86,9 @@ class Producto(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     eliminado = models.BooleanField(default=False)
+    # Mantenido por un trigger de la base de datos (migración 0007) a partir
+    # de nombre y descripción; ver tienda/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
     
     objects = ProductoManager()  # Filtra automáticamente los productos no eliminados
     all_objects = models.Manager()  # Para acceder a todos los productos, incluyendo eliminados
@@ -92,6 +97,15 @@ class Producto(models.Model):
         ordering = ['-fecha_creacion']
         verbose_name = 'Producto'
         verbose_name_plural = 'Productos'
+        indexes = [
+            # Backups incrementales: cambios por tienda desde una fecha
+            models.Index(fields=['tienda', 'fecha_actualizacion'], name='producto_tienda_actualiz_idx'),
+            # Búsqueda de texto completo y por similitud en la tienda pública
+            GinIndex(fields=['search_vector'], name='producto_search_vector_idx'),
+            GinIndex(fields=['nombre'], name='producto_nombre_trgm_idx', opclasses=['gin_trgm_ops']),
+            # Catálogo público filtrado por facetas (ver tienda/facets.py)
+            models.Index(fields=['tienda', 'eliminado', 'categoria', 'precio'], name='producto_catalogo_idx'),
+        ]
 
     def __str__(self):
         return self.nombre
@@ -125,13 +139,34 @@ class Pedido(models.Model):
         ('cancelado', 'Cancelado'),
     ]
 
+    # Además de los métodos del CRM, la tienda pública guarda el pago con QR
+    # y el payment_type del método de pago elegido (payments.PaymentMethod)
     METODO_PAGO_CHOICES = [
         ('efectivo', 'Efectivo'),
         ('tarjeta', 'Tarjeta de Crédito/Débito'),
         ('transferencia', 'Transferencia Bancaria'),
+        ('qr', 'Pago con QR'),
+        ('paypal', 'PayPal'),
+        ('stripe', 'Stripe'),
+        ('credit_card', 'Tarjeta de Crédito'),
+        ('debit_card', 'Tarjeta de Débito'),
+        ('bank_transfer', 'Transferencia Bancaria'),
+        ('cash', 'Efectivo'),
+        ('crypto', 'Criptomonedas'),
+    ]
+
+    # Origen del pedido: creado desde el CRM o comprado en la tienda pública.
+    # Los pedidos de la tienda pública se leen con el proxy
+    # ComprasTiendaPublica.PedidoPublico.
+    ORIGEN_CRM = 'crm'
+    ORIGEN_TIENDA_PUBLICA = 'tienda_publica'
+    ORIGEN_CHOICES = [
+        (ORIGEN_CRM, 'CRM'),
+        (ORIGEN_TIENDA_PUBLICA, 'Tienda pública'),
     ]
 
     tienda = models.ForeignKey(Tienda, on_delete=models.CASCADE, related_name='pedidos')
+    origen = models.CharField(max_length=20, choices=ORIGEN_CHOICES, default=ORIGEN_CRM)
     cliente = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='pedidos', null=True, blank=True)
     cliente_tienda_publica = models.ForeignKey('UsersTiendaPublica.UsersTiendaPublica', on_delete=models.CASCADE, related_name='pedidos_tienda', null=True, blank=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
@@ -140,12 +175,27 @@ class Pedido(models.Model):
     total = models.DecimalField(max_digits=10, decimal_places=2)
     direccion_entrega = models.TextField()
     telefono = models.CharField(max_length=20)
-    metodo_pago = models.CharField(max_length=20, choices=METODO_PAGO_CHOICES)
+    # La tienda pública acepta los métodos de pago configurados por cada tienda
+    metodo_pago = models.CharField(max_length=50, choices=METODO_PAGO_CHOICES)
     notas = models.TextField(blank=True)
-    codigo_seguimiento = models.CharField(max_length=50, blank=True, null=True)
+    codigo_seguimiento = models.CharField(max_length=100, blank=True, null=True)
+
+    # Datos de envío que completa el comprador en la tienda pública
+    nombre = models.CharField(max_length=100, blank=True)
+    apellido = models.CharField(max_length=100, blank=True)
+    ci = models.CharField(max_length=20, blank=True)
+    ciudad = models.CharField(max_length=50, blank=True)
+    provincia = models.CharField(max_length=50, blank=True)
+    referencia = models.TextField(blank=True)
+    correo = models.EmailField(blank=True)
 
     class Meta:
         ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['tienda', 'fecha_actualizacion'], name='pedido_tienda_actualiz_idx'),
+            # Listados y reportes de ventas por tienda, origen y fecha
+            models.Index(fields=['tienda', 'origen', 'fecha_creacion'], name='pedido_tienda_origen_idx'),
+        ]
 
     def __str__(self):
         if self.cliente:
@@ -0,0 +1,49 @@
+"""
+Búsqueda de productos de la tienda pública.
+
+Combina la búsqueda de texto completo de PostgreSQL sobre
+Producto.search_vector (nombre con peso A y descripción con peso B,
+diccionario español, mantenido por un trigger) con similitud de trigramas
+sobre el nombre, que tolera errores de tipeo y palabras incompletas. Ambas
+condiciones usan índices GIN (ver la migración 0007).
+"""
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import F, Q
+
+from .models import Producto
+
+# Diccionario de texto completo usado en el trigger y en las consultas
+SEARCH_CONFIG = 'spanish'
+
+# Peso de la similitud de trigramas del nombre frente al rango de texto completo
+TRIGRAM_WEIGHT = getattr(settings, 'PRODUCT_SEARCH_TRIGRAM_WEIGHT', 0.5)
+
+
+def buscar_productos(tienda, texto='', categoria=None, precio_min=None, precio_max=None):
+    """
+    Productos de `tienda` que coinciden con `texto`, ordenados por relevancia.
+    Sin texto devuelve los productos filtrados, más nuevos primero.
+    """
+    productos = Producto.objects.filter(tienda=tienda).select_related('categoria')
+    if categoria is not None:
+        productos = productos.filter(categoria_id=categoria)
+    if precio_min is not None:
+        productos = productos.filter(precio__gte=precio_min)
+    if precio_max is not None:
+        productos = productos.filter(precio__lte=precio_max)
+
+    texto = (texto or '').strip()
+    if not texto:
+        return productos.order_by('-fecha_creacion', '-id')
+
+    consulta = SearchQuery(texto, config=SEARCH_CONFIG, search_type='websearch')
+    return (
+        productos
+        .filter(Q(search_vector=consulta) | Q(nombre__trigram_similar=texto))
+        .annotate(relevancia=(
+            SearchRank(F('search_vector'), consulta)
+            + TRIGRAM_WEIGHT * TrigramSimilarity('nombre', texto)
+        ))
+        .order_by('-relevancia', '-id')
+    )
@@ -1,8 +1,8 @@
 from rest_framework import serializers
 from .models import Tienda, Categoria, Producto, DetallePedido, Pedido, NotificacionPedido
-import logging
+from crm_ecommerce.structured_logging import get_logger
 
-logger = logging.getLogger(__name__)
+log = get_logger(__name__)
 
 class TiendaSerializer(serializers.ModelSerializer):
     logo = serializers.ImageField(required=False, allow_null=True)
@@ -33,66 +33,46 @@ class TiendaSerializer(serializers.ModelSerializer):
         return instance
 
     def validate_publicado(self, value):
-        logger.info(f"Validando campo publicado: {value}")
         if isinstance(value, str):
-            result = value.lower() == 'true'
-            logger.info(f"Convertido de string a booleano: {result}")
-            return result
-        logger.info(f"Valor booleano directo: {bool(value)}")
+            return value.lower() == 'true'
         return bool(value)
 
     def validate(self, data):
-        logger.info("="*50)
-        logger.info("INICIO DE VALIDACIÓN")
-        logger.info(f"Datos a validar: {data}")
+        log.debug('tienda.validacion', datos=data)
         
         # Validar que el nombre no esté vacío
         if 'nombre' in data:
-            logger.info(f"Validando nombre: {data['nombre']}")
             if not data['nombre'].strip():
-                logger.warning("Nombre está vacío")
+                log.warning('tienda.validacion.nombre_vacio')
                 raise serializers.ValidationError({'nombre': 'El nombre no puede estar vacío'})
         
         # Validar que la descripción no sea demasiado larga
         if 'descripcion' in data:
-            logger.info(f"Validando descripción (longitud: {len(data['descripcion'])})")
             if len(data['descripcion']) > 500:
-                logger.warning("Descripción demasiado larga")
+                log.warning('tienda.validacion.descripcion_larga', longitud=len(data['descripcion']))
                 raise serializers.ValidationError({'descripcion': 'La descripción no puede tener más de 500 caracteres'})
         
         # Validar los colores
         color_fields = ['color_primario', 'color_secundario', 'color_texto', 'color_fondo']
         for field in color_fields:
             if field in data and data[field]:
-                logger.info(f"Validando color {field}: {data[field]}")
                 if not data[field].startswith('#'):
                     data[field] = f"#{data[field]}"
-                    logger.info(f"Color {field} actualizado: {data[field]}")
         
-        logger.info("Validación completada exitosamente")
-        logger.info("="*50)
         return data
 
     def to_representation(self, instance):
-        logger.info("="*50)
-        logger.info("INICIO DE REPRESENTACIÓN")
-        logger.info(f"Instancia a representar: {instance}")
-        
+        # Se llama por cada tienda de un listado: sin logging
         data = super().to_representation(instance)
-        logger.info(f"Datos base: {data}")
         
         # Asegurarse de que el campo publicado sea un booleano
         data['publicado'] = bool(data['publicado'])
-        logger.info(f"Campo publicado convertido: {data['publicado']}")
         
         # Asegurarse de que los campos opcionales no sean None
         for field in ['descripcion', 'tema', 'color_primario', 'color_secundario', 'color_texto', 'color_fondo']:
             if data[field] is None:
-                logger.info(f"Campo {field} es None, estableciendo como vacío")
                 data[field] = ''
         
-        logger.info(f"Datos finales: {data}")
-        logger.info("="*50)
         return data
 
 class CategoriaSerializer(serializers.ModelSerializer):
@@ -110,17 +90,12 @@ class ProductoSerializer(serializers.ModelSerializer):
             'stock', 'categoria', 'categoria_nombre', 'imagen'
         ]
 
-    def validate_stock(self, value):
-        logger.info(f"Debug - Stock recibido en serializer: {value}")
-        logger.info(f"Debug - Tipo de dato del stock: {type(value)}")
-        return value
-
     def create(self, validated_data):
-        logger.info(f"Debug - Creando producto con datos: {validated_data}")
+        log.debug('producto.crear', datos=validated_data)
         return super().create(validated_data)
 
     def update(self, instance, validated_data):
-        logger.info(f"Debug - Actualizando producto {instance.id} con datos: {validated_data}")
+        log.debug('producto.actualizar', producto_id=instance.pk, datos=validated_data)
         return super().update(instance, validated_data)
 
 class DetallePedidoSerializer(serializers.ModelSerializer):
@@ -164,9 +139,9 @@ class PedidoSerializer(serializers.ModelSerializer):
             'id', 'cliente', 'cliente_nombre', 'fecha_creacion', 'fecha_actualizacion',
             'estado', 'estado_display', 'total', 'direccion_entrega', 'telefono',
             'metodo_pago', 'metodo_pago_display', 'notas', 'codigo_seguimiento',
-            'detalles', 'tienda_nombre'  # Asegúrate de incluir aquí
+            'detalles', 'tienda_nombre', 'origen'  # Asegúrate de incluir aquí
         ]
-        read_only_fields = ['total']
+        read_only_fields = ['total', 'origen']
 
 
 class NotificacionPedidoSerializer(serializers.ModelSerializer):
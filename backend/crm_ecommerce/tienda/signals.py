@@ -0,0 +1,39 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from store_style.models import StoreStyle, BloqueBienvenida
+from .models import Tienda, Categoria, Producto
+from .storefront import storefront_cache
+
+
+@receiver(post_save, sender=Tienda)
+@receiver(post_delete, sender=Tienda)
+def invalidar_tienda_publica(sender, instance, **kwargs):
+    """
+    Invalida las respuestas públicas cacheadas de la tienda guardada o eliminada.
+    """
+    storefront_cache.invalidate(instance.slug)
+
+
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Producto)
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+@receiver(post_save, sender=StoreStyle)
+@receiver(post_delete, sender=StoreStyle)
+def invalidar_catalogo_publico(sender, instance, **kwargs):
+    """
+    Invalida la tienda pública cuando cambia su catálogo o su estilo.
+    """
+    slug = Tienda.objects.filter(pk=instance.tienda_id).values_list('slug', flat=True).first()
+    storefront_cache.invalidate(slug)
+
+
+@receiver(post_save, sender=BloqueBienvenida)
+@receiver(post_delete, sender=BloqueBienvenida)
+def invalidar_bloques_publicos(sender, instance, **kwargs):
+    """
+    Invalida la tienda pública cuando cambian sus bloques de bienvenida.
+    """
+    slug = Tienda.objects.filter(style__pk=instance.style_id).values_list('slug', flat=True).first()
+    storefront_cache.invalidate(slug)
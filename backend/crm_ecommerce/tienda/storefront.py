@@ -0,0 +1,121 @@
+"""
+Caché de la API pública de la tienda (catálogo, categorías y estilo).
+
+Las respuestas de los endpoints públicos se guardan ya renderizadas en el
+caché de Django, con una clave por slug de tienda, recurso y versión. Cada
+slug tiene un número de versión que cambia cuando se guarda o elimina un
+Producto, Categoria, Tienda, StoreStyle o BloqueBienvenida de esa tienda
+(ver tienda/signals.py); las entradas de la versión anterior quedan sin uso
+y vencen con el TTL.
+
+Cada respuesta lleva un ETag fuerte (SHA-256 del contenido) y Cache-Control
+público, así el navegador o un CDN pueden revalidar con If-None-Match y
+recibir un 304 sin cuerpo.
+
+Con el caché local por defecto (LocMemCache) la versión es local al
+proceso: los demás workers ven los cambios cuando vence
+STOREFRONT_CACHE_TTL. Con un caché compartido (Redis, Memcached) la
+invalidación es inmediata en todos.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+# Alias de CACHES usado para la tienda pública
+CACHE_ALIAS = getattr(settings, 'STOREFRONT_CACHE_ALIAS', 'default')
+
+# Segundos que una respuesta renderizada permanece en el caché del servidor
+CACHE_TTL = getattr(settings, 'STOREFRONT_CACHE_TTL', 300)
+
+# max-age enviado a navegadores y CDN
+MAX_AGE = getattr(settings, 'STOREFRONT_MAX_AGE', 60)
+
+
+class StorefrontCache:
+    """Respuestas públicas renderizadas por slug de tienda, con invalidación por versión."""
+
+    prefix = 'storefront'
+
+    def __init__(self, alias=None, ttl=None):
+        self.alias = alias or CACHE_ALIAS
+        self.ttl = ttl if ttl is not None else CACHE_TTL
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _version_key(self, slug):
+        return f'{self.prefix}:version:{slug}'
+
+    def version(self, slug):
+        """Versión actual del contenido de la tienda."""
+        key = self._version_key(slug)
+        version = self.cache.get(key)
+        if version is None:
+            # Una versión nueva (y no 1) evita reutilizar entradas viejas si
+            # la clave de versión se desalojó del caché
+            version = time.time_ns()
+            if not self.cache.add(key, version, timeout=None):
+                version = self.cache.get(key, version)
+        return version
+
+    def invalidate(self, slug):
+        """Cambia la versión de la tienda: sus respuestas cacheadas dejan de usarse."""
+        if slug:
+            self.cache.set(self._version_key(slug), time.time_ns(), timeout=None)
+
+    def get_or_set(self, slug, recurso, build, variante=''):
+        """
+        Devuelve el valor cacheado del recurso para la versión actual de la
+        tienda, o lo calcula con build() y lo guarda.
+        """
+        key = f'{self.prefix}:{slug}:{recurso}:{variante}:{self.version(slug)}'
+        value = self.cache.get(key)
+        if value is None:
+            value = build()
+            if self.ttl > 0:
+                self.cache.set(key, value, timeout=self.ttl)
+        return value
+
+    def get_or_build(self, slug, recurso, build, variante=''):
+        """
+        Devuelve (etag, contenido) del recurso de la tienda. Si no está en el
+        caché llama a build(), que devuelve los datos a serializar (o lanza
+        la excepción que corresponda, por ejemplo Tienda.DoesNotExist).
+        """
+        def render():
+            contenido = JSONRenderer().render(build())
+            return (f'"{hashlib.sha256(contenido).hexdigest()}"', contenido)
+
+        return self.get_or_set(slug, recurso, render, variante)
+
+
+storefront_cache = StorefrontCache()
+
+
+def respuesta_publica(request, slug, recurso, build, variante=''):
+    """
+    Respuesta JSON cacheada de un recurso público de la tienda, con ETag y
+    Cache-Control. Devuelve 304 si el cliente ya tiene la misma versión.
+
+    Las URLs absolutas (logo, imágenes) dependen del host, por eso el host
+    forma parte de la clave junto con `variante` (por ejemplo los parámetros
+    de una búsqueda).
+    """
+    variante = hashlib.sha256(f'{request.get_host()}|{variante}'.encode()).hexdigest()[:32]
+    etag, contenido = storefront_cache.get_or_build(slug, recurso, build, variante=variante)
+
+    etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    if etag in etags or etags == ['*']:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(contenido, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=MAX_AGE)
+    return response
@@ -1,3 +1,6 @@
+import hashlib
+from decimal import Decimal, InvalidOperation
+
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -6,14 +9,20 @@ from .models import Tienda, Categoria, Producto, CarritoItem, Pedido, Notificaci
 from .serializers import TiendaSerializer, CategoriaSerializer, ProductoSerializer, PedidoSerializer, NotificacionPedidoSerializer
 from users.models import CustomUser
 from tenants.utils import get_current_tenant
-import logging
+from crm_ecommerce.structured_logging import get_logger
 from django.utils.text import slugify
 from rest_framework.exceptions import ValidationError
 from users.permissions import IsSeller
 from users.permissions import IsStockManager
 from rest_framework import serializers 
+from crm_ecommerce.pagination import ProductoCursorPagination, PedidoCursorPagination, BusquedaPagination
+from .storefront import respuesta_publica, storefront_cache
+from .search import buscar_productos
+from .facets import FiltrosCatalogo, filtrar_catalogo, contar_facetas, filtro_rango_precio
+from django.db import transaction
+from ComprasTiendaPublica.checkout import cambiar_estado, StockInsuficiente
 
-logger = logging.getLogger(__name__)
+log = get_logger(__name__)
 
 class TiendaViewSet(viewsets.ModelViewSet):
     queryset = Tienda.objects.all()
@@ -51,9 +60,8 @@ class TiendaViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         tenant = get_current_tenant()
-        logger.info(f"Tenant actual: {tenant}")
         if not tenant:
-            logger.warning("No se encontró tenant")
+            log.warning('tienda.sin_tenant', accion=self.action)
             return Tienda.objects.none()
         if self.action in ['public_store', 'public_products', 'public_categories']:
             return Tienda.objects.filter(tenant=tenant, publicado=True)
@@ -97,77 +105,52 @@ class TiendaViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get', 'patch'])
     def config(self, request):
-        logger.info("="*50)
-        logger.info("INICIO DE CONFIG")
-        logger.info("="*50)
-        
         user = request.user
         if not hasattr(user, 'tenant') or not user.tenant:
-            logger.warning("Config - Usuario sin tenant asignado")
+            log.warning('tienda.config.sin_tenant', usuario_id=user.pk)
             return Response(
                 {"error": "Este usuario no tiene una tienda asignada."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         tenant = user.tenant
-        logger.info(f"Config - Tenant actual: {tenant}")
-
-        logger.info(f"Config - Usuario actual: {request.user.username}")
-        logger.info(f"Config - Método: {request.method}")
-        logger.info(f"Config - Headers: {request.headers}")
-        logger.info(f"Config - Content-Type: {request.content_type}")
-        logger.info(f"Config - Datos recibidos (request.data): {request.data}")
-        logger.info(f"Config - Files recibidos (request.FILES): {request.FILES}")
-        logger.info(f"Config - Query params: {request.query_params}")
-        
-        if not tenant:
-            logger.warning("Config - No se encontró tenant")
-            return Response({"error": "No se encontró el tenant"}, status=status.HTTP_400_BAD_REQUEST)
+        log.debug(
+            'tienda.config.solicitud',
+            tenant_id=tenant.pk,
+            usuario_id=user.pk,
+            metodo=request.method,
+            content_type=request.content_type,
+            datos=lambda: request.data,
+            archivos=lambda: list(request.FILES),
+            query=lambda: request.query_params,
+        )
         
         try:
             tienda = Tienda.objects.filter(tenant=tenant).first()
 
             if not tienda:
-                logger.warning(f"Config - No se encontró tienda para el tenant {tenant.name}")
+                log.warning('tienda.config.sin_tienda', tenant_id=tenant.pk)
                 return Response({"error": "No se encontró la tienda"}, status=status.HTTP_404_NOT_FOUND)
 
-            logger.info(f"Config - Tienda encontrada: {tienda.nombre}")
-            logger.info(f"Config - Estado actual de la tienda: {self.get_serializer(tienda).data}")
-
             if request.method == 'PATCH':
-                logger.info("="*50)
-                logger.info("INICIO DE ACTUALIZACIÓN PATCH")
-                logger.info("="*50)
-                
                 # Create a mutable copy of the data
                 data = request.data.dict() if hasattr(request.data, 'dict') else request.data.copy()
-                logger.info(f"Config - Datos originales copiados: {data}")
                 
                 # Handle the published field
                 if 'publicado' in data:
-                    logger.info(f"Config - Valor original de publicado: {data['publicado']}")
                     if isinstance(data['publicado'], str):
                         data['publicado'] = data['publicado'].lower() == 'true'
                     else:
                         data['publicado'] = bool(data['publicado'])
-                    logger.info(f"Config - Valor procesado de publicado: {data['publicado']}")
                 
-                # Handle logo file upload
-                if 'logo' in request.FILES:
-                    logger.info(f"Config - Nuevo logo recibido: {request.FILES['logo']}")
-                    # The file will be handled by the serializer's update method
-                elif 'logo' in data and data['logo'] is None:
-                    logger.info("Config - Logo enviado como null, se eliminará el logo actual")
-                    # The None value will be handled by the serializer's update method
+                # The logo file (or a null logo, to remove it) is handled
+                # by the serializer's update method
                 
                 # Ensure optional fields are not None
                 for field in ['descripcion', 'tema', 'color_primario', 'color_secundario', 'color_texto', 'color_fondo']:
                     if field in data and data[field] is None:
-                        logger.info(f"Config - Campo {field} es None, estableciendo como vacío")
                         data[field] = ''
                 
-                logger.info(f"Config - Datos finales a procesar: {data}")
-                
                 # Create the serializer with the data and files
                 serializer = self.get_serializer(
                     tienda, 
@@ -175,92 +158,155 @@ class TiendaViewSet(viewsets.ModelViewSet):
                     partial=True,
                     context={'request': request}  # Pass the request to access FILES in the serializer
                 )
-                logger.info("Config - Serializador creado")
                 
                 if serializer.is_valid():
-                    logger.info(f"Config - Datos válidos: {serializer.validated_data}")
                     try:
                         # Actualizar la tienda
-                        logger.info("Config - Iniciando actualización de campos")
                         for key, value in serializer.validated_data.items():
-                            logger.info(f"Config - Actualizando campo {key}: {value}")
                             setattr(tienda, key, value)
-                        
-                        logger.info("Config - Guardando tienda")
                         tienda.save()
                         
-                        # Serializar la tienda actualizada
-                        response_serializer = self.get_serializer(tienda)
-                        logger.info(f"Config - Tienda actualizada: {response_serializer.data}")
-                        logger.info("Config - Tienda actualizada exitosamente")
-                        return Response(response_serializer.data)
+                        log.info(
+                            'tienda.config.actualizada',
+                            tienda_id=tienda.pk,
+                            campos=sorted(serializer.validated_data),
+                            logo='logo' in request.FILES,
+                        )
+                        return Response(self.get_serializer(tienda).data)
                     except Exception as e:
-                        logger.error(f"Config - Error al guardar: {str(e)}")
-                        logger.error(f"Config - Tipo de error: {type(e)}")
-                        logger.error(f"Config - Detalles del error: {e.__dict__}")
+                        log.exception('tienda.config.error_guardar', tienda_id=tienda.pk)
                         return Response({"error": f"Error al guardar los cambios: {str(e)}"}, 
                                      status=status.HTTP_500_INTERNAL_SERVER_ERROR)
                 else:
-                    logger.warning(f"Config - Errores de validación: {serializer.errors}")
-                    logger.warning(f"Config - Datos inválidos: {data}")
+                    log.warning(
+                        'tienda.config.datos_invalidos',
+                        tienda_id=tienda.pk,
+                        errores=serializer.errors,
+                        datos=data,
+                    )
                     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             else:
                 serializer = self.get_serializer(tienda)
-                logger.info(f"Config - Datos de tienda obtenidos: {serializer.data}")
+                log.info('tienda.config', tienda_id=tienda.pk, usuario_id=user.pk)
                 return Response(serializer.data)
                 
-        except Tienda.DoesNotExist:
-            logger.warning(f"Config - No se encontró tienda para el usuario {request.user.username} en el tenant {tenant.name}")
-            return Response({"error": "No se encontró la tienda"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            logger.error(f"Config - Error general: {str(e)}")
-            logger.error(f"Config - Tipo de error: {type(e)}")
-            logger.error(f"Config - Detalles del error: {e.__dict__}")
+            log.exception('tienda.config.error', tenant_id=tenant.pk)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        finally:
-            logger.info("="*50)
-            logger.info("FIN DE CONFIG")
-            logger.info("="*50)
 
     @action(detail=False, methods=['get'], url_path='(?P<slug>[^/.]+)/public_store', permission_classes=[permissions.AllowAny])
     def public_store(self, request, slug=None):
         try:
-            tienda = Tienda.objects.get(slug=slug, publicado=True)
-            serializer = self.get_serializer(tienda)
-            return Response(serializer.data)
+            return respuesta_publica(
+                request, slug, 'tienda',
+                lambda: self.get_serializer(Tienda.objects.get(slug=slug, publicado=True)).data
+            )
         except Tienda.DoesNotExist:
             return Response({"error": "No se encontró la tienda"}, status=status.HTTP_404_NOT_FOUND)
 
     @action(detail=False, methods=['get'], url_path='(?P<slug>[^/.]+)/public_products', permission_classes=[permissions.AllowAny])
     def public_products(self, request, slug=None):
-        try:
+        def build():
             tienda = Tienda.objects.get(slug=slug, publicado=True)
             productos = Producto.objects.filter(tienda=tienda)
-            serializer = ProductoSerializer(productos, many=True)
-            return Response(serializer.data)
+            return ProductoSerializer(productos, many=True).data
+
+        try:
+            return respuesta_publica(request, slug, 'productos', build)
         except Tienda.DoesNotExist:
             return Response({"error": "No se encontró la tienda"}, status=status.HTTP_404_NOT_FOUND)
 
     @action(detail=False, methods=['get'], url_path='(?P<slug>[^/.]+)/public_categories', permission_classes=[permissions.AllowAny])
     def public_categories(self, request, slug=None):
-        logger.info(f"Public Categories - Buscando tienda con slug: {slug}")
-        try:
+        def build():
             tienda = Tienda.objects.get(slug=slug, publicado=True)
-            logger.info(f"Public Categories - Tienda encontrada: {tienda.nombre}")
-            
             categorias = Categoria.objects.filter(tienda=tienda)
-            logger.info(f"Public Categories - Número de categorías encontradas: {categorias.count()}")
-            logger.info(f"Public Categories - Categorías: {[c.nombre for c in categorias]}")
-            
-            serializer = CategoriaSerializer(categorias, many=True)
-            return Response(serializer.data)
+            return CategoriaSerializer(categorias, many=True).data
+
+        try:
+            return respuesta_publica(request, slug, 'categorias', build)
         except Tienda.DoesNotExist:
-            logger.warning(f"Public Categories - No se encontró la tienda con slug: {slug}")
+            log.warning('tienda.public_categories.sin_tienda', slug=slug)
             return Response({"error": "No se encontró la tienda"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            logger.error(f"Public Categories - Error: {str(e)}")
+            log.exception('tienda.public_categories.error', slug=slug)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=['get'], url_path='(?P<slug>[^/.]+)/buscar', permission_classes=[permissions.AllowAny])
+    def buscar(self, request, slug=None):
+        """
+        Búsqueda de productos de la tienda pública, ordenada por relevancia.
+
+        Parámetros: q (texto), categoria (id), precio_min, precio_max,
+        page y page_size.
+        """
+        params = request.query_params
+        filtros = {
+            'categoria': self._parametro(params, 'categoria', int),
+            'precio_min': self._parametro(params, 'precio_min', Decimal),
+            'precio_max': self._parametro(params, 'precio_max', Decimal),
+        }
+
+        def build():
+            tienda = Tienda.objects.get(slug=slug, publicado=True)
+            productos = buscar_productos(tienda, params.get('q', ''), **filtros)
+            paginator = BusquedaPagination()
+            page = paginator.paginate_queryset(productos, request, view=self)
+            return paginator.get_paginated_response(ProductoSerializer(page, many=True).data).data
+
+        try:
+            return respuesta_publica(request, slug, 'buscar', build, variante=params.urlencode())
+        except Tienda.DoesNotExist:
+            return Response({"error": "No se encontró la tienda"}, status=status.HTTP_404_NOT_FOUND)
+
+    @action(detail=False, methods=['get'], url_path='(?P<slug>[^/.]+)/catalogo', permission_classes=[permissions.AllowAny])
+    def catalogo(self, request, slug=None):
+        """
+        Catálogo público filtrado por facetas, con los conteos de cada
+        faceta en la misma respuesta.
+
+        Parámetros: q (texto), categoria (id), precio (rango, p. ej. 25-50),
+        en_stock (1/0), page y page_size.
+        """
+        params = request.query_params
+        precio = params.get('precio') or None
+        if precio and filtro_rango_precio(precio) is None:
+            raise ValidationError({'precio': ["Rango de precio inválido"]})
+        en_stock = params.get('en_stock')
+        filtros = FiltrosCatalogo(
+            categoria=self._parametro(params, 'categoria', int),
+            precio=precio,
+            en_stock=None if en_stock in (None, '') else en_stock.lower() in ('1', 'true', 'si', 'sí'),
+        )
+        texto = params.get('q', '')
+
+        def build():
+            tienda = Tienda.objects.get(slug=slug, publicado=True)
+            productos, base = filtrar_catalogo(tienda, texto, filtros)
+            paginator = BusquedaPagination()
+            page = paginator.paginate_queryset(productos, request, view=self)
+            data = paginator.get_paginated_response(ProductoSerializer(page, many=True).data).data
+            # Los conteos no dependen de la página: se cachean aparte
+            data['facetas'] = storefront_cache.get_or_set(
+                slug, 'facetas', lambda: contar_facetas(base, filtros),
+                variante=hashlib.sha256(f'{texto.strip()}|{filtros.clave()}'.encode()).hexdigest()
+            )
+            return data
+
+        try:
+            return respuesta_publica(request, slug, 'catalogo', build, variante=params.urlencode())
+        except Tienda.DoesNotExist:
+            return Response({"error": "No se encontró la tienda"}, status=status.HTTP_404_NOT_FOUND)
+
+    @staticmethod
+    def _parametro(params, nombre, tipo):
+        valor = params.get(nombre)
+        if valor in (None, ''):
+            return None
+        try:
+            return tipo(valor)
+        except (ValueError, InvalidOperation):
+            raise ValidationError({nombre: ["Valor inválido"]})
 
 class CategoriaViewSet(viewsets.ModelViewSet):
     serializer_class = CategoriaSerializer
@@ -288,6 +334,7 @@ class CategoriaViewSet(viewsets.ModelViewSet):
 class ProductoViewSet(viewsets.ModelViewSet):
     serializer_class = ProductoSerializer
     permission_classes = [permissions.IsAuthenticated, IsStockManager]
+    pagination_class = ProductoCursorPagination
 
     def get_queryset(self):
         tenant = get_current_tenant()
@@ -299,10 +346,13 @@ class ProductoViewSet(viewsets.ModelViewSet):
             return Producto.all_objects.filter(tienda__tenant=tenant)
             
         # Para usuarios normales, solo mostrar productos no eliminados
-        return Producto.objects.filter(tienda__tenant=tenant)
+        queryset = Producto.objects.filter(tienda__tenant=tenant)
+        categoria = self.request.query_params.get('categoria')
+        if categoria and categoria.isdigit():
+            queryset = queryset.filter(categoria_id=categoria)
+        return queryset
 
     def perform_create(self, serializer):
-        logger.info(f"🔍 Debug - Datos recibidos en perform_create: {self.request.data}")
         tenant = get_current_tenant()
         if not tenant:
             raise serializers.ValidationError({"error": "No se encontró el tenant"})
@@ -312,16 +362,20 @@ class ProductoViewSet(viewsets.ModelViewSet):
                 raise serializers.ValidationError({"error": "No se encontró la tienda"})
                 
             instance = serializer.save(tienda=tienda)
-            logger.info(f"Debug - Producto creado con ID: {instance.id}, Stock: {instance.stock}")
+            log.info('producto.creado', producto_id=instance.pk, tienda_id=tienda.pk, stock=instance.stock)
             return instance
-        except Exception as e:
-            logger.error(f"Error al crear producto: {str(e)}")
+        except Exception:
+            log.exception('producto.error_crear', datos=lambda: self.request.data)
             raise
 
     def perform_update(self, serializer):
-        logger.info(f"Debug - Datos recibidos en perform_update: {self.request.data}")
         instance = serializer.save()
-        logger.info(f"Debug - Producto actualizado con ID: {instance.id}, Stock: {instance.stock}")
+        log.info(
+            'producto.actualizado',
+            producto_id=instance.pk,
+            stock=instance.stock,
+            campos=lambda: sorted(serializer.validated_data),
+        )
         return instance
 
     def perform_destroy(self, instance):
@@ -340,10 +394,10 @@ class ProductoViewSet(viewsets.ModelViewSet):
             # Realizamos la eliminación lógica
             instance.eliminado = True
             instance.save()
-            logger.info(f"Producto {instance.id} marcado como eliminado lógicamente")
+            log.info('producto.eliminado', producto_id=instance.pk)
             
-        except Exception as e:
-            logger.error(f"Error al eliminar el producto {instance.id}: {str(e)}")
+        except Exception:
+            log.exception('producto.error_eliminar', producto_id=instance.pk)
             raise
 
     @action(detail=False, methods=['get'], url_path='low-stock')
@@ -366,6 +420,7 @@ class ProductoViewSet(viewsets.ModelViewSet):
 class PedidoViewSet(viewsets.ModelViewSet):
     serializer_class = PedidoSerializer
     permission_classes = [permissions.IsAuthenticated, IsSeller]
+    pagination_class = PedidoCursorPagination
 
 
     def get_queryset(self):
@@ -399,8 +454,16 @@ class PedidoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        pedido.estado = nuevo_estado
-        pedido.save()
+        if pedido.origen == Pedido.ORIGEN_TIENDA_PUBLICA:
+            # Mismo tratamiento que en pedidos-publicos: stock y resúmenes diarios
+            try:
+                with transaction.atomic():
+                    cambiar_estado(pedido, nuevo_estado)
+            except StockInsuficiente as e:
+                return Response(e.detalle(), status=status.HTTP_400_BAD_REQUEST)
+        else:
+            pedido.estado = nuevo_estado
+            pedido.save()
         
         # Crear notificación
         NotificacionPedido.objects.create(
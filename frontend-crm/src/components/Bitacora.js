@@ -30,30 +30,41 @@ export default function Bitacora() {
   const [showFilters, setShowFilters] = useState(false);
   const [actions, setActions] = useState({});
   const [report, setReport] = useState(null);
+  // Enlaces de la paginación por cursor que devuelve el backend
+  const [pagination, setPagination] = useState({ next: null, previous: null });
   const navigate = useNavigate();
   useEffect(() => {
     fetchLogs();
     fetchActions();
   }, [filters]);
 
-  const fetchLogs = async () => {
+  // Sin `url` pide la primera página con los filtros actuales; con `url`
+  // sigue el enlace next/previous, que ya trae los filtros y el cursor.
+  const fetchLogs = async (url = null) => {
     try {
       setLoading(true);
       const token = localStorage.getItem('token');
-      const params = new URLSearchParams();
-      
-      if (filters.action) params.append('action', filters.action);
-      if (filters.startDate) params.append('start_date', filters.startDate);
-      if (filters.endDate) params.append('end_date', filters.endDate);
-      if (filters.userId) params.append('user_id', filters.userId);
+      let pageUrl = url;
 
-      const response = await axios.get(
-        `${config.apiUrl}/api/audit-logs/logs/?${params.toString()}`,
-        {
-          headers: { Authorization: `Bearer ${token}` }
-        }
-      );
-      setLogs(response.data);
+      if (!pageUrl) {
+        const params = new URLSearchParams();
+
+        if (filters.action) params.append('action', filters.action);
+        if (filters.startDate) params.append('start_date', filters.startDate);
+        if (filters.endDate) params.append('end_date', filters.endDate);
+        if (filters.userId) params.append('user_id', filters.userId);
+
+        pageUrl = `${config.apiUrl}/api/audit-logs/logs/?${params.toString()}`;
+      }
+
+      const response = await axios.get(pageUrl, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      setLogs(response.data.results);
+      setPagination({
+        next: response.data.next,
+        previous: response.data.previous
+      });
     } catch (error) {
       setError('Error al cargar los registros de la bitácora');
       console.error('Error:', error);
@@ -316,6 +327,26 @@ export default function Bitacora() {
                 </tbody>
               </table>
             </div>
+
+            {/* Paginación */}
+            {(pagination.previous || pagination.next) && (
+              <div className="mt-4 flex justify-between">
+                <button
+                  onClick={() => fetchLogs(pagination.previous)}
+                  disabled={!pagination.previous}
+                  className="px-4 py-2 bg-gray-200 text-gray-700 rounded-lg hover:bg-gray-300 disabled:opacity-50"
+                >
+                  Anterior
+                </button>
+                <button
+                  onClick={() => fetchLogs(pagination.next)}
+                  disabled={!pagination.next}
+                  className="px-4 py-2 bg-gray-200 text-gray-700 rounded-lg hover:bg-gray-300 disabled:opacity-50"
+                >
+                  Siguiente
+                </button>
+              </div>
+            )}
           </div>
         </div>
       </div>
@@ -1,7 +1,8 @@
-import React, { useState, useEffect, useMemo } from 'react';
-import ReactPaginate from 'react-paginate';
+import React, { useState, useEffect } from 'react';
 import { FaUsers, FaChartLine, FaMoneyBillWave, FaShoppingCart } from 'react-icons/fa';
 import API from '../../utils/api';
+import { fetchPage } from '../../utils/pagination';
+import CursorPagination from '../common/CursorPagination';
 import { useNavigate } from 'react-router-dom';
 import Header from '../common/Header';
 import LeadDetailModal from './LeadDetailModal';
@@ -47,29 +48,16 @@ const CRM = () => {
     const [searchTerm, setSearchTerm] = useState('');
     const [currentPage, setCurrentPage] = useState(0);
     const [itemsPerPage] = useState(10);
+    // Paginación por cursor: URL de la página actual, enlaces a la
+    // anterior/siguiente y total de leads que coinciden con los filtros
+    const [pageUrl, setPageUrl] = useState(null);
+    const [pagina, setPagina] = useState({ next: null, previous: null, count: 0 });
 
-    // Filtrar leads por término de búsqueda y estado
-    const filteredLeads = useMemo(() => {
-        return leads.filter(lead => {
-            const matchesSearch = searchTerm === '' || 
-                lead.nombre.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                (lead.email && lead.email.toLowerCase().includes(searchTerm.toLowerCase()));
-                
-            const matchesStatus = selectedStatus === 'todos' || lead.estado === selectedStatus;
-            
-            return matchesSearch && matchesStatus;
-        });
-    }, [leads, searchTerm, selectedStatus]);
-
-    // Obtener leads para la página actual
-    const paginatedLeads = useMemo(() => {
-        const startIndex = currentPage * itemsPerPage;
-        return filteredLeads.slice(startIndex, startIndex + itemsPerPage);
-    }, [filteredLeads, currentPage, itemsPerPage]);
-
-    // Manejar cambio de página
-    const handlePageClick = (data) => {
-        setCurrentPage(data.selected);
+    // Manejar cambio de página: sigue el enlace next/previous
+    const handlePageClick = (url, page) => {
+        setCurrentPage(page);
+        setPageUrl(url);
+        fetchLeads(url);
         window.scrollTo(0, 0);
     };
 
@@ -165,45 +153,10 @@ const CRM = () => {
             });
             
             // Actualizar la lista de leads y las métricas
-            const updatedLeads = await API.get('leads/');
-            setLeads(updatedLeads.data);
-            
-            // Calcular y actualizar las métricas
-            const totalLeads = updatedLeads.data.length;
-            const valorTotalPipeline = updatedLeads.data.reduce((sum, lead) => {
-                // Asegurarse de que el valor sea un número
-                const valor = parseFloat(lead.valor_estimado) || 0;
-                return sum + valor;
-            }, 0);
-            
-            const valorTotalCompras = updatedLeads.data.reduce((sum, lead) => {
-                // Asegurarse de que el valor sea un número
-                const valor = parseFloat(lead.valor_total_compras) || 0;
-                return sum + valor;
-            }, 0);
-            
-            const promedioCompras = totalLeads > 0 ? 
-                updatedLeads.data.reduce((sum, lead) => {
-                    // Asegurarse de que el valor sea un número
-                    const valor = parseFloat(lead.frecuencia_compra) || 0;
-                    return sum + valor;
-                }, 0) / totalLeads : 0;
-                
-            // Contar leads por estado
-            const leadsPorEstado = {};
-            updatedLeads.data.forEach(lead => {
-                if (lead.estado) {
-                    leadsPorEstado[lead.estado] = (leadsPorEstado[lead.estado] || 0) + 1;
-                }
-            });
-            
-            setMetricas({
-                total_leads: totalLeads,
-                valor_total_pipeline: parseFloat(valorTotalPipeline.toFixed(2)),
-                valor_total_compras: parseFloat(valorTotalCompras.toFixed(2)),
-                promedio_compras: parseFloat(promedioCompras.toFixed(2)),
-                leads_por_estado: leadsPorEstado
-            });
+            setCurrentPage(0);
+            setPageUrl(null);
+            fetchLeads(null);
+            fetchMetricas();
         } catch (error) {
             console.error('Error creando lead:', error);
             const errorMessage = error.response?.data || error.message || 'Error al crear el lead';
@@ -257,64 +210,53 @@ const CRM = () => {
         fetchUserProfile();
     }, []);
 
-    // Cargar leads y métricas cuando el perfil esté disponible
+    // Cargar las métricas cuando el perfil esté disponible
     useEffect(() => {
         if (userProfile) {
-            fetchLeads();
             fetchMetricas();
         }
     }, [userProfile]);
 
-    const fetchLeads = async () => {
+    // Cargar la primera página de leads con los filtros actuales; los
+    // filtros se aplican en el backend (la búsqueda espera a que se deje
+    // de escribir)
+    useEffect(() => {
+        if (!userProfile) return;
+        const timer = setTimeout(() => {
+            setCurrentPage(0);
+            setPageUrl(null);
+            fetchLeads(null);
+        }, searchTerm ? 300 : 0);
+        return () => clearTimeout(timer);
+    }, [userProfile, searchTerm, selectedStatus]);
+
+    const fetchLeads = async (url = pageUrl) => {
         try {
-            const response = await API.get('leads/');
-            const leadsData = response.data;
-            console.log('Datos de leads recibidos:', leadsData);
-            
+            const params = {};
+            if (!url) {
+                params.page_size = itemsPerPage;
+                params.con_total = 1;
+                if (selectedStatus !== 'todos') params.estado = selectedStatus;
+                if (searchTerm) params.q = searchTerm;
+            }
+            const page = await fetchPage(API, url || 'leads/', { params });
+
             // Procesar los leads para asegurar que los valores numéricos sean correctos
-            const processedLeads = leadsData.map(lead => ({
+            const processedLeads = page.results.map(lead => ({
                 ...lead,
                 valor_estimado: parseFloat(lead.valor_estimado) || 0,
                 valor_total_compras: parseFloat(lead.valor_total_compras) || 0,
                 frecuencia_compra: parseFloat(lead.frecuencia_compra) || 0
             }));
-            
+
             setLeads(processedLeads);
-            
-            // Calcular métricas con los valores procesados
-            const totalLeads = processedLeads.length;
-            const valorTotalPipeline = processedLeads.reduce((sum, lead) => sum + (lead.valor_estimado || 0), 0);
-            const valorTotalCompras = processedLeads.reduce((sum, lead) => sum + (lead.valor_total_compras || 0), 0);
-            
-            // Cálculo del promedio de compras
-            const sumaTotalCompras = processedLeads.reduce((sum, lead) => {
-                const valor = parseFloat(lead.valor_total_compras) || 0;
-                console.log(`Lead ${lead.id} - Valor total compras:`, lead.valor_total_compras, 'Valor numérico:', valor);
-                return sum + valor;
-            }, 0);
-            
-            console.log('Suma total de compras:', sumaTotalCompras);
-            console.log('Total de leads:', totalLeads);
-            
-            const promedioCompras = totalLeads > 0 ? sumaTotalCompras / totalLeads : 0;
-            console.log('Promedio calculado:', promedioCompras);
-            
-            // Contar leads por estado
-            const leadsPorEstado = {};
-            processedLeads.forEach(lead => {
-                if (lead.estado) {
-                    leadsPorEstado[lead.estado] = (leadsPorEstado[lead.estado] || 0) + 1;
-                }
-            });
-            
-            setMetricas({
-                total_leads: totalLeads,
-                valor_total_pipeline: parseFloat(valorTotalPipeline.toFixed(2)),
-                valor_total_compras: parseFloat(valorTotalCompras.toFixed(2)),
-                promedio_compras: parseFloat(promedioCompras.toFixed(2)),
-                leads_por_estado: leadsPorEstado
-            });
-            
+            // El total solo llega con la primera página
+            setPagina(prev => ({
+                next: page.next,
+                previous: page.previous,
+                count: page.count ?? prev.count
+            }));
+
             setError('');
         } catch (error) {
             console.error('Error al obtener leads:', error);
@@ -403,20 +345,14 @@ const CRM = () => {
                             placeholder="Buscar por nombre o email..."
                             className="w-full border rounded px-3 py-2"
                             value={searchTerm}
-                            onChange={(e) => {
-                                setSearchTerm(e.target.value);
-                                setCurrentPage(0); // Resetear a la primera página al buscar
-                            }}
+                            onChange={(e) => setSearchTerm(e.target.value)}
                         />
                     </div>
                     <div className="flex items-center space-x-4 w-full md:w-auto">
                         <select 
                             className="border rounded px-3 py-2 w-full md:w-auto"
                             value={selectedStatus}
-                            onChange={(e) => {
-                                setSelectedStatus(e.target.value);
-                                setCurrentPage(0); // Resetear a la primera página al cambiar el filtro
-                            }}
+                            onChange={(e) => setSelectedStatus(e.target.value)}
                         >
                             <option value="todos">Todos los estados</option>
                             <option value="nuevo">Nuevo</option>
@@ -428,7 +364,7 @@ const CRM = () => {
                             <option value="perdido">Perdido</option>
                         </select>
                         <span className="text-sm text-gray-500">
-                            {filteredLeads.length} resultados
+                            {pagina.count} resultados
                         </span>
                     </div>
                     <div>
@@ -484,7 +420,7 @@ const CRM = () => {
                                 </tr>
                             </thead>
                             <tbody className="bg-white divide-y divide-gray-200">
-                                {paginatedLeads.map(lead => (
+                                {leads.map(lead => (
                                     <tr key={lead.id} className="hover:bg-gray-50">
                                         <td className="px-6 py-4 whitespace-nowrap">
                                             <button 
@@ -515,29 +451,18 @@ const CRM = () => {
                         </table>
                         
                         {/* Paginación */}
-                        {Math.ceil(filteredLeads.length / itemsPerPage) > 1 && (
+                        {(pagina.previous || pagina.next) && (
                             <div className="px-6 py-4 border-t">
                                 <div className="flex items-center justify-between">
                                     <div className="text-sm text-gray-500">
-                                        Mostrando {Math.min(currentPage * itemsPerPage + 1, filteredLeads.length)} a {Math.min((currentPage * itemsPerPage) + itemsPerPage, filteredLeads.length)} de {filteredLeads.length} resultados
+                                        Mostrando {Math.min(currentPage * itemsPerPage + 1, pagina.count)} a {Math.min(currentPage * itemsPerPage + leads.length, pagina.count)} de {pagina.count} resultados
                                     </div>
-                                    <ReactPaginate
-                                        previousLabel={'Anterior'}
-                                        nextLabel={'Siguiente'}
-                                        breakLabel={'...'}
-                                        pageCount={Math.ceil(filteredLeads.length / itemsPerPage)}
-                                        marginPagesDisplayed={2}
-                                        pageRangeDisplayed={5}
+                                    <CursorPagination
+                                        previous={pagina.previous}
+                                        next={pagina.next}
+                                        page={currentPage}
+                                        pageCount={Math.ceil(pagina.count / itemsPerPage)}
                                         onPageChange={handlePageClick}
-                                        containerClassName={'flex items-center space-x-1'}
-                                        pageClassName={'px-3 py-1 border rounded'}
-                                        pageLinkClassName={'text-blue-600'}
-                                        activeClassName={'bg-blue-100 border-blue-300'}
-                                        previousClassName={'px-3 py-1 border rounded'}
-                                        nextClassName={'px-3 py-1 border rounded'}
-                                        disabledClassName={'opacity-50 cursor-not-allowed'}
-                                        breakClassName={'px-2'}
-                                        forcePage={currentPage}
                                     />
                                 </div>
                             </div>
@@ -1,4 +1,4 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import Header from "./common/PublicHeader";
 import API from "../api/api";
@@ -11,6 +11,9 @@ export default function Cart() {
   const [mostrarFormulario, setMostrarFormulario] = useState(false);
   const [paymentMethods, setPaymentMethods] = useState([]);
   const [tiendaId, setTiendaId] = useState(null);
+  // Clave de idempotencia de la compra en curso: se mantiene en los reintentos
+  // para que el servidor no cree el pedido dos veces
+  const claveCompra = useRef(null);
 
   const [formData, setFormData] = useState({
     nombre: "",
@@ -186,6 +189,7 @@ export default function Cart() {
       }
 
       const detalles = cartItems.map((item) => ({
+        producto: item.id,
         nombre_producto: item.nombre,
         cantidad: item.quantity,
         precio_unitario: parseFloat(item.precio),
@@ -197,6 +201,10 @@ export default function Cart() {
         return;
       }
 
+      if (!claveCompra.current) {
+        claveCompra.current = crypto.randomUUID();
+      }
+
       const total = detalles.reduce((acc, item) => acc + item.subtotal, 0);
 
       if (!slug) {
@@ -224,6 +232,7 @@ export default function Cart() {
               "Content-Type": "application/json",
               "X-Requested-With": "XMLHttpRequest",
               Authorization: `Bearer ${tokenData.access}`, // ✅ CORRECTO
+              "Idempotency-Key": `lead-${claveCompra.current}`,
             },
           };
 
@@ -274,14 +283,22 @@ export default function Cart() {
       const response = await API.post("pedidos-publicos/", payload, {
         headers: {
           Authorization: `Bearer ${tokenData.access}`, // ✅ CORREGIDO AQUÍ TAMBIÉN
+          "Idempotency-Key": claveCompra.current,
         },
       });
 
+      claveCompra.current = null;
       alert("¡Compra realizada con éxito!");
       vaciarCarrito();
       setMostrarFormulario(false);
     } catch (error) {
       console.error("Full error object:", error);
+      // Si el servidor respondió (y no fue un error suyo) la compra no se
+      // hizo: el próximo intento, quizá con otros datos, usa una clave nueva
+      // (409 indica que la compra original todavía se está procesando)
+      if (error.response && error.response.status < 500 && error.response.status !== 409) {
+        claveCompra.current = null;
+      }
       if (error.response?.data) {
         console.error("Detalles del error:", error.response.data);
         const errorMessage = error.response.data.tienda_id
@@ -1,8 +1,8 @@
-import React, { useState, useEffect, useMemo } from 'react';
+import React, { useState, useEffect } from 'react';
 import { FaBox, FaTruck, FaCheck, FaTimes, FaExclamationTriangle, FaSearch, FaFilter, FaCalendarAlt, FaUser, FaMapMarkerAlt, FaPhone, FaCreditCard, FaBarcode } from 'react-icons/fa';
-import ReactPaginate from 'react-paginate';
 import API from '../../api/api';
-import '../../styles/pagination.css';
+import { fetchPage } from '../../utils/pagination';
+import CursorPagination from '../common/CursorPagination';
 
 export default function OrderManagement() {
   const [pedidos, setPedidos] = useState([]);
@@ -12,29 +12,47 @@ export default function OrderManagement() {
   const [busqueda, setBusqueda] = useState('');
   const [pedidoExpandido, setPedidoExpandido] = useState(null);
   
-  // Estado para la paginación
+  // Estado para la paginación: el backend pagina por cursor, así que se
+  // guarda la URL de la página actual y los enlaces a la anterior/siguiente
   const [currentPage, setCurrentPage] = useState(0);
+  const [pageUrl, setPageUrl] = useState(null);
+  const [pagina, setPagina] = useState({ next: null, previous: null, count: 0 });
   const itemsPerPage = 5; // Número de pedidos por página
 
+  // Los filtros se aplican en el backend; al cambiarlos se vuelve a la
+  // primera página (la búsqueda espera a que se deje de escribir)
   useEffect(() => {
-    fetchPedidos();
-  }, []);
+    const timer = setTimeout(() => {
+      setCurrentPage(0);
+      setPageUrl(null);
+      fetchPedidos(null);
+    }, busqueda ? 300 : 0);
+    return () => clearTimeout(timer);
+  }, [filtroEstado, busqueda]);
 
-  const fetchPedidos = async () => {
-    setLoading(true);
+  const fetchPedidos = async (url = pageUrl) => {
     setError(null);
     try {
-      console.log('Solicitando pedidos al backend...');
-      const response = await API.get('pedidos-publicos/por_tienda/');
-      console.log('Respuesta del backend:', response);
-      // Si la respuesta es un array, lo usamos, si no, usamos un array vacío
-      const pedidosData = Array.isArray(response.data) ? response.data : [];
-      console.log('Pedidos recibidos:', pedidosData);
-      setPedidos(pedidosData);
+      const params = {};
+      if (!url) {
+        params.page_size = itemsPerPage;
+        params.con_total = 1;
+        if (filtroEstado !== 'todos') params.estado = filtroEstado;
+        if (busqueda) params.q = busqueda;
+      }
+      const page = await fetchPage(API, url || 'pedidos-publicos/por_tienda/', { params });
+      setPedidos(page.results);
+      // El total solo llega con la primera página
+      setPagina(prev => ({
+        next: page.next,
+        previous: page.previous,
+        count: page.count ?? prev.count
+      }));
     } catch (err) {
       // Si es un 404, no hay pedidos, lo cual es normal
       if (err.response && err.response.status === 404) {
         setPedidos([]);
+        setPagina({ next: null, previous: null, count: 0 });
       } else {
         console.error('Error al cargar los pedidos:', err);
         setError('Error al cargar los pedidos. Por favor, intente nuevamente más tarde.');
@@ -91,36 +109,17 @@ export default function OrderManagement() {
     return iconos[estado] || <FaBox />;
   };
 
-  const pedidosFiltrados = useMemo(() => {
-    if (!pedidos || pedidos.length === 0) return [];
-    
-    return pedidos.filter(pedido => {
-      const coincideEstado = filtroEstado === 'todos' || pedido.estado === filtroEstado;
-      const coincideBusqueda = 
-        pedido.id.toString().includes(busqueda) ||
-        (pedido.cliente_nombre && pedido.cliente_nombre.toLowerCase().includes(busqueda.toLowerCase())) ||
-        (pedido.codigo_seguimiento && pedido.codigo_seguimiento.toLowerCase().includes(busqueda.toLowerCase()));
-      
-      return coincideEstado && coincideBusqueda;
-    });
-  }, [pedidos, filtroEstado, busqueda]);
-
-  // Lógica para la paginación
-  const pageCount = Math.ceil(pedidosFiltrados.length / itemsPerPage);
-  const offset = currentPage * itemsPerPage;
-  const currentPedidos = pedidosFiltrados.slice(offset, offset + itemsPerPage);
+  const hayFiltros = filtroEstado !== 'todos' || busqueda !== '';
+  const pageCount = Math.ceil(pagina.count / itemsPerPage);
 
-  // Manejador de cambio de página
-  const handlePageClick = (data) => {
-    setCurrentPage(data.selected);
+  // Manejador de cambio de página: sigue el enlace next/previous
+  const handlePageClick = (url, page) => {
+    setCurrentPage(page);
+    setPageUrl(url);
+    fetchPedidos(url);
     window.scrollTo(0, 0); // Opcional: volver al inicio de la página
   };
 
-  // Reiniciar a la primera página cuando cambian los filtros
-  useEffect(() => {
-    setCurrentPage(0);
-  }, [filtroEstado, busqueda]);
-
   if (loading) {
     return (
       <div className="flex items-center justify-center min-h-[400px]">
@@ -177,7 +176,7 @@ export default function OrderManagement() {
 
         {/* Lista de pedidos */}
         <div className="space-y-4">
-          {pedidos.length === 0 ? (
+          {pedidos.length === 0 && !hayFiltros ? (
             <div className="text-center py-16 bg-white rounded-xl shadow-sm border border-gray-100 max-w-2xl mx-auto px-6">
               <div className="inline-flex items-center justify-center w-20 h-20 rounded-full bg-blue-50 mb-4">
                 <FaBox className="h-10 w-10 text-blue-500" />
@@ -190,7 +189,7 @@ export default function OrderManagement() {
                 Comparte el enlace de tu tienda con tus clientes para empezar a recibir pedidos.
               </p>
             </div>
-          ) : pedidosFiltrados.length === 0 ? (
+          ) : pedidos.length === 0 ? (
             <div className="text-center py-12 bg-gray-50 rounded-lg border-2 border-dashed border-gray-200">
               <FaBox className="mx-auto h-12 w-12 text-gray-400" />
               <h3 className="mt-2 text-lg font-medium text-gray-900">No hay pedidos</h3>
@@ -209,7 +208,7 @@ export default function OrderManagement() {
             </div>
           ) : (
             <div className="space-y-4">
-              {currentPedidos.map((pedido) => (
+              {pedidos.map((pedido) => (
                 <div key={pedido.id} className="w-full border rounded-lg p-4 hover:shadow-md transition-all duration-200 bg-white">
                 <div 
                   className="flex justify-between items-start mb-4 cursor-pointer"
@@ -358,31 +357,15 @@ export default function OrderManagement() {
               
               
               {/* Componente de paginación */}
-              {pageCount > 1 && (
-                <div className="mt-6 flex justify-center">
-                  <ReactPaginate
-                    previousLabel={'Anterior'}
-                    nextLabel={'Siguiente'}
-                    breakLabel={'...'}
-                    pageCount={pageCount}
-                    marginPagesDisplayed={2}
-                    pageRangeDisplayed={3}
-                    onPageChange={handlePageClick}
-                    containerClassName={'pagination'}
-                    activeClassName={'active'}
-                    forcePage={currentPage}
-                    className="flex gap-2 items-center"
-                    pageClassName="page-item"
-                    pageLinkClassName="page-link"
-                    previousClassName="page-item"
-                    previousLinkClassName="page-link"
-                    nextClassName="page-item"
-                    nextLinkClassName="page-link"
-                    breakClassName="page-item"
-                    breakLinkClassName="page-link"
-                  />
-                </div>
-              )}
+              <div className="mt-6 flex justify-center">
+                <CursorPagination
+                  previous={pagina.previous}
+                  next={pagina.next}
+                  page={currentPage}
+                  pageCount={pageCount}
+                  onPageChange={handlePageClick}
+                />
+              </div>
             </div>
           )}
         </div>
@@ -115,245 +115,57 @@ export default function SalesReport() {
       setLoading(true);
       setError(null); // Limpiar errores previos
       setNoData(false); // Reiniciar estado de no datos
-      console.log('Fetching orders with filters:', filtros);
-      
-      let pedidos = [];
-      
-      try {
-        // Usar el endpoint de pedidos-publicos para obtener el historial completo
-        const response = await API.get('pedidos-publicos/por_tienda/');
-        console.log('Raw API response:', response.data);
-
-        // Procesar datos para el reporte
-        pedidos = Array.isArray(response.data) ? response.data : [];
-        console.log('Total orders fetched:', pedidos.length);
-        
-        // Si no hay pedidos, mostrar mensaje amigable
-        if (pedidos.length === 0) {
-          setReportData({
-            totalVentas: 0,
-            pedidosPorEstado: {},
-            ventasPorDia: [],
-            productosMasVendidos: [],
-            ventasPorMetodoPago: {}
-          });
-          setNoData(true);
-          setLoading(false);
-          return;
-        }
-      } catch (apiError) {
-        console.error('Error al obtener los pedidos:', apiError);
-        // Verificar si es un error de red
-        if (apiError.message === 'Network Error') {
-          setError('No se pudo conectar al servidor. Por favor, verifica tu conexión a internet.');
-        } else if (apiError.response?.status === 404) {
-          setError('No se encontraron pedidos en el sistema.');
-        } else if (apiError.response?.status === 403) {
-          setError('No tienes permiso para ver este reporte.');
-        } else {
-          setError('Ocurrió un error al cargar los datos. Por favor, intenta de nuevo más tarde.');
-        }
-        setLoading(false);
-        return;
-      }
-      
-      // Obtener métodos de pago únicos con manejo de errores
-      const metodosPagoUnicos = [...new Set(
-        pedidos
-          .map(pedido => pedido?.metodo_pago)
-          .filter(metodo => metodo && typeof metodo === 'string')
-      )];
-      
-      setMetodosPago(metodosPagoUnicos);
-      
-      // Función para normalizar fechas a inicio/fin de día
-      const normalizarFecha = (fecha, finDeDia = false) => {
-        try {
-          if (!fecha) return null;
-          const d = new Date(fecha);
-          if (isNaN(d.getTime())) return null;
-          
-          if (finDeDia) {
-            d.setHours(23, 59, 59, 999);
-          } else {
-            d.setHours(0, 0, 0, 0);
-          }
-          return d;
-        } catch (e) {
-          console.error('Error al normalizar fecha:', fecha, e);
-          return null;
-        }
-      };
 
-      // Obtener fechas de filtro
-      const fechaInicio = normalizarFecha(filtros.fechaInicio);
-      const fechaFin = normalizarFecha(filtros.fechaFin, true);
-      
-      if (!fechaInicio || !fechaFin) {
-        setError('Las fechas de filtro no son válidas');
-        setLoading(false);
-        return;
-      }
-      
-      console.log('Filtro de fechas - Inicio:', fechaInicio);
-      console.log('Filtro de fechas - Fin:', fechaFin);
-      
-      // Filtrar pedidos por fecha
-      const pedidosFiltradosPorFecha = pedidos.filter(pedido => {
-        try {
-          // Manejar diferentes formatos de fecha
-          const fechaPedidoStr = pedido.fecha_creacion || pedido.fecha_compra || pedido.fecha;
-          if (!fechaPedidoStr) {
-            console.warn('Pedido sin fecha válida:', pedido);
-            return false; // Excluir pedidos sin fecha
-          }
-          
-          // Crear objeto de fecha y ajustar zona horaria
-          let fechaPedido = new Date(fechaPedidoStr);
-          
-          // Si la fecha es inválida, intentar parsear manualmente
-          if (isNaN(fechaPedido.getTime())) {
-            // Intentar con formato ISO 8601
-            const match = fechaPedidoStr.match(/(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})/);
-            if (match) {
-              fechaPedido = new Date(`${match[1]}T${match[2]}`);
-            }
-            
-            if (isNaN(fechaPedido.getTime())) {
-              console.warn('Fecha inválida en pedido:', pedido);
-              return false; // Excluir fechas inválidas
-            }
-          }
-          
-          // Ajustar la fecha al inicio del día para comparación
-          const fechaPedidoInicioDia = normalizarFecha(fechaPedido);
-          
-          // Verificar si la fecha del pedido está dentro del rango
-          const dentroDelRango = fechaPedidoInicioDia >= fechaInicio && fechaPedidoInicioDia <= fechaFin;
-          
-          if (!dentroDelRango) {
-            console.log('Pedido fuera de rango:', {
-              id: pedido.id,
-              fechaPedido: fechaPedido,
-              fechaInicio,
-              fechaFin,
-              dentroDelRango
-            });
-          }
-          
-          return dentroDelRango;
-        } catch (e) {
-          console.error('Error al procesar fecha del pedido:', pedido, e);
-          return true; // Incluir pedidos con error en el procesamiento
+      // El backend calcula los totales del rango; ya no se descargan los pedidos
+      const response = await API.get('pedidos-publicos/reporte_ventas/', {
+        params: {
+          fecha_inicio: filtros.fechaInicio,
+          fecha_fin: filtros.fechaFin,
+          estado: filtros.estado,
+          metodo_pago: filtros.metodoPago
         }
       });
-      
-      console.log('Pedidos después de filtrar por fecha (todos incluidos):', pedidosFiltradosPorFecha);
-      console.log('Total de pedidos después de filtrar por fecha:', pedidosFiltradosPorFecha.length);
+      const reporte = response.data || {};
 
-      // Filtrar por estado y método de pago
-      const pedidosFiltrados = pedidosFiltradosPorFecha.filter(pedido => {
-        const cumpleEstado = filtros.estado === 'todos' || pedido.estado === filtros.estado;
-        const cumpleMetodoPago = filtros.metodoPago === 'todos' || pedido.metodo_pago === filtros.metodoPago;
-        return cumpleEstado && cumpleMetodoPago;
-      });
-      
-      console.log('Pedidos después de filtrar:', pedidosFiltrados);
-
-      console.log('Pedidos después de filtrar:', pedidosFiltrados);
-      
-      // Calcular total de ventas con manejo de errores
-      const totalVentas = pedidosFiltrados.reduce((acc, pedido) => {
-        try {
-          return acc + (parseFloat(pedido.total) || 0);
-        } catch (e) {
-          console.error('Error al procesar total del pedido:', pedido, e);
-          return acc;
-        }
-      }, 0);
-      console.log('Total de ventas calculado:', totalVentas);
-      
-      // Agrupar por estado
-      const pedidosPorEstado = pedidosFiltrados.reduce((acc, pedido) => {
-        if (pedido.estado) {
-          acc[pedido.estado] = (acc[pedido.estado] || 0) + 1;
-        } else {
-          console.warn('Pedido sin estado:', pedido);
-          acc['sin_estado'] = (acc['sin_estado'] || 0) + 1;
-        }
-        return acc;
-      }, {});
-
-      // Agrupar por método de pago
-      const ventasPorMetodoPago = pedidosFiltrados.reduce((acc, pedido) => {
-        try {
-          const metodo = pedido.metodo_pago || 'sin_metodo';
-          const total = parseFloat(pedido.total) || 0;
-          acc[metodo] = (acc[metodo] || 0) + total;
-        } catch (e) {
-          console.error('Error al procesar método de pago del pedido:', pedido, e);
-        }
-        return acc;
-      }, {});
+      setMetodosPago(Array.isArray(reporte.metodos_pago) ? reporte.metodos_pago : []);
 
-      // Productos más vendidos
-      const productosMasVendidos = pedidosFiltrados.reduce((acc, pedido) => {
-        try {
-          // Verificar si hay detalles en el formato de PedidoPublico
-          const detalles = pedido.detalles || [];
-          
-          if (!Array.isArray(detalles)) {
-            console.warn('Detalles no es un array:', detalles);
-            return acc;
-          }
-          
-          detalles.forEach(detalle => {
-            try {
-              // Extraer información del producto del detalle
-              const nombreProducto = detalle.nombre_producto || 'Producto desconocido';
-              const cantidad = parseInt(detalle.cantidad || 0, 10);
-              const subtotal = parseFloat(detalle.subtotal || (detalle.precio_unitario * (detalle.cantidad || 0)) || 0);
-              
-              if (!nombreProducto) {
-                console.warn('Detalle sin nombre de producto:', detalle);
-                return;
-              }
-              
-              if (!acc[nombreProducto]) {
-                acc[nombreProducto] = { 
-                  nombre: nombreProducto,
-                  cantidad: 0, 
-                  total: 0 
-                };
-              }
-              
-              acc[nombreProducto].cantidad += cantidad;
-              acc[nombreProducto].total += subtotal;
-            } catch (e) {
-              console.error('Error al procesar detalle del pedido:', detalle, e);
-            }
-          });
-        } catch (e) {
-          console.error('Error al procesar pedido:', pedido, e);
-        }
-        return acc;
-      }, {});
-      
-      console.log('Productos más vendidos procesados:', productosMasVendidos);
+      const ventasPorMetodoPago = Object.fromEntries(
+        Object.entries(reporte.ventas_por_metodo_pago || {}).map(([metodo, total]) => [
+          metodo || 'sin_metodo',
+          parseFloat(total) || 0
+        ])
+      );
 
       setReportData({
-        totalVentas,
-        pedidosPorEstado,
-        ventasPorDia: pedidosFiltrados,
-        productosMasVendidos: Object.values(productosMasVendidos)
-          .sort((a, b) => b.cantidad - a.cantidad)
-          .slice(0, 5),
+        totalVentas: parseFloat(reporte.total_ventas) || 0,
+        pedidosPorEstado: reporte.pedidos_por_estado || {},
+        ventasPorDia: reporte.ventas_por_dia || [],
+        productosMasVendidos: (reporte.productos_mas_vendidos || []).map(producto => ({
+          nombre: producto.nombre || 'Producto desconocido',
+          cantidad: parseInt(producto.cantidad || 0, 10),
+          total: parseFloat(producto.total) || 0
+        })),
         ventasPorMetodoPago
       });
 
+      if (!reporte.total_pedidos) {
+        setNoData(true);
+      }
       setLoading(false);
-    } catch (err) {
-      setError('Error al cargar los datos del reporte');
+    } catch (apiError) {
+      console.error('Error al obtener el reporte de ventas:', apiError);
+      // Verificar si es un error de red
+      if (apiError.message === 'Network Error') {
+        setError('No se pudo conectar al servidor. Por favor, verifica tu conexión a internet.');
+      } else if (apiError.response?.status === 404) {
+        setError('No se encontraron pedidos en el sistema.');
+      } else if (apiError.response?.status === 403) {
+        setError('No tienes permiso para ver este reporte.');
+      } else if (apiError.response?.status === 400) {
+        setError(apiError.response.data?.error || 'Las fechas de filtro no son válidas');
+      } else {
+        setError('Ocurrió un error al cargar los datos. Por favor, intenta de nuevo más tarde.');
+      }
       setLoading(false);
     }
   };
@@ -25,6 +25,8 @@ export default function TiendaPublica() {
   const [showProducts, setShowProducts] = useState(false);
   const [searchTerm, setSearchTerm] = useState("");
   const [priceRange, setPriceRange] = useState("all");
+  // IDs de productos que devuelve la búsqueda del servidor, por relevancia
+  const [searchResults, setSearchResults] = useState(null);
 
   const cartKey = `cart_${slug}`;
   const tokenKey = `token_${slug}`;
@@ -86,6 +88,26 @@ export default function TiendaPublica() {
     fetchStoreData();
   }, [slug]);
 
+  useEffect(() => {
+    const q = searchTerm.trim();
+    if (!q) {
+      setSearchResults(null);
+      return;
+    }
+
+    const timeout = setTimeout(async () => {
+      try {
+        const response = await API.get(`tiendas/tiendas/${slug}/buscar/`, {
+          params: { q, page_size: 100 },
+        });
+        setSearchResults(response.data.results.map((p) => p.id));
+      } catch (err) {
+        setSearchResults(null);
+      }
+    }, 300);
+    return () => clearTimeout(timeout);
+  }, [searchTerm, slug]);
+
   const isDark = storeStyle?.tema === "oscuro";
   const vista = storeStyle?.vista_producto;
 
@@ -135,12 +157,19 @@ export default function TiendaPublica() {
     );
   }
 
-  const filteredProducts = products.filter((p) => {
+  // Con búsqueda, los productos se muestran en el orden de relevancia
+  const searchedProducts = searchResults
+    ? searchResults
+        .map((id) => products.find((p) => p.id === id))
+        .filter(Boolean)
+    : products;
+
+  const filteredProducts = searchedProducts.filter((p) => {
     const matchCategory =
       selectedCategory === "all" || p.categoria_nombre === selectedCategory;
-    const matchSearch = p.nombre
-      .toLowerCase()
-      .includes(searchTerm.toLowerCase());
+    const matchSearch =
+      searchResults !== null ||
+      p.nombre.toLowerCase().includes(searchTerm.toLowerCase());
     const matchPrice = (() => {
       const price = Number(p.precio);
       switch (priceRange) {
@@ -6,6 +6,8 @@ import {
 } from 'react-icons/fa';
 import ProductForm from './ProductForm';
 import API from '../api/api';
+import { fetchPage, fetchCount } from '../utils/pagination';
+import CursorPagination from './common/CursorPagination';
 import StoreSettings from './Ecommerce/StoreSettings';
 import { useNavigate } from 'react-router-dom';
 import Header from './common/Header';
@@ -26,9 +28,25 @@ const COUNTRY_CURRENCIES = {
 };
 
 
+// Productos por página en la grilla (tres columnas)
+const PRODUCTS_PER_PAGE = 12;
+
+// Fecha de inicio para los ingresos totales en el reporte de ventas
+const INICIO_HISTORICO = '2000-01-01';
+
+// AAAA-MM-DD en la zona horaria local
+const formatISODate = (date) => {
+  const month = String(date.getMonth() + 1).padStart(2, '0');
+  const day = String(date.getDate()).padStart(2, '0');
+  return `${date.getFullYear()}-${month}-${day}`;
+};
 
 export default function Store() {
   const [products, setProducts] = useState([]);
+  // Paginación por cursor de los productos (ver utils/pagination.js)
+  const [productsPage, setProductsPage] = useState(0);
+  const [productsPageUrl, setProductsPageUrl] = useState(null);
+  const [productsPagination, setProductsPagination] = useState({ next: null, previous: null, count: 0 });
   const [categories, setCategories] = useState([]);
   const [selectedCategory, setSelectedCategory] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -67,7 +85,9 @@ export default function Store() {
 
   // Solo cliente o stock pueden cargar productos y categorías
   if (user.role === 'cliente' || user.role === 'stock') {
-    fetchProducts();
+    setProductsPage(0);
+    setProductsPageUrl(null);
+    fetchProducts(null);
     fetchCategories();
   }
 
@@ -81,7 +101,7 @@ export default function Store() {
   if (user?.role === 'cliente' || user?.role === 'vendedor' || user?.role === 'stock') {
     fetchStats();
   }
-}, [products, user]);
+}, [productsPagination.count, user]);
 
 
   const checkStore = async () => {
@@ -100,18 +120,35 @@ export default function Store() {
     }
   };
 
-  const fetchProducts = async () => {
+  // Sin `url` pide la primera página de la categoría seleccionada
+  const fetchProducts = async (url = productsPageUrl) => {
     try {
-      const response = await API.get('tiendas/productos/');
-      const filtered = selectedCategory
-        ? response.data.filter(p => p.categoria === selectedCategory)
-        : response.data;
-      setProducts(filtered);
+      const params = {};
+      if (!url) {
+        params.page_size = PRODUCTS_PER_PAGE;
+        params.con_total = 1;
+        if (selectedCategory) params.categoria = selectedCategory;
+      }
+      const page = await fetchPage(API, url || 'tiendas/productos/', { params });
+      setProducts(page.results);
+      // El total solo llega con la primera página
+      setProductsPagination(prev => ({
+        next: page.next,
+        previous: page.previous,
+        count: page.count ?? prev.count
+      }));
     } catch (err) {
       setError('Error al cargar los productos');
     }
   };
 
+  const handleProductsPageClick = (url, page) => {
+    setProductsPage(page);
+    setProductsPageUrl(url);
+    fetchProducts(url);
+    window.scrollTo(0, 0);
+  };
+
   const fetchCategories = async () => {
     try {
       const response = await API.get('tiendas/categorias/');
@@ -125,37 +162,34 @@ export default function Store() {
 const fetchStats = async () => {
   try {
     const statsData = {
-      totalProducts: products.length,
+      totalProducts: productsPagination.count,
       totalOrders: 0,
       totalRevenue: 0,
       monthlyRevenue: 0,
       lowStock: 0
     };
 
-    // Solo cliente y vendedor ven pedidos e ingresos
+    // Solo cliente y vendedor ven pedidos e ingresos. El total de pedidos
+    // se cuenta en el backend (con_total) y los ingresos salen del reporte
+    // de ventas, sin descargar los pedidos.
     if (user?.role === 'cliente' || user?.role === 'vendedor') {
-      const pedidosResponse = await API.get('pedidos-publicos/por_tienda/');
       const now = new Date();
-      const currentMonth = now.getMonth();
-      const currentYear = now.getFullYear();
-      
-      // Calcular ingresos totales y del mes actual
-      statsData.totalOrders = pedidosResponse.data.length;
-      
-      pedidosResponse.data.forEach(pedido => {
-        const pedidoDate = new Date(pedido.fecha_creacion || pedido.fecha);
-        const pedidoMonth = pedidoDate.getMonth();
-        const pedidoYear = pedidoDate.getFullYear();
-        const monto = parseFloat(pedido.total) || 0;
-        
-        // Sumar a ingresos totales
-        statsData.totalRevenue += monto;
-        
-        // Sumar a ingresos del mes si corresponde
-        if (pedidoMonth === currentMonth && pedidoYear === currentYear) {
-          statsData.monthlyRevenue += monto;
-        }
-      });
+      const hoy = formatISODate(now);
+      const inicioMes = formatISODate(new Date(now.getFullYear(), now.getMonth(), 1));
+
+      const [totalOrders, reporteTotal, reporteMes] = await Promise.all([
+        fetchCount(API, 'pedidos-publicos/por_tienda/'),
+        API.get('pedidos-publicos/reporte_ventas/', {
+          params: { fecha_inicio: INICIO_HISTORICO, fecha_fin: hoy, top: 1 }
+        }),
+        API.get('pedidos-publicos/reporte_ventas/', {
+          params: { fecha_inicio: inicioMes, fecha_fin: hoy, top: 1 }
+        })
+      ]);
+
+      statsData.totalOrders = totalOrders;
+      statsData.totalRevenue = parseFloat(reporteTotal.data.total_ventas) || 0;
+      statsData.monthlyRevenue = parseFloat(reporteMes.data.total_ventas) || 0;
     }
 
     // Solo cliente o stock consultan stock bajo
@@ -275,7 +309,7 @@ const formatCurrency = (amount) => {
         <div className="flex items-center justify-between">
           <div>
             <p className="text-gray-500">Total Productos</p>
-            <h3 className="text-2xl font-bold">{products.length}</h3>
+            <h3 className="text-2xl font-bold">{productsPagination.count}</h3>
           </div>
           <FaBox className="text-blue-600 text-2xl" />
         </div>
@@ -487,6 +521,16 @@ const formatCurrency = (amount) => {
   )}
 </div>
 
+<div className="mt-8 flex justify-center">
+  <CursorPagination
+    previous={productsPagination.previous}
+    next={productsPagination.next}
+    page={productsPage}
+    pageCount={Math.ceil(productsPagination.count / PRODUCTS_PER_PAGE)}
+    onPageChange={handleProductsPageClick}
+  />
+</div>
+
         </>
       );
     }
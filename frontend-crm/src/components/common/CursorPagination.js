@@ -0,0 +1,41 @@
+import React from 'react';
+import '../../styles/pagination.css';
+
+// Controles Anterior/Siguiente para listados con paginación por cursor.
+// El backend no permite saltar a una página arbitraria: solo se siguen los
+// enlaces next/previous de la página actual.
+export default function CursorPagination({ previous, next, onPageChange, page, pageCount }) {
+  if (!previous && !next) return null;
+
+  return (
+    <ul className="pagination flex gap-2 items-center">
+      <li className={`page-item ${previous ? '' : 'disabled'}`}>
+        <button
+          type="button"
+          className="page-link"
+          disabled={!previous}
+          onClick={() => onPageChange(previous, page - 1)}
+        >
+          Anterior
+        </button>
+      </li>
+      {pageCount > 0 && (
+        <li className="page-item">
+          <span className="page-link break-me">
+            Página {page + 1} de {pageCount}
+          </span>
+        </li>
+      )}
+      <li className={`page-item ${next ? '' : 'disabled'}`}>
+        <button
+          type="button"
+          className="page-link"
+          disabled={!next}
+          onClick={() => onPageChange(next, page + 1)}
+        >
+          Siguiente
+        </button>
+      </li>
+    </ul>
+  );
+}
@@ -0,0 +1,29 @@
+// Listados con paginación por cursor: { next, previous, results, count? }.
+// Pide una sola página y la devuelve como { results, next, previous, count }.
+// `url` es la ruta del listado (con sus filtros en config.params) o el enlace
+// next/previous de la página anterior, que ya trae filtros y cursor.
+// `count` solo viene cuando se pide con con_total=1.
+// Si la respuesta no está paginada se devuelve como una única página.
+export const fetchPage = async (api, url, config = {}) => {
+  const response = await api.get(url, config);
+  const data = response.data;
+  if (!data || !Array.isArray(data.results)) {
+    const results = Array.isArray(data) ? data : [];
+    return { results, next: null, previous: null, count: results.length };
+  }
+  return {
+    results: data.results,
+    next: data.next,
+    previous: data.previous,
+    count: data.count ?? null
+  };
+};
+
+// Total de registros de un listado sin descargarlos: una página de un
+// elemento con con_total=1.
+export const fetchCount = async (api, url, params = {}) => {
+  const page = await fetchPage(api, url, {
+    params: { ...params, con_total: 1, page_size: 1 }
+  });
+  return page.count ?? page.results.length;
+};